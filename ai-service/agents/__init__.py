@@ -1,26 +1,73 @@
-from fastapi import FastAPI
-from pydantic import BaseModel
-
-# Import try normal agents first, fall back to simple agents if dependencies are missing
-try:
-    from agents.resume_parser import ResumeParserAgent
-    from agents.jd_parser import JDParserAgent
-    from agents.matching import MatchingAgent
-    from agents.summarization import SummarizationAgent
-    from agents.gap_detection import GapDetectionAgent
-    from agents.scheduler import SchedulerAgent
-    print("Using full AI agents with all dependencies")
-except ImportError:
-    # If dependencies are missing, use simplified agents
-    from agents.simple_agents import (
-        SimpleResumeParserAgent as ResumeParserAgent,
-        SimpleJDParserAgent as JDParserAgent,
-        SimpleMatchingAgent as MatchingAgent,
-        SimpleSummarizationAgent as SummarizationAgent,
-        SimpleGapDetectionAgent as GapDetectionAgent,
-        SimpleSchedulerAgent as SchedulerAgent
-    )
-    print("Using simplified agents (some dependencies missing)")
-
-# Now you can use these agents in your code
-# This helps with development and testing when all dependencies aren't installed
+import importlib
+
+# Agent name -> (module, class) for the full agents and their simplified fallbacks.
+# Nothing is imported here so that importing the package stays cheap; classes are
+# resolved on first use and fall back to the simplified agents when dependencies are missing.
+# The model libraries are imported when an agent loads its models, so the fallback happens
+# in create_agent, when the agent is constructed, rather than at import.
+FULL_AGENTS = {
+    "resume_parser": ("agents.resume_parser", "ResumeParserAgent"),
+    "jd_parser": ("agents.jd_parser", "JDParserAgent"),
+    "matching": ("agents.matching", "MatchingAgent"),
+    "summarization": ("agents.summarization", "SummarizationAgent"),
+    "gap_detection": ("agents.gap_detection", "GapDetectionAgent"),
+    "scheduler": ("agents.scheduler", "SchedulerAgent"),
+}
+
+SIMPLE_AGENTS = {
+    "resume_parser": ("agents.simple_agents", "SimpleResumeParserAgent"),
+    "jd_parser": ("agents.simple_agents", "SimpleJDParserAgent"),
+    "matching": ("agents.simple_agents", "SimpleMatchingAgent"),
+    "summarization": ("agents.simple_agents", "SimpleSummarizationAgent"),
+    "gap_detection": ("agents.simple_agents", "SimpleGapDetectionAgent"),
+    "scheduler": ("agents.simple_agents", "SimpleSchedulerAgent"),
+}
+
+
+def _offline() -> bool:
+    import config
+    
+    return config.OFFLINE
+
+
+def load_agent_class(name: str):
+    """Import the full agent class, falling back to the simplified agent if dependencies are missing"""
+    module_name, class_name = FULL_AGENTS[name]
+    try:
+        return getattr(importlib.import_module(module_name), class_name)
+    except ImportError as e:
+        # Offline mode fails fast instead of serving the triage tier as full results
+        if _offline():
+            raise
+        # If dependencies are missing, use simplified agents
+        print(f"Using simplified {name} agent (dependency missing: {e})")
+        return _simple_agent_class(name)
+
+
+def _simple_agent_class(name: str):
+    module_name, class_name = SIMPLE_AGENTS[name]
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def create_agent(name: str):
+    """
+    Construct the full agent, falling back to the simplified agent if its models can't be loaded
+    
+    In offline mode (AI_SERVICE_OFFLINE) missing models are errors, not a fallback.
+    """
+    from agents.model_loader import ModelUnavailableError
+    
+    try:
+        return load_agent_class(name)()
+    except (ImportError, ModelUnavailableError) as e:
+        if _offline():
+            raise
+        # Model libraries are imported and models loaded on construction
+        print(f"Using simplified {name} agent (models unavailable: {e})")
+        return _simple_agent_class(name)()
+
+
+def agent_tier(agent) -> str:
+    """'triage' for a simplified agent, else 'full'"""
+    simple_modules = {module_name for module_name, _ in SIMPLE_AGENTS.values()}
+    return "triage" if type(agent).__module__ in simple_modules else "full"
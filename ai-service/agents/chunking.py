@@ -0,0 +1,165 @@
+import math
+from typing import Any, Callable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from agents.document import iter_lines, split_sentences
+from agents.long_document import HEADER_LINE
+
+# Share of the window kept free: sentences are counted one by one, and joining them can
+# tokenize slightly differently
+WINDOW_MARGIN = 0.02
+# A chunk ends early at a section start only once it is this full, so aligning to sections
+# costs little window
+SECTION_CUT_FILL = 0.75
+
+
+class Unit(NamedTuple):
+    """A sentence with its token count; section_start marks the first sentence of a section"""
+    text: str
+    tokens: int
+    section_start: bool
+
+
+class Chunk(NamedTuple):
+    """Text for one generate call, its token count and how many of its tokens repeat the previous chunk"""
+    text: str
+    tokens: int
+    overlap: int
+
+
+def window_tokens(tokenizer, model_config: Any = None, limit: int = 0) -> int:
+    """
+    Input tokens a chunk may fill: the model window less special tokens and a margin
+    
+    Args:
+        tokenizer: The model's tokenizer (model_max_length gives the window)
+        model_config: The model's config, whose max_position_embeddings caps the window
+        limit: Smaller window to use instead (0 for none)
+    """
+    window = tokenizer.model_max_length
+    max_positions = getattr(model_config, "max_position_embeddings", None)
+    if max_positions:
+        window = min(window, max_positions)
+    if limit > 0:
+        window = min(window, limit)
+    special = tokenizer.num_special_tokens_to_add() if hasattr(tokenizer, "num_special_tokens_to_add") else 2
+    return int((window - special) * (1 - WINDOW_MARGIN))
+
+
+def sentences(text: str, max_words: int) -> Iterator[Tuple[str, bool]]:
+    """(sentence, starts a section) for each sentence of text, whitespace collapsed, up to max_words words"""
+    remaining = max_words
+    for _, line in iter_lines(text):
+        if not line.strip():
+            continue
+        section_start = HEADER_LINE.fullmatch(line) is not None
+        for sentence in split_sentences(line):
+            sentence_words = sentence.split()
+            if len(sentence_words) >= remaining:
+                yield " ".join(sentence_words[:remaining]), section_start
+                return
+            remaining -= len(sentence_words)
+            yield " ".join(sentence_words), section_start
+            section_start = False
+
+
+def _fit(units: Sequence[Unit], budget: int) -> Iterator[Unit]:
+    """Units no longer than budget: longer sentences are cut into even runs of words"""
+    for unit in units:
+        if unit.tokens <= budget:
+            yield unit
+            continue
+        # Token counts of the pieces are estimated from their share of the words, so the
+        # pieces aim a little under the budget
+        words = unit.text.split()
+        pieces = min(math.ceil(unit.tokens / (budget * 0.9)), len(words))
+        size = math.ceil(len(words) / pieces)
+        for index, start in enumerate(range(0, len(words), size)):
+            piece = words[start:start + size]
+            yield Unit(" ".join(piece), math.ceil(unit.tokens * len(piece) / len(words)),
+                       unit.section_start and index == 0)
+
+
+def _tail(units: List[Unit], overlap: int) -> List[Unit]:
+    """The last units of a chunk, up to overlap tokens, to open the next chunk with"""
+    tail: List[Unit] = []
+    tokens = 0
+    for unit in reversed(units):
+        if tokens + unit.tokens > overlap:
+            break
+        tail.insert(0, unit)
+        tokens += unit.tokens
+    return tail
+
+
+def pack(units: Sequence[Unit], budget: int, overlap: int = 0) -> List[Chunk]:
+    """
+    Pack sentences into as few chunks of at most budget tokens as they fit
+    
+    A chunk that overflows ends before the last section start in its last quarter (long
+    windows are cut at sections the same way), else after its last whole sentence. The next chunk opens with the
+    new section, or with up to overlap tokens of the chunk's last sentences.
+    """
+    chunks: List[Chunk] = []
+    current: List[Unit] = []
+    carried = 0
+    
+    def emit(end: int) -> None:
+        chunks.append(Chunk(" ".join(unit.text for unit in current[:end]),
+                            sum(unit.tokens for unit in current[:end]), carried))
+    
+    for unit in _fit(units, budget):
+        tokens = sum(item.tokens for item in current)
+        if current and tokens + unit.tokens > budget:
+            cut = _section_cut(current, budget, unit.tokens)
+            emit(cut or len(current))
+            if cut:
+                current, carried = current[cut:], 0
+            else:
+                current = _tail(current, overlap)
+                # Repeated context gives way to new text
+                while current and sum(item.tokens for item in current) + unit.tokens > budget:
+                    current.pop(0)
+                carried = sum(item.tokens for item in current)
+        current.append(unit)
+    
+    # A last chunk with nothing new in it is left out
+    if current and sum(unit.tokens for unit in current) > carried:
+        emit(len(current))
+    return chunks
+
+
+def _section_cut(current: List[Unit], budget: int, next_tokens: int) -> Optional[int]:
+    """Index of the last section start past SECTION_CUT_FILL of the budget, if the rest fits with the next sentence"""
+    before = 0
+    cut = None
+    for index, unit in enumerate(current):
+        if index and unit.section_start and before >= budget * SECTION_CUT_FILL:
+            cut = index
+        before += unit.tokens
+    if cut is None:
+        return None
+    remainder = sum(unit.tokens for unit in current[cut:])
+    return cut if remainder + next_tokens <= budget else None
+
+
+def chunk_text(text: str, count_tokens: Callable[[List[str]], List[int]], budget: int,
+               overlap: int = 0, max_words: Optional[int] = None) -> List[Chunk]:
+    """
+    Split text into chunks that fill budget tokens, at sentence and section boundaries
+    
+    Args:
+        text: Text to split (line breaks mark sections and sentence ends)
+        count_tokens: Token count of each of a list of texts (one tokenizer call)
+        budget: Most tokens per chunk (see window_tokens)
+        overlap: Most tokens of the previous chunk each chunk repeats for context
+        max_words: Words of text considered (None for all)
+    
+    Returns:
+        The chunks in order
+    """
+    pairs = list(sentences(text, max_words if max_words is not None else len(text)))
+    if not pairs:
+        return []
+    counts = count_tokens([sentence for sentence, _ in pairs])
+    units = [Unit(sentence, tokens, section_start) for (sentence, section_start), tokens in zip(pairs, counts)]
+    return pack(units, budget, min(overlap, budget // 2))
@@ -0,0 +1,218 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+import config
+from utils.metrics import stage
+
+# Signature layout: NUM_PERM MinHash values split into BANDS bands of ROWS rows.
+# A pair lands in a shared bucket with probability 1 - (1 - s^ROWS)^BANDS, which
+# rises steeply around s = (1 / BANDS) ^ (1 / ROWS) ~ 0.71 Jaccard similarity.
+NUM_PERM = 128
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 5
+SEED = 1
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+# Fixed permutations so signatures stay comparable across processes and restarts
+_rng = np.random.RandomState(SEED)
+_PERM_A = _rng.randint(1, 1 << 31, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.randint(0, 1 << 31, size=NUM_PERM, dtype=np.uint64)
+
+
+def normalize(text: str) -> str:
+    """Lowercase and strip punctuation and layout so reformatted copies shingle alike"""
+    return " ".join(re.findall(r"[a-z0-9@.+#]+", text.lower()))
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> np.ndarray:
+    """32-bit hashes of the word n-grams of normalized text"""
+    words = normalize(text).split()
+    if len(words) < size:
+        grams = [" ".join(words)] if words else []
+    else:
+        grams = [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+    hashes = {int.from_bytes(hashlib.blake2b(gram.encode("utf-8"), digest_size=4).digest(), "little")
+              for gram in grams}
+    return np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+
+
+def minhash(text: str) -> np.ndarray:
+    """MinHash signature of a document (NUM_PERM uint32 values)"""
+    hashes = shingles(text)
+    if hashes.size == 0:
+        return np.full(NUM_PERM, _MAX_HASH, dtype=np.uint32)
+    # (a * x + b) mod p for every permutation and shingle at once; a, b < 2^31 and
+    # x < 2^32 keep the product inside uint64
+    permuted = (np.outer(hashes, _PERM_A) + _PERM_B) % _MERSENNE_PRIME & _MAX_HASH
+    return permuted.min(axis=0).astype(np.uint32)
+
+
+def band_keys(signature: np.ndarray) -> List[bytes]:
+    """One bucket key per band"""
+    return [hashlib.blake2b(signature[band * ROWS:(band + 1) * ROWS].tobytes(), digest_size=8).digest()
+            for band in range(BANDS)]
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two signatures"""
+    return float(np.mean(a == b))
+
+
+class DuplicateIndex:
+    """
+    MinHash LSH index of resume texts kept in a local SQLite file
+    
+    Lookups only compare signatures of documents sharing at least one band bucket
+    with the query, so cost grows with the number of near neighbors rather than
+    with the size of the index.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS documents (
+                doc_id TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                signature BLOB NOT NULL,
+                metadata TEXT,
+                created_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS documents_content_hash ON documents (content_hash);
+            CREATE TABLE IF NOT EXISTS buckets (
+                band INTEGER NOT NULL,
+                bucket BLOB NOT NULL,
+                doc_id TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS buckets_lookup ON buckets (band, bucket);
+            CREATE INDEX IF NOT EXISTS buckets_doc ON buckets (doc_id);
+        """)
+        self._check_layout()
+    
+    def _check_layout(self) -> None:
+        """Refuse an index built with different signature parameters"""
+        layout = json.dumps({"numPerm": NUM_PERM, "bands": BANDS, "shingleSize": SHINGLE_SIZE, "seed": SEED})
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'layout'").fetchone()
+            if row is None:
+                self._conn.execute("INSERT INTO meta (key, value) VALUES ('layout', ?)", (layout,))
+            elif row[0] != layout:
+                raise ValueError(f"Dedup index {self.path} was built with {row[0]}; delete it to rebuild")
+    
+    def query(self, text: str, threshold: Optional[float] = None, limit: int = 10,
+              signature: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        """
+        Find indexed documents similar to a text
+        
+        Args:
+            text: Resume text
+            threshold: Minimum estimated Jaccard similarity (defaults to DEDUP_THRESHOLD)
+            limit: Maximum number of duplicates returned
+            signature: Signature of the text, if already computed
+        
+        Returns:
+            Duplicates, most similar first, with documentId, similarity, exact and metadata
+        """
+        threshold = config.DEDUP_THRESHOLD if threshold is None else threshold
+        if signature is None:
+            with stage("dedup", "minhash"):
+                signature = minhash(text)
+        content_hash = hashlib.sha256(normalize(text).encode("utf-8")).hexdigest()
+        
+        with stage("dedup", "lsh_lookup"):
+            with self._lock:
+                candidates = set()
+                for band, key in enumerate(band_keys(signature)):
+                    rows = self._conn.execute(
+                        "SELECT doc_id FROM buckets WHERE band = ? AND bucket = ?", (band, key)).fetchall()
+                    candidates.update(row[0] for row in rows)
+                documents = []
+                for doc_id in candidates:
+                    documents.append(self._conn.execute(
+                        "SELECT doc_id, content_hash, signature, metadata FROM documents WHERE doc_id = ?",
+                        (doc_id,)).fetchone())
+        
+        duplicates = []
+        for doc_id, other_hash, other_signature, metadata in filter(None, documents):
+            exact = other_hash == content_hash
+            score = 1.0 if exact else similarity(signature, np.frombuffer(other_signature, dtype=np.uint32))
+            if score >= threshold:
+                duplicates.append({
+                    "documentId": doc_id,
+                    "similarity": round(score, 4),
+                    "exact": exact,
+                    "metadata": json.loads(metadata) if metadata else {}
+                })
+        duplicates.sort(key=lambda d: d["similarity"], reverse=True)
+        return duplicates[:limit]
+    
+    def add(self, doc_id: str, text: str, metadata: Optional[Dict[str, Any]] = None,
+            signature: Optional[np.ndarray] = None) -> None:
+        """Index a document, replacing any previous version with the same id"""
+        if signature is None:
+            with stage("dedup", "minhash"):
+                signature = minhash(text)
+        content_hash = hashlib.sha256(normalize(text).encode("utf-8")).hexdigest()
+        
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM buckets WHERE doc_id = ?", (doc_id,))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO documents (doc_id, content_hash, signature, metadata, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (doc_id, content_hash, signature.astype(np.uint32).tobytes(),
+                 json.dumps(metadata) if metadata else None, time.time()))
+            self._conn.executemany(
+                "INSERT INTO buckets (band, bucket, doc_id) VALUES (?, ?, ?)",
+                [(band, key, doc_id) for band, key in enumerate(band_keys(signature))])
+    
+    def remove(self, doc_id: str) -> bool:
+        """Drop a document from the index"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM buckets WHERE doc_id = ?", (doc_id,))
+            return self._conn.execute("DELETE FROM documents WHERE doc_id = ?", (doc_id,)).rowcount > 0
+    
+    def check_and_add(self, text: str, doc_id: Optional[str] = None, threshold: Optional[float] = None,
+                      metadata: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Look up duplicates of a text, then index it under doc_id (if given)"""
+        with stage("dedup", "minhash"):
+            signature = minhash(text)
+        duplicates = self.query(text, threshold, signature=signature)
+        if doc_id:
+            self.add(doc_id, text, metadata, signature=signature)
+            duplicates = [d for d in duplicates if d["documentId"] != doc_id]
+        return duplicates
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+
+_index: Optional[DuplicateIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_index() -> DuplicateIndex:
+    """Shared index at DEDUP_INDEX_PATH, opened on first use"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = DuplicateIndex(config.DEDUP_INDEX_PATH)
+        return _index
@@ -0,0 +1,144 @@
+import re
+import threading
+from typing import Any, Callable, Iterator, List, Optional, Sequence, Tuple
+
+import config
+from agents.long_document import parse_windowed
+
+
+class Document(str):
+    """
+    Text shared by several stages of one request, with derived views computed once
+    
+    A Document is a str, so it can be passed to any agent; agents that know about it
+    reuse its spaCy parse and word split instead of recomputing them.
+    """
+    
+    def __new__(cls, text: str):
+        document = super().__new__(cls, text)
+        document._views = {}
+        document._locks = {}
+        document._locks_guard = threading.Lock()
+        return document
+    
+    def __reduce__(self):
+        # Sent to agent worker processes as plain text; views are recomputed there
+        return Document, (str(self),)
+    
+    def view(self, key: Any, compute: Callable[[], Any]) -> Any:
+        """Return a derived view, computing it on first use (once, even across threads)"""
+        if key in self._views:
+            return self._views[key]
+        # One lock per view, so a slow spaCy parse doesn't hold up the word split
+        with self._locks_guard:
+            lock = self._locks.setdefault(key, threading.Lock())
+        with lock:
+            if key not in self._views:
+                self._views[key] = compute()
+            return self._views[key]
+    
+    @property
+    def words(self) -> List[str]:
+        """Whitespace-separated words"""
+        return self.view("words", self.split)
+    
+    def spacy(self, nlp):
+        """spaCy parse with the given pipeline"""
+        return self.view(("spacy", id(nlp)), lambda: _parse(nlp, str(self)))
+    
+    def limited(self) -> "Document":
+        """This document cut to LONG_DOCUMENT_MAX_CHARS, shared by every stage"""
+        return self.view("limited", lambda: Document(self[:config.LONG_DOCUMENT_MAX_CHARS]))
+
+
+def _parse(nlp, text: str):
+    # Long texts are parsed window by window instead of as one Doc
+    if len(text) > config.LONG_DOCUMENT_CHARS:
+        return parse_windowed(nlp, text)
+    return nlp(text)
+
+
+def spacy_doc(nlp, text: str):
+    """spaCy parse of text (a LongDocument if it is long), shared when text is a Document"""
+    if isinstance(text, Document):
+        return text.spacy(nlp)
+    return _parse(nlp, text)
+
+
+def limit_text(text: str) -> str:
+    """text cut to LONG_DOCUMENT_MAX_CHARS (shared when text is a Document)"""
+    if len(text) <= config.LONG_DOCUMENT_MAX_CHARS:
+        return text
+    if isinstance(text, Document):
+        return text.limited()
+    return text[:config.LONG_DOCUMENT_MAX_CHARS]
+
+
+def iter_lines(text: str, start: int = 0) -> Iterator[Tuple[int, str]]:
+    """(offset, line) for each line of text from start, without splitting the whole text"""
+    while True:
+        end = text.find("\n", start)
+        if end == -1:
+            yield start, text[start:]
+            return
+        yield start, text[start:end]
+        start = end + 1
+
+
+def section_span(text: str, section_headers: Sequence[str],
+                 common_headers: Sequence[str]) -> Optional[Tuple[int, int]]:
+    """
+    Offsets of a section's content (without its header line), or None if it is missing
+    
+    The section starts after the first line containing one of section_headers and ends
+    before the next header-like line (all caps or ending with a colon) containing one of
+    common_headers. Lines are streamed, so long texts aren't copied line by line.
+    """
+    headers = [header.lower() for header in section_headers]
+    other_headers = [header.lower() for header in common_headers if header.lower() not in headers]
+    lines = iter_lines(text)
+    
+    # Find the start of the section
+    for line_start, line in lines:
+        lowered = line.lower()
+        if any(header in lowered for header in headers):
+            start = min(line_start + len(line) + 1, len(text))
+            break
+    else:
+        return None
+    
+    # Find the end of the section (next section header), or use the end of the document
+    end = len(text)
+    for line_start, line in lines:
+        line = line.strip().lower()
+        # Check if line is a header (all caps, ends with colon, etc.)
+        is_header = (line.isupper() or line.endswith(':')) and len(line) > 0
+        
+        # Check if line matches a common header
+        if is_header and any(header in line for header in other_headers):
+            end = line_start - 1
+            break
+    
+    # Trim surrounding whitespace
+    end = max(start, end)
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+# Sentence boundaries without NLTK: end punctuation followed by a capital, or a line break
+_SENTENCE_BREAK = re.compile(r'(?<=[.!?])\s+(?=[A-Z0-9"\'(])|\s*\n\s*')
+
+
+def split_sentences(text: str) -> List[str]:
+    """Sentences of text by punctuation and line breaks (a regex stand-in for sent_tokenize)"""
+    return [sentence.strip() for sentence in _SENTENCE_BREAK.split(text) if sentence and sentence.strip()]
+
+
+def words(text: str) -> List[str]:
+    """Words of text, shared when text is a Document"""
+    if isinstance(text, Document):
+        return text.words
+    return text.split()
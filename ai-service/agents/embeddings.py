@@ -0,0 +1,483 @@
+import base64
+import os
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from utils.metrics import record_cache
+
+# Sample texts used by the parity check when the caller provides none
+PARITY_TEXTS = [
+    "Python", "PostgreSQL", "Postgres", "Kubernetes", "Machine Learning", "React", "Node.js", "Communication",
+    "Built REST APIs in Python and deployed them on AWS with Docker",
+    "Led a team of five engineers delivering a payments platform",
+    "5+ years of experience with distributed systems",
+    "Bachelor's degree in Computer Science or related field",
+    "Design, build and maintain data pipelines for analytics",
+    "Strong written and verbal communication skills",
+    "Experience with CI/CD, Git and automated testing",
+    "Familiarity with TensorFlow or PyTorch for NLP tasks",
+]
+
+
+class EmbeddingBackend:
+    """
+    Interface for sentence embedding backends
+    
+    Backends wrap a locally loaded SentenceTransformer and expose the same
+    encode() contract: a string gives a 1-D vector, a list gives a 2-D array.
+    """
+    
+    name = "base"
+    
+    def __init__(self, model, model_name: str):
+        self.model = model
+        self.model_name = model_name
+    
+    @property
+    def model_id(self) -> str:
+        """Identifies the vector space; vectors with different ids must not be mixed"""
+        return f"{self.model_name}/{self.name}"
+    
+    def encode(self, texts, batch_size: int = 32, **kwargs) -> np.ndarray:
+        raise NotImplementedError
+    
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+
+class TorchBackend(EmbeddingBackend):
+    """Full-precision eager PyTorch (the reference backend)"""
+    
+    name = "torch"
+    
+    def encode(self, texts, batch_size: int = 32, **kwargs) -> np.ndarray:
+        return self.model.encode(texts, batch_size=batch_size, **kwargs)
+
+
+class QuantizedTorchBackend(EmbeddingBackend):
+    """Eager PyTorch with Linear layers dynamically quantized to int8"""
+    
+    name = "int8"
+    
+    def __init__(self, model, model_name: str):
+        super().__init__(model, model_name)
+        import copy
+        import torch
+        
+        # Quantize a copy so the full-precision model stays available as the reference
+        self.quantized = torch.quantization.quantize_dynamic(copy.deepcopy(model).cpu(), {torch.nn.Linear},
+                                                             dtype=torch.qint8)
+    
+    def encode(self, texts, batch_size: int = 32, **kwargs) -> np.ndarray:
+        return self.quantized.encode(texts, batch_size=batch_size, **kwargs)
+
+
+class _ExportedBackend(EmbeddingBackend):
+    """Shared tokenization and pooling for backends that run an exported transformer graph"""
+    
+    suffix = ""
+    
+    def __init__(self, model, model_name: str, export_dir: str):
+        super().__init__(model, model_name)
+        self.tokenizer = model.tokenizer
+        self.max_length = model.max_seq_length
+        
+        # Mirror the model's pooling configuration (paraphrase-MiniLM uses mean pooling, no normalization)
+        module_names = [type(module).__name__ for module in model]
+        self.normalize = "Normalize" in module_names
+        
+        os.makedirs(export_dir, exist_ok=True)
+        self.path = os.path.join(export_dir, model_name.replace("/", "_") + self.suffix)
+        if not os.path.exists(self.path):
+            self._export()
+        self._load()
+    
+    def _example_inputs(self):
+        features = self.tokenizer(["export example"], padding=True, truncation=True,
+                                  max_length=self.max_length, return_tensors="pt")
+        return features["input_ids"], features["attention_mask"]
+    
+    def _export(self) -> None:
+        raise NotImplementedError
+    
+    def _load(self) -> None:
+        raise NotImplementedError
+    
+    def _run(self, input_ids: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        """Return token embeddings (batch, tokens, dim) for one batch"""
+        raise NotImplementedError
+    
+    def encode(self, texts, batch_size: int = 32, **kwargs) -> np.ndarray:
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+        if not texts:
+            return np.zeros((0, self.get_sentence_embedding_dimension()), dtype=np.float32)
+        
+        # Sort by length so each batch pads as little as possible
+        order = np.argsort([-len(t) for t in texts])
+        output = np.empty((len(texts), self.get_sentence_embedding_dimension()), dtype=np.float32)
+        
+        for start in range(0, len(texts), batch_size):
+            indices = order[start:start + batch_size]
+            features = self.tokenizer([texts[i] for i in indices], padding=True, truncation=True,
+                                      max_length=self.max_length, return_tensors="np")
+            mask = features["attention_mask"].astype(np.int64)
+            token_embeddings = self._run(features["input_ids"].astype(np.int64), mask)
+            
+            # Mean pooling over real tokens
+            weights = mask[..., None].astype(np.float32)
+            pooled = (token_embeddings * weights).sum(axis=1) / np.clip(weights.sum(axis=1), 1e-9, None)
+            if self.normalize:
+                pooled = pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            output[indices] = pooled
+        
+        return output[0] if single else output
+
+
+class TorchScriptBackend(_ExportedBackend):
+    """Traced TorchScript graph of the transformer, saved next to the other exports"""
+    
+    name = "torchscript"
+    suffix = ".torchscript.pt"
+    
+    def _export(self) -> None:
+        import torch
+        
+        class _TokenEmbeddings(torch.nn.Module):
+            def __init__(self, transformer):
+                super().__init__()
+                self.transformer = transformer
+            
+            def forward(self, input_ids, attention_mask):
+                return self.transformer(input_ids=input_ids, attention_mask=attention_mask)[0]
+        
+        wrapper = _TokenEmbeddings(self.model[0].auto_model.cpu().eval())
+        with torch.no_grad():
+            traced = torch.jit.trace(wrapper, self._example_inputs(), strict=False)
+        torch.jit.save(traced, self.path)
+    
+    def _load(self) -> None:
+        import torch
+        
+        self.graph = torch.jit.load(self.path, map_location="cpu").eval()
+        self._torch = torch
+    
+    def _run(self, input_ids: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        with self._torch.inference_mode():
+            output = self.graph(self._torch.from_numpy(input_ids), self._torch.from_numpy(attention_mask))
+        return output.numpy()
+
+
+class OnnxBackend(_ExportedBackend):
+    """ONNX export of the transformer run with onnxruntime (optional dependency)"""
+    
+    name = "onnx"
+    suffix = ".onnx"
+    
+    def _export(self) -> None:
+        import torch
+        
+        transformer = self.model[0].auto_model.cpu().eval()
+        input_ids, attention_mask = self._example_inputs()
+        torch.onnx.export(
+            transformer, (input_ids, attention_mask), self.path,
+            input_names=["input_ids", "attention_mask"], output_names=["token_embeddings"],
+            dynamic_axes={"input_ids": {0: "batch", 1: "tokens"}, "attention_mask": {0: "batch", 1: "tokens"},
+                          "token_embeddings": {0: "batch", 1: "tokens"}},
+            opset_version=14
+        )
+    
+    def _load(self) -> None:
+        try:
+            import onnxruntime
+        except ImportError:
+            raise ImportError("The onnx embedding backend needs onnxruntime (pip install onnxruntime)")
+        
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = onnxruntime.InferenceSession(self.path, options, providers=["CPUExecutionProvider"])
+    
+    def _run(self, input_ids: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        return self.session.run(None, {"input_ids": input_ids, "attention_mask": attention_mask})[0]
+
+
+BACKENDS = {
+    "torch": TorchBackend,
+    "int8": QuantizedTorchBackend,
+    "torchscript": TorchScriptBackend,
+    "onnx": OnnxBackend,
+}
+
+
+def create_backend(name: str, model, model_name: str, export_dir: str) -> EmbeddingBackend:
+    """Wrap a loaded SentenceTransformer in the named backend"""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend '{name}' (choose from {', '.join(BACKENDS)})")
+    backend_class = BACKENDS[name]
+    if issubclass(backend_class, _ExportedBackend):
+        return backend_class(model, model_name, export_dir)
+    return backend_class(model, model_name)
+
+
+def _normalized(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+
+
+def _time_encode(backend: EmbeddingBackend, texts: List[str], repeats: int) -> Tuple[np.ndarray, float]:
+    """Encode texts repeatedly and return the embeddings with the best wall time"""
+    backend.encode(texts[:2])  # warm-up
+    best = float("inf")
+    embeddings = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        embeddings = np.asarray(backend.encode(texts), dtype=np.float32)
+        best = min(best, time.perf_counter() - start)
+    return embeddings, best
+
+
+def check_parity(reference: EmbeddingBackend, candidates: List[EmbeddingBackend],
+                 texts: Optional[List[str]] = None, tolerance: float = 0.01, repeats: int = 3) -> Dict[str, Any]:
+    """
+    Compare embedding backends against a reference backend
+    
+    Args:
+        reference: Backend treated as ground truth (normally eager torch)
+        candidates: Backends to compare
+        texts: Texts to embed (defaults to a built-in sample of skills and sentences)
+        tolerance: Largest acceptable change in any pairwise cosine similarity,
+            which is what moves match scores
+        repeats: Timing repetitions (the best run is used)
+    
+    Returns:
+        Drift and speedup per backend, plus the fastest backend within tolerance
+    """
+    texts = texts or PARITY_TEXTS
+    reference_vectors, reference_time = _time_encode(reference, texts, repeats)
+    reference_normalized = _normalized(reference_vectors)
+    reference_similarity = reference_normalized @ reference_normalized.T
+    
+    results = {}
+    for backend in candidates:
+        vectors, elapsed = _time_encode(backend, texts, repeats)
+        normalized = _normalized(vectors)
+        
+        # Drift of each vector from its reference, and of every pairwise similarity
+        self_cosine = np.sum(normalized * reference_normalized, axis=1)
+        similarity_drift = np.abs(normalized @ normalized.T - reference_similarity)
+        
+        results[backend.name] = {
+            "modelId": backend.model_id,
+            "cosineToReference": {"min": float(self_cosine.min()), "mean": float(self_cosine.mean())},
+            "similarityDrift": {"max": float(similarity_drift.max()), "mean": float(similarity_drift.mean())},
+            "encodeMs": elapsed * 1000,
+            "speedup": reference_time / elapsed if elapsed > 0 else None,
+            "withinTolerance": bool(similarity_drift.max() <= tolerance)
+        }
+    
+    # Fastest backend that stays within tolerance, unless none of them beats the reference
+    recommended = reference.name
+    best_speedup = 1.0
+    for name, result in results.items():
+        if result["withinTolerance"] and (result["speedup"] or 0) > best_speedup:
+            recommended, best_speedup = name, result["speedup"]
+    
+    return {
+        "reference": {"backend": reference.name, "modelId": reference.model_id, "encodeMs": reference_time * 1000},
+        "texts": len(texts),
+        "tolerance": tolerance,
+        "backends": results,
+        "recommended": recommended
+    }
+
+
+def resume_profile_text(resume: Dict[str, Any]) -> str:
+    """Flatten a parsed resume into the text compared against job requirements"""
+    resume_parts = []
+    
+    # Add skills
+    if 'skills' in resume and resume['skills']:
+        resume_parts.append("Skills: " + ", ".join(resume['skills']))
+    
+    # Add education
+    if 'education' in resume and resume['education']:
+        education_texts = []
+        for edu in resume['education']:
+            parts = []
+            for key, value in edu.items():
+                if value:
+                    parts.append(f"{key}: {value}")
+            education_texts.append(", ".join(parts))
+        resume_parts.append("Education: " + "; ".join(education_texts))
+    
+    # Add experience
+    if 'experience' in resume and resume['experience']:
+        experience_texts = []
+        for exp in resume['experience']:
+            parts = []
+            for key, value in exp.items():
+                if value:
+                    parts.append(f"{key}: {value}")
+            experience_texts.append(", ".join(parts))
+        resume_parts.append("Experience: " + "; ".join(experience_texts))
+    
+    # Combine all resume parts
+    return " ".join(resume_parts)
+
+
+def job_profile_text(job: Dict[str, Any]) -> str:
+    """Flatten a parsed job description into one text, the counterpart of resume_profile_text"""
+    job_parts = []
+    if job.get('title'):
+        job_parts.append(f"Title: {job['title']}")
+    if job.get('skills'):
+        job_parts.append("Skills: " + ", ".join(job['skills']))
+    if job.get('requirements'):
+        job_parts.append("Requirements: " + "; ".join(job['requirements']))
+    if job.get('responsibilities'):
+        job_parts.append("Responsibilities: " + "; ".join(job['responsibilities']))
+    return " ".join(job_parts)
+
+
+def resume_experience_text(resume_experience: List[Dict[str, str]]) -> str:
+    """Combine experience descriptions and titles into the text compared against responsibilities"""
+    experience_texts = []
+    for exp in resume_experience:
+        if 'description' in exp and exp['description']:
+            experience_texts.append(exp['description'])
+        if 'title' in exp and exp['title']:
+            experience_texts.append(exp['title'])
+    return " ".join(experience_texts)
+
+
+def _skill_forms(skills: List[str]) -> List[str]:
+    """Skills as written and lowercased (matching compares lowercase, gap detection original case)"""
+    forms = []
+    for skill in skills:
+        forms.extend([skill, skill.lower()])
+    return list(dict.fromkeys(forms))
+
+
+def resume_embedding_fields(resume: Dict[str, Any]) -> Dict[str, List[str]]:
+    """Texts the matching and gap detection agents will encode for this resume"""
+    fields = {"skills": _skill_forms(resume.get('skills', []))}
+    experience = resume_experience_text(resume.get('experience', []))
+    if experience:
+        fields["experience"] = [experience]
+    profile = resume_profile_text(resume)
+    if profile:
+        fields["profile"] = [profile]
+    return fields
+
+
+def job_embedding_fields(job: Dict[str, Any]) -> Dict[str, List[str]]:
+    """Texts the matching and gap detection agents will encode for this job"""
+    return {
+        "skills": _skill_forms(job.get('skills', [])),
+        "requirements": list(job.get('requirements', [])),
+        "responsibilities": list(job.get('responsibilities', []))
+    }
+
+
+def embed_fields(backend: EmbeddingBackend, fields: Dict[str, List[str]]) -> Dict[str, Any]:
+    """
+    Encode every field in one batch and pack the vectors compactly
+    
+    Args:
+        backend: Embedding backend (its model id tags the payload)
+        fields: Field name -> texts
+        
+    Returns:
+        Payload with float16 vectors base64-encoded per field, alongside their texts
+    """
+    all_texts = list(dict.fromkeys(text for texts in fields.values() for text in texts))
+    vectors = np.asarray(backend.encode(all_texts), dtype=np.float32) if all_texts else np.zeros((0, 0))
+    index = {text: i for i, text in enumerate(all_texts)}
+    
+    packed = {}
+    for name, texts in fields.items():
+        if not texts:
+            continue
+        field_vectors = vectors[[index[text] for text in texts]].astype(np.float16)
+        packed[name] = {"texts": texts, "vectors": base64.b64encode(field_vectors.tobytes()).decode("ascii")}
+    
+    return {
+        "modelId": backend.model_id,
+        "dtype": "float16",
+        "encoding": "base64",
+        "dim": int(vectors.shape[1]) if vectors.size else backend.get_sentence_embedding_dimension(),
+        "fields": packed
+    }
+
+
+class PrecomputedEmbeddings:
+    """
+    Text -> vector lookup built from embedding payloads returned by the parse endpoints
+    
+    Texts not found in the payloads are looked up in the skill taxonomy table (if
+    one is given) before falling back to the model.
+    """
+    
+    def __init__(self, taxonomy=None):
+        self.vectors: Dict[str, np.ndarray] = {}
+        self.taxonomy = taxonomy
+    
+    @classmethod
+    def from_documents(cls, model_id: str, *documents: Dict[str, Any], taxonomy=None) -> "PrecomputedEmbeddings":
+        """Collect vectors from parsed documents whose payload was made with model_id"""
+        lookup = cls(taxonomy)
+        for document in documents:
+            lookup.add(document.get('embeddings') if isinstance(document, dict) else None, model_id)
+        return lookup
+    
+    def add(self, payload: Optional[Dict[str, Any]], model_id: str) -> None:
+        """Add a payload's vectors, ignoring it if it was made by a different model"""
+        if not payload or payload.get("modelId") != model_id:
+            return
+        try:
+            dim = int(payload["dim"])
+            dtype = np.dtype(payload.get("dtype", "float16"))
+            for field in payload.get("fields", {}).values():
+                raw = field["vectors"]
+                data = base64.b64decode(raw) if isinstance(raw, str) else raw
+                matrix = np.frombuffer(data, dtype=dtype).reshape(-1, dim).astype(np.float32)
+                for text, vector in zip(field["texts"], matrix):
+                    self.vectors[text] = vector
+        except (KeyError, TypeError, ValueError):
+            # A malformed payload just means those texts get encoded again
+            return
+    
+    def __len__(self) -> int:
+        return len(self.vectors)
+    
+    def encode(self, backend: EmbeddingBackend, texts) -> np.ndarray:
+        """Encode like backend.encode, reusing precomputed vectors and encoding only the rest"""
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+        
+        missing = list(dict.fromkeys(text for text in texts if text not in self.vectors))
+        record_cache("precomputed_embeddings", not missing)
+        
+        # Known skills resolve from the taxonomy table; only unseen text goes to the model
+        if missing and self.taxonomy is not None:
+            unresolved = []
+            for text in missing:
+                vector = self.taxonomy.get(text)
+                record_cache("skill_taxonomy", vector is not None)
+                if vector is None:
+                    unresolved.append(text)
+                else:
+                    self.vectors[text] = vector
+            missing = unresolved
+        
+        if len(missing) == len(texts):
+            encoded = backend.encode(texts[0] if single else texts)
+            return np.asarray(encoded, dtype=np.float32)
+        
+        if missing:
+            for text, vector in zip(missing, np.asarray(backend.encode(missing), dtype=np.float32)):
+                self.vectors[text] = vector
+        
+        result = np.stack([self.vectors[text] for text in texts])
+        return result[0] if single else result
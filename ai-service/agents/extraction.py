@@ -0,0 +1,176 @@
+import re
+from bisect import bisect_left
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+
+class Entity(NamedTuple):
+    """A typed match with its offsets in the scanned text"""
+    kind: str
+    variant: str
+    start: int
+    end: int
+    text: str
+
+
+class Entities:
+    """Entities found by one scan, ordered by offset, with range lookups"""
+    
+    def __init__(self, entities: List[Entity]):
+        self.entities = entities
+        self._starts = [entity.start for entity in entities]
+    
+    def __iter__(self):
+        return iter(self.entities)
+    
+    def __len__(self) -> int:
+        return len(self.entities)
+    
+    def between(self, start: int = 0, end: Optional[int] = None, kinds: Union[str, Iterable[str], None] = None,
+                variant: Optional[str] = None) -> List[Entity]:
+        """Entities lying entirely within [start, end), optionally of the given kinds/variant"""
+        return list(self._iter(start, end, kinds, variant))
+    
+    def first(self, kinds: Union[str, Iterable[str]], start: int = 0, end: Optional[int] = None,
+              variant: Optional[str] = None) -> Optional[Entity]:
+        """First entity of the given kinds within [start, end), or None"""
+        return next(self._iter(start, end, kinds, variant), None)
+    
+    def _iter(self, start: int, end: Optional[int], kinds, variant: Optional[str]):
+        if isinstance(kinds, str):
+            kinds = (kinds,)
+        for index in range(bisect_left(self._starts, start), len(self.entities)):
+            entity = self.entities[index]
+            if end is not None and entity.start >= end:
+                break
+            if end is not None and entity.end > end:
+                continue
+            if kinds is not None and entity.kind not in kinds:
+                continue
+            if variant is not None and entity.variant != variant:
+                continue
+            yield entity
+
+
+class EntityScanner:
+    """
+    Finds several entity types in one pass over a text
+    
+    Every (kind, variant) branch is given as the class of characters it can start with
+    and the pattern for the rest. The branches are compiled into one regex that opens
+    with the union of those classes, so the regex engine skips straight to candidate
+    characters instead of trying every branch at every position. Where branches with
+    the same first-character class could match at the same position, the earlier one
+    wins; matches don't overlap.
+    
+    Kinds listed in extend_left are anchored on an inner character (the @ of an email)
+    and extended left over the given characters after matching; entities found inside
+    the extension are dropped. Branch patterns must not contain capturing groups.
+    """
+    
+    def __init__(self, branches: Sequence[Tuple[str, str, str, str]],
+                 extend_left: Optional[Dict[str, str]] = None, boundary_chars: str = ""):
+        # Branches sharing a first-character class are checked for it once, in the order
+        # the class first appears
+        groups: Dict[str, List[str]] = {}
+        for index, (kind, variant, first, rest) in enumerate(branches):
+            groups.setdefault(first, []).append(f"(?P<{kind}__{variant}__{index}>{rest})")
+        # The first character is consumed before the branches; each group checks it was one of its own
+        alternatives = [f"(?<={first})(?:{'|'.join(group)})" for first, group in groups.items()]
+        first_chars = "".join(first[1:-1] if first.startswith("[") else first for first in groups)
+        self.pattern = re.compile(f"[{first_chars}](?:{'|'.join(alternatives)})")
+        self.extend_left = {kind: frozenset(chars) for kind, chars in (extend_left or {}).items()}
+        self.boundary_chars = frozenset(boundary_chars)
+    
+    def scan(self, text: str, start: int = 0, end: Optional[int] = None) -> Entities:
+        """Scan text[start:end] once and return every entity found"""
+        entities = []
+        for match in self.pattern.finditer(text, start, len(text) if end is None else end):
+            kind, variant, _ = match.lastgroup.split("__", 2)
+            entity_start = match.start()
+            left_chars = self.extend_left.get(kind)
+            if left_chars is not None:
+                while entity_start > start and text[entity_start - 1] in left_chars:
+                    entity_start -= 1
+                # Start on a word character, as a leading \b would
+                while entity_start < match.start() and text[entity_start] in self.boundary_chars:
+                    entity_start += 1
+                if entity_start == match.start():
+                    continue
+                while entities and entities[-1].end > entity_start:
+                    entities.pop()
+            entities.append(Entity(kind, variant, entity_start, match.end(), text[entity_start:match.end()]))
+        return Entities(entities)
+
+
+def _boundary(first_width: int = 1) -> str:
+    """After the first character: it must not follow a word character (a leading \\b)"""
+    return f"(?<!\\w{'.' * first_width})"
+
+
+# Resume entities. Dates and years are the building blocks the parser splits experience
+# into entries with, so ranges are matched as a whole before their parts.
+_MONTH_REST = (r'(?:(?<=J)an|(?<=F)eb|(?<=M)ar|(?<=A)pr|(?<=M)ay|(?<=J)un|(?<=J)ul|(?<=A)ug|(?<=S)ep|(?<=O)ct|'
+               r'(?<=N)ov|(?<=D)ec)[a-z]* (?:19|20)\d{2}')
+_MONTH_YEAR = r'(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]* (?:19|20)\d{2}'
+_YEAR_REST = r'(?:(?<=1)9|(?<=2)0)\d{2}'
+_YEAR = r'(?:19|20)\d{2}'
+_RANGE_SEPARATOR = r'\s*(?:-|–|—|to)\s*'
+_NOT_LETTER_AFTER = r'(?![A-Za-z])'
+# Degrees other than the MBA are only taken when followed by a field of study
+_FOLLOWED_BY_FIELD = r'(?=\s+[^,\n\s])'
+_PHONE_TAIL = r'\)?[\s.-]?\d{3}[\s.-]?\d{4}\b'
+
+# (kind, variant, first character class, rest of the pattern)
+RESUME_ENTITIES = EntityScanner([
+    # Matched from the @; the local part is added by extend_left
+    ("email", "address", "@", r'(?<=[A-Za-z0-9._%+-]@)[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'),
+    # (123) 456-7890, 123-456-7890, +1 123 456 7890
+    ("phone", "formatted", r"\+", _boundary() + r'\d{1,3}[\s-]?\(?\d{3}' + _PHONE_TAIL),
+    ("phone", "formatted", r"\(", _boundary() + r'\d{3}' + _PHONE_TAIL),
+    ("phone", "formatted", r"\d", _boundary() + r'\d{2}' + _PHONE_TAIL),
+    # 1234567890, +11234567890
+    ("phone", "digits", r"\+", _boundary() + r'\d{1,3}[\s-]?\d{10,12}\b'),
+    ("phone", "digits", r"\d", _boundary() + r'\d{9,11}\b'),
+    ("date_range", "months", "[JFMASOND]", _MONTH_REST + _RANGE_SEPARATOR + r'(?:' + _MONTH_YEAR + r'|Present|Current)'),
+    ("date_range", "years", "[12]", _YEAR_REST + _RANGE_SEPARATOR + r'(?:' + _YEAR + r'|Present|Current)'),
+    ("date", "month", "[JFMASOND]", _MONTH_REST),
+    ("date", "year", "[12]", _YEAR_REST + r'(?:-|–|—)?(?:19|20)?\d{0,2}'),
+    # Longer names first, so "Master of Arts" isn't taken as "Master"
+    ("degree", "mba", "M", r'(?<![A-Za-z].)(?:aster of Business Administration|BA)' + _NOT_LETTER_AFTER),
+    ("degree", "bachelor", "B", r"(?<![A-Za-z].)(?:achelor of Science|achelor of Arts|achelor'?s?|\.?S\.?|\.?A\.?)"
+     + _NOT_LETTER_AFTER + _FOLLOWED_BY_FIELD),
+    ("degree", "master", "M", r"(?<![A-Za-z].)(?:aster of Science|aster of Arts|aster'?s?|\.?S\.?|\.?A\.?)"
+     + _NOT_LETTER_AFTER + _FOLLOWED_BY_FIELD),
+    ("degree", "doctorate", "[DP]", r'(?<![A-Za-z].)(?:(?<=D)octor of Philosophy|(?<=D)octorate|(?<=P)h\.?D\.?)'
+     + _NOT_LETTER_AFTER + _FOLLOWED_BY_FIELD),
+    ("institution", "named", "[UCIS]",
+     r'(?:(?<=U)niversity|(?<=C)ollege|(?<=I)nstitute|(?<=S)chool) of (?=[^,\n])'),
+], extend_left={"email": "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789._%+-"}, boundary_chars="._%+-")
+
+# Anchored follow-ups, run from an entity's end instead of rescanning the text
+DEGREE_FIELD = re.compile(r'\s+(?:degree\s+)?(?:in\s+)?([^,\n]+)')
+INSTITUTION_NAME = re.compile(r'[^,\n]+')
+YEAR = re.compile(_YEAR + r'(?:-|–|—)?(?:19|20)?\d{0,2}')
+
+# Technical skills recognised by keyword in resumes and job descriptions
+TECH_SKILLS = [
+    "Python", "Java", "JavaScript", "C++", "C#", "TypeScript", "PHP", "Go", "Ruby", "Swift",
+    "Kotlin", "React", "Angular", "Vue", "Node.js", "Express", "Django", "Flask", "Spring Boot",
+    "SQL", "MongoDB", "PostgreSQL", "MySQL", "Oracle", "AWS", "Azure", "GCP", "Docker", "Kubernetes",
+    "Machine Learning", "AI", "Data Science", "DevOps", "CI/CD", "Git", "HTML", "CSS", "TensorFlow",
+    "PyTorch", "Scikit-learn", "NLP", "Computer Vision", "REST API", "GraphQL", "Microservices"
+]
+
+# All skills in one alternation (longest first), so a text is scanned once instead of once per skill
+_SKILL_NAMES = {skill.lower(): skill for skill in TECH_SKILLS}
+_SKILL_KEYWORDS = re.compile(
+    r'\b(?:' + '|'.join(re.escape(skill) for skill in sorted(TECH_SKILLS, key=len, reverse=True)) + r')\b',
+    re.IGNORECASE)
+
+
+def find_skills(text: str) -> List[str]:
+    """Known technical skills mentioned in text, as spelled in TECH_SKILLS, in order of first mention"""
+    found = {}
+    for match in _SKILL_KEYWORDS.finditer(text):
+        found.setdefault(_SKILL_NAMES[match.group(0).lower()], None)
+    return list(found)
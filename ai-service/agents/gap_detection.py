@@ -1,28 +1,61 @@
-from typing import Dict, Any, List, Set
-from sentence_transformers import SentenceTransformer, util
+from typing import Dict, Any, List, Set, Optional
+from sentence_transformers import util
+from agents.embeddings import PrecomputedEmbeddings, resume_profile_text
+from agents.model_loader import load_sentence_model
+from agents.skill_taxonomy import get_taxonomy
+from utils.metrics import stage
+from utils.result_store import source_digest
 
 class GapDetectionAgent:
     """Agent for detecting gaps between resume and job requirements"""
     
+    # Bump when gap detection changes in a way the source digest can't see
+    SCORER_VERSION = "1"
+    
+    # Similarity above which a job skill counts as present, and below which a
+    # requirement counts as missing
+    SKILL_MATCH_THRESHOLD = 0.75
+    REQUIREMENT_MATCH_THRESHOLD = 0.6
+    
     def __init__(self):
-        # Load pre-trained Sentence-BERT model
-        try:
-            self.model = SentenceTransformer('paraphrase-MiniLM-L6-v2')
-        except:
-            # Fallback to simpler model if needed
-            self.model = SentenceTransformer('all-MiniLM-L6-v2')
+        # Load pre-trained Sentence-BERT model (shared between agents)
+        self.model, self.model_id = load_sentence_model()
+        
+        # Precomputed skill embedding table, if built for this model
+        self.taxonomy = get_taxonomy(self.model_id)
+    
+    def _encode(self, texts, precomputed: Optional[PrecomputedEmbeddings] = None):
+        """Encode text(s) with the sentence model, reusing precomputed vectors when available"""
+        with stage("gap_detection", "encode"):
+            if precomputed is not None:
+                return precomputed.encode(self.model, texts)
+            return self.model.encode(texts)
+    
+    def scorer_signature(self) -> Dict[str, Any]:
+        """Everything a stored gap result depends on besides the resume and job"""
+        return {
+            "scorer": "gap_detection",
+            "version": self.SCORER_VERSION,
+            "modelId": self.model_id,
+            "thresholds": {"skills": self.SKILL_MATCH_THRESHOLD, "requirements": self.REQUIREMENT_MATCH_THRESHOLD},
+            "source": source_digest(__name__, "agents.embeddings", "agents.skill_taxonomy")
+        }
     
     def detect(self, resume: Dict[str, Any], job: Dict[str, Any]) -> Dict[str, Any]:
         """
         Detect gaps between resume and job requirements
         
         Args:
-            resume: Parsed resume data
-            job: Parsed job description data
+            resume: Parsed resume data (may carry precomputed 'embeddings')
+            job: Parsed job description data (may carry precomputed 'embeddings')
             
         Returns:
             Dictionary with gap results
         """
+        # Vectors shipped with the parsed data are reused when they come from our model,
+        # and known skills come from the taxonomy table
+        precomputed = PrecomputedEmbeddings.from_documents(self.model_id, resume, job, taxonomy=self.taxonomy)
+        
         # Extract data for gap detection
         resume_skills = resume.get('skills', [])
         job_skills = job.get('skills', [])
@@ -30,10 +63,10 @@ class GapDetectionAgent:
         job_requirements = job.get('requirements', [])
         
         # Find missing skills
-        missing_skills = self._detect_missing_skills(resume_skills, job_skills)
+        missing_skills = self._detect_missing_skills(resume_skills, job_skills, precomputed)
         
         # Find missing requirements
-        missing_requirements = self._detect_missing_requirements(resume, job_requirements)
+        missing_requirements = self._detect_missing_requirements(resume, job_requirements, precomputed)
         
         # Combine all gaps
         all_gaps = list(missing_skills) + missing_requirements
@@ -44,7 +77,8 @@ class GapDetectionAgent:
             "missingRequirements": missing_requirements
         }
     
-    def _detect_missing_skills(self, resume_skills: List[str], job_skills: List[str]) -> Set[str]:
+    def _detect_missing_skills(self, resume_skills: List[str], job_skills: List[str],
+                               precomputed: Optional[PrecomputedEmbeddings] = None) -> Set[str]:
         """Detect skills in job requirements that are missing from the resume"""
         if not resume_skills or not job_skills:
             return set(job_skills) if job_skills else set()
@@ -67,11 +101,22 @@ class GapDetectionAgent:
         if len(missing_skills) > 0 and len(resume_skills) > 0:
             remaining_job_skills_indices = [i for i in range(len(job_skills)) if i not in matched_skills]
             
+            # Skills with a close known neighbor on the resume are matched from the
+            # precomputed neighbor graph without computing any similarities
+            if self.taxonomy is not None:
+                resume_skill_set = set(resume_skills)
+                remaining_job_skills_indices = [
+                    i for i in remaining_job_skills_indices
+                    if not any(score > self.SKILL_MATCH_THRESHOLD and neighbor in resume_skill_set
+                               for neighbor, score in self.taxonomy.neighbors(job_skills[i]))
+                ]
+                missing_skills = set(job_skills[i] for i in remaining_job_skills_indices)
+            
             if remaining_job_skills_indices:
                 # Compute embeddings
-                resume_embeddings = self.model.encode(resume_skills)
+                resume_embeddings = self._encode(resume_skills, precomputed)
                 remaining_job_skills = [job_skills[i] for i in remaining_job_skills_indices]
-                job_embeddings = self.model.encode(remaining_job_skills)
+                job_embeddings = self._encode(remaining_job_skills, precomputed)
                 
                 # Calculate cosine similarity matrix
                 similarity_matrix = util.cos_sim(resume_embeddings, job_embeddings)
@@ -83,7 +128,7 @@ class GapDetectionAgent:
                     best_match = similarity_matrix[:, j].max().item()
                     
                     # If similarity is high enough, consider it a match
-                    if best_match > 0.75:  # Threshold for semantic matching
+                    if best_match > self.SKILL_MATCH_THRESHOLD:  # Threshold for semantic matching
                         semantic_matches.add(remaining_job_skills_indices[j])
                 
                 # Update missing skills
@@ -91,49 +136,21 @@ class GapDetectionAgent:
         
         return missing_skills
     
-    def _detect_missing_requirements(self, resume: Dict[str, Any], job_requirements: List[str]) -> List[str]:
+    def _detect_missing_requirements(self, resume: Dict[str, Any], job_requirements: List[str],
+                                     precomputed: Optional[PrecomputedEmbeddings] = None) -> List[str]:
         """Detect job requirements that are not satisfied by the resume"""
         if not job_requirements:
             return []
         
         # Create a comprehensive resume text
-        resume_parts = []
-        
-        # Add skills
-        if 'skills' in resume and resume['skills']:
-            resume_parts.append("Skills: " + ", ".join(resume['skills']))
-        
-        # Add education
-        if 'education' in resume and resume['education']:
-            education_texts = []
-            for edu in resume['education']:
-                parts = []
-                for key, value in edu.items():
-                    if value:
-                        parts.append(f"{key}: {value}")
-                education_texts.append(", ".join(parts))
-            resume_parts.append("Education: " + "; ".join(education_texts))
-        
-        # Add experience
-        if 'experience' in resume and resume['experience']:
-            experience_texts = []
-            for exp in resume['experience']:
-                parts = []
-                for key, value in exp.items():
-                    if value:
-                        parts.append(f"{key}: {value}")
-                experience_texts.append(", ".join(parts))
-            resume_parts.append("Experience: " + "; ".join(experience_texts))
-        
-        # Combine all resume parts
-        combined_resume = " ".join(resume_parts)
+        combined_resume = resume_profile_text(resume)
         
         if not combined_resume:
             return job_requirements
         
         # Encode texts
-        resume_embedding = self.model.encode(combined_resume)
-        requirement_embeddings = self.model.encode(job_requirements)
+        resume_embedding = self._encode(combined_resume, precomputed)
+        requirement_embeddings = self._encode(job_requirements, precomputed)
         
         # Calculate similarity for each requirement
         missing_requirements = []
@@ -141,7 +158,7 @@ class GapDetectionAgent:
             similarity = util.cos_sim(resume_embedding, req_embedding).item()
             
             # If similarity is too low, consider it a missing requirement
-            if similarity < 0.6:  # Threshold for requirement matching
+            if similarity < self.REQUIREMENT_MATCH_THRESHOLD:  # Threshold for requirement matching
                 missing_requirements.append(job_requirements[i])
         
         return missing_requirements
@@ -1,26 +1,21 @@
 import re
-import spacy
 from typing import Dict, Any, List
-import nltk
 from nltk.tokenize import sent_tokenize
+from agents.document import limit_text, section_span, spacy_doc
+from agents.extraction import find_skills
+from agents.long_document import LongDocument
+from agents.model_loader import ensure_nltk_punkt, load_spacy
+from utils.metrics import stage
 
 class JDParserAgent:
     """Agent for parsing and extracting information from job descriptions"""
     
     def __init__(self):
-        # Download required NLTK data
-        try:
-            nltk.data.find('tokenizers/punkt')
-        except LookupError:
-            nltk.download('punkt')
+        # Make sure NLTK data is available (downloads unless in offline mode)
+        ensure_nltk_punkt()
         
-        # Load spaCy model
-        try:
-            self.nlp = spacy.load("en_core_web_lg")
-        except OSError:
-            # If model not found, download a smaller one
-            spacy.cli.download("en_core_web_sm")
-            self.nlp = spacy.load("en_core_web_sm")
+        # Load spaCy model (shared with the other parser)
+        self.nlp = load_spacy()
     
     def parse(self, text: str) -> Dict[str, Any]:
         """
@@ -28,23 +23,29 @@ class JDParserAgent:
         
         Args:
             text: Raw job description text
-            
+        
         Returns:
             Dictionary with extracted information
         """
-        # Process text with spaCy
-        doc = self.nlp(text)
-        
-        # Extract information
-        title = self._extract_title(text)
-        company = self._extract_company(text)
-        requirements = self._extract_requirements(text)
-        responsibilities = self._extract_responsibilities(text)
-        skills = self._extract_skills(doc, text)
-        location = self._extract_location(doc, text)
-        job_type = self._extract_job_type(text)
-        
-        return {
+        # Very long texts are cut to a limit, and spaCy parses them in windows
+        original_chars = len(text)
+        text = limit_text(text)
+        
+        # Process text with spaCy (reusing the parse if the text is a shared Document)
+        with stage("jd_parser", "spacy"):
+            doc = spacy_doc(self.nlp, text)
+        
+        # Extract information (company and skill extraction run spaCy on small spans too)
+        with stage("jd_parser", "regex_extraction"):
+            title = self._extract_title(text)
+            company = self._extract_company(text)
+            requirements = self._extract_requirements(text)
+            responsibilities = self._extract_responsibilities(text)
+            skills = self._extract_skills(doc, text)
+            location = self._extract_location(doc, text)
+            job_type = self._extract_job_type(text)
+        
+        result = {
             "title": title,
             "company": company,
             "requirements": requirements,
@@ -53,6 +54,9 @@ class JDParserAgent:
             "location": location,
             "jobType": job_type
         }
+        if isinstance(doc, LongDocument):
+            result["longDocument"] = doc.report(original_chars)
+        return result
     
     def _extract_title(self, text: str) -> str:
         """Extract job title from JD"""
@@ -68,7 +72,7 @@ class JDParserAgent:
                 return match.group(1).strip()
         
         # If no pattern matches, try first non-empty line
-        lines = text.split('\n')
+        lines = text.split('\n', 5)
         for line in lines[:5]:  # Check first 5 lines
             line = line.strip()
             if line and len(line) < 100:  # Reasonable title length
@@ -148,25 +152,15 @@ class JDParserAgent:
     
     def _extract_skills(self, doc, text: str) -> List[str]:
         """Extract required skills from JD"""
-        # Common technical skills
-        tech_skills = [
-            "Python", "Java", "JavaScript", "C++", "C#", "TypeScript", "PHP", "Go", "Ruby", "Swift", 
-            "Kotlin", "React", "Angular", "Vue", "Node.js", "Express", "Django", "Flask", "Spring Boot",
-            "SQL", "MongoDB", "PostgreSQL", "MySQL", "Oracle", "AWS", "Azure", "GCP", "Docker", "Kubernetes",
-            "Machine Learning", "AI", "Data Science", "DevOps", "CI/CD", "Git", "HTML", "CSS", "TensorFlow",
-            "PyTorch", "Scikit-learn", "NLP", "Computer Vision", "REST API", "GraphQL", "Microservices"
-        ]
-        
-        # Extract skills based on known technical terms
-        found_skills = set()
-        for skill in tech_skills:
-            if re.search(r'\b' + re.escape(skill) + r'\b', text, re.IGNORECASE):
-                found_skills.add(skill)
+        # Extract skills based on known technical terms (one scan for the whole list)
+        found_skills = set(find_skills(text))
         
         # Extract skills from requirements section
         requirements = self._extract_requirements(text)
-        for req in requirements:
-            req_doc = self.nlp(req)
+        # Streamed through one pipe, so a long requirements list isn't parsed all at once
+        with self.nlp.lease() as nlp:
+            req_docs = list(zip(requirements, nlp.pipe(requirements)))
+        for req, req_doc in req_docs:
             for token in req_doc:
                 if token.pos_ == "NOUN" and len(token.text) > 2:
                     # Check if it's likely a skill
@@ -221,37 +215,9 @@ class JDParserAgent:
     
     def _extract_section(self, text: str, section_headers: List[str]) -> str:
         """Extract a specific section from the JD text"""
-        lines = text.split('\n')
-        start_index = -1
-        end_index = -1
-        
-        # Find the start of the section
-        for i, line in enumerate(lines):
-            if any(header.lower() in line.lower() for header in section_headers):
-                start_index = i
-                break
-        
-        if start_index == -1:
-            return ""
-        
-        # Find the end of the section (next section header)
         common_headers = ["requirements", "responsibilities", "qualifications", "about", 
                          "benefits", "company", "what we offer", "apply"]
-        
-        for i in range(start_index + 1, len(lines)):
-            line = lines[i].strip().lower()
-            # Check if line is a header (all caps, ends with colon, etc.)
-            is_header = (line.isupper() or line.endswith(':')) and len(line) > 0
-            
-            # Check if line matches a common header
-            if is_header and any(header.lower() in line for header in common_headers if header.lower() not in section_headers):
-                end_index = i
-                break
-        
-        # If no end found, use the end of the document
-        if end_index == -1:
-            end_index = len(lines)
-        
-        # Extract the section content
-        section_content = "\n".join(lines[start_index+1:end_index]).strip()
-        return section_content
+        span = section_span(text, section_headers, common_headers)
+        if span is None:
+            return ""
+        return text[span[0]:span[1]]
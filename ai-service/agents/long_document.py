@@ -0,0 +1,129 @@
+import re
+from contextlib import nullcontext
+from typing import Dict, Any, Iterator, List, NamedTuple, Optional, Tuple
+
+import config
+from agents.model_manager import ModelHandle, resident_bytes
+from utils import metrics
+
+# Lines that look like section headers ("EXPERIENCE", "Work history:"); windows end
+# before one where they can, so a section is parsed in one piece
+HEADER_LINE = re.compile(r'^[ \t]*(?:[A-Z][A-Z0-9 &/,\-]{2,60}|[A-Za-z][^\n:]{1,60}:)[ \t]*$', re.MULTILINE)
+
+
+class WindowEntity(NamedTuple):
+    """A named entity with offsets into the whole text, like a spaCy Span"""
+    text: str
+    label_: str
+    start: int
+    end: int
+    start_char: int
+    end_char: int
+
+
+def section_windows(text: str, window_chars: int) -> Iterator[Tuple[int, str]]:
+    """
+    Split text into (offset, window) pieces of at most window_chars
+    
+    Each window ends before a section header if there is one in its second half, else
+    at a paragraph break, a line break or a space, and only mid-word as a last resort.
+    """
+    position = 0
+    while position < len(text):
+        limit = position + window_chars
+        if limit >= len(text):
+            yield position, text[position:]
+            return
+        
+        lowest = position + window_chars // 2
+        headers = [match.start() for match in HEADER_LINE.finditer(text, lowest, limit)]
+        cut = headers[-1] if headers else -1
+        for separator in ("\n\n", "\n", " "):
+            if cut > position:
+                break
+            cut = text.rfind(separator, lowest, limit)
+            if cut != -1:
+                cut += len(separator)
+        if cut <= position:
+            cut = limit
+        
+        yield position, text[position:cut]
+        position = cut
+
+
+class LongDocument:
+    """
+    A long text parsed window by window, standing in for its spaCy Doc
+    
+    Only the named entities are kept (with offsets into the whole text); each window's
+    Doc is dropped once they are copied out, so memory follows the window size rather
+    than the text length.
+    """
+    
+    def __init__(self, text: str):
+        self.text = text
+        self.ents: List[WindowEntity] = []
+        self.windows = 0
+        self.tokens = 0
+        # Characters run through spaCy before the token limit was reached
+        self.parsed_chars = 0
+        self.start_bytes = resident_bytes()
+        self.peak_bytes = self.start_bytes
+    
+    def __len__(self) -> int:
+        return self.tokens
+    
+    def add(self, offset: int, doc) -> None:
+        """Merge one window's Doc"""
+        for ent in doc.ents:
+            self.ents.append(WindowEntity(ent.text, ent.label_, self.tokens + ent.start, self.tokens + ent.end,
+                                          offset + ent.start_char, offset + ent.end_char))
+        self.windows += 1
+        self.tokens += len(doc)
+        self.parsed_chars = offset + len(doc.text)
+        current = resident_bytes()
+        if current is not None and (self.peak_bytes is None or current > self.peak_bytes):
+            self.peak_bytes = current
+    
+    def report(self, original_chars: Optional[int] = None) -> Dict[str, Any]:
+        """Windows, limits hit and memory, for the parse result"""
+        original_chars = len(self.text) if original_chars is None else original_chars
+        return {
+            "chars": original_chars,
+            "truncatedChars": original_chars - len(self.text),
+            "parsedChars": self.parsed_chars,
+            "windows": self.windows,
+            "tokens": self.tokens,
+            "tokenLimitReached": self.parsed_chars < len(self.text),
+            "peakResidentBytes": self.peak_bytes,
+            "peakGrowthBytes": (self.peak_bytes - self.start_bytes
+                                if self.peak_bytes is not None and self.start_bytes is not None else None)
+        }
+
+
+def parse_windowed(nlp, text: str) -> LongDocument:
+    """
+    Parse text through nlp.pipe in section-aware windows of LONG_DOCUMENT_WINDOW_CHARS
+    
+    Parsing stops once LONG_DOCUMENT_MAX_TOKENS tokens have been seen; the rest of the
+    text is still available to the regex extractors.
+    """
+    document = LongDocument(text)
+    windows = section_windows(text, config.LONG_DOCUMENT_WINDOW_CHARS)
+    offsets: List[int] = []
+    
+    def texts():
+        for offset, window in windows:
+            if document.tokens >= config.LONG_DOCUMENT_MAX_TOKENS:
+                return
+            offsets.append(offset)
+            yield window
+    
+    # A managed model is held until the pipe is consumed, not just while it is created
+    with nlp.lease() if isinstance(nlp, ModelHandle) else nullcontext(nlp) as model:
+        # One window at a time, so the token limit is checked before the next is parsed
+        for index, doc in enumerate(model.pipe(texts(), batch_size=1)):
+            document.add(offsets[index], doc)
+    
+    metrics.LONG_DOCUMENTS.inc("token_limit" if document.parsed_chars < len(text) else "complete")
+    return document
@@ -1,29 +1,73 @@
-from sentence_transformers import SentenceTransformer, util
-from typing import Dict, Any, List
+from sentence_transformers import util
+from typing import Dict, Any, List, Optional
 import numpy as np
+from agents.embeddings import PrecomputedEmbeddings, embed_fields, resume_experience_text, resume_profile_text
+from agents.model_loader import load_sentence_model
+from agents.skill_taxonomy import get_taxonomy
+from utils.metrics import stage
+from utils.result_store import source_digest
 
 class MatchingAgent:
     """Agent for matching resumes with job descriptions"""
     
+    # Bump when scoring changes in a way the source digest can't see (e.g. in a dependency)
+    SCORER_VERSION = "1"
+    
+    # Weights of the component scores in the overall score
+    SCORE_WEIGHTS = {"skills": 0.5, "experience": 0.3, "requirements": 0.2}
+    
     def __init__(self):
-        # Load pre-trained Sentence-BERT model
-        try:
-            self.model = SentenceTransformer('paraphrase-MiniLM-L6-v2')
-        except:
-            # Fallback to simpler model if needed
-            self.model = SentenceTransformer('all-MiniLM-L6-v2')
+        # Load pre-trained Sentence-BERT model (shared between agents)
+        self.model, self.model_id = load_sentence_model()
+        
+        # Precomputed skill embedding table, if built for this model
+        self.taxonomy = get_taxonomy(self.model_id)
+    
+    def _encode(self, texts, precomputed: Optional[PrecomputedEmbeddings] = None):
+        """Encode text(s) with the sentence model, reusing precomputed vectors when available"""
+        with stage("matching", "encode"):
+            if precomputed is not None:
+                return precomputed.encode(self.model, texts)
+            return self.model.encode(texts)
+    
+    def embed(self, fields: Dict[str, List[str]]) -> Dict[str, Any]:
+        """
+        Encode parsed fields for shipping with the parse (see embeddings.embed_fields)
+        
+        Args:
+            fields: Field name -> texts
+            
+        Returns:
+            Embeddings payload tagged with this agent's model id
+        """
+        with stage("matching", "encode"):
+            return embed_fields(self.model, fields)
+    
+    def scorer_signature(self) -> Dict[str, Any]:
+        """Everything a stored match result depends on besides the resume and job"""
+        return {
+            "scorer": "matching",
+            "version": self.SCORER_VERSION,
+            "modelId": self.model_id,
+            "weights": self.SCORE_WEIGHTS,
+            "source": source_digest(__name__, "agents.embeddings")
+        }
     
     def match(self, resume: Dict[str, Any], job: Dict[str, Any]) -> Dict[str, Any]:
         """
         Match resume with job description and return match score
         
         Args:
-            resume: Parsed resume data
-            job: Parsed job description data
+            resume: Parsed resume data (may carry precomputed 'embeddings')
+            job: Parsed job description data (may carry precomputed 'embeddings')
             
         Returns:
             Dictionary with match results
         """
+        # Vectors shipped with the parsed data are reused when they come from our model,
+        # and known skills come from the taxonomy table
+        precomputed = PrecomputedEmbeddings.from_documents(self.model_id, resume, job, taxonomy=self.taxonomy)
+        
         # Extract relevant data for matching
         resume_skills = resume.get('skills', [])
         job_skills = job.get('skills', [])
@@ -34,19 +78,19 @@ class MatchingAgent:
         job_requirements = job.get('requirements', [])
         
         # Calculate skills match
-        skills_score = self._calculate_skills_match(resume_skills, job_skills)
+        skills_score = self._calculate_skills_match(resume_skills, job_skills, precomputed)
         
         # Calculate experience match
-        experience_score = self._calculate_experience_match(resume_experience, job_responsibilities)
+        experience_score = self._calculate_experience_match(resume_experience, job_responsibilities, precomputed)
         
         # Calculate requirements match
-        requirements_score = self._calculate_requirements_match(resume, job_requirements)
+        requirements_score = self._calculate_requirements_match(resume, job_requirements, precomputed)
         
         # Calculate overall match score (weighted average)
         overall_score = (
-            skills_score * 0.5 +
-            experience_score * 0.3 +
-            requirements_score * 0.2
+            skills_score * self.SCORE_WEIGHTS["skills"] +
+            experience_score * self.SCORE_WEIGHTS["experience"] +
+            requirements_score * self.SCORE_WEIGHTS["requirements"]
         )
         
         # Round to 2 decimal places
@@ -59,7 +103,8 @@ class MatchingAgent:
             "requirementsScore": round(requirements_score * 100) / 100
         }
     
-    def _calculate_skills_match(self, resume_skills: List[str], job_skills: List[str]) -> float:
+    def _calculate_skills_match(self, resume_skills: List[str], job_skills: List[str],
+                                precomputed: Optional[PrecomputedEmbeddings] = None) -> float:
         """Calculate match score for skills"""
         if not resume_skills or not job_skills:
             return 0.0
@@ -79,8 +124,8 @@ class MatchingAgent:
             
             if remaining_resume_skills and remaining_job_skills:
                 # Compute embeddings
-                resume_embeddings = self.model.encode(remaining_resume_skills)
-                job_embeddings = self.model.encode(remaining_job_skills)
+                resume_embeddings = self._encode(remaining_resume_skills, precomputed)
+                job_embeddings = self._encode(remaining_job_skills, precomputed)
                 
                 # Calculate cosine similarity matrix
                 similarity_matrix = util.cos_sim(resume_embeddings, job_embeddings)
@@ -103,28 +148,21 @@ class MatchingAgent:
             
         return direct_match_score
     
-    def _calculate_experience_match(self, resume_experience: List[Dict[str, str]], job_responsibilities: List[str]) -> float:
+    def _calculate_experience_match(self, resume_experience: List[Dict[str, str]], job_responsibilities: List[str],
+                                    precomputed: Optional[PrecomputedEmbeddings] = None) -> float:
         """Calculate match score for experience vs responsibilities"""
         if not resume_experience or not job_responsibilities:
             return 0.0
         
-        # Extract experience descriptions
-        experience_texts = []
-        for exp in resume_experience:
-            if 'description' in exp and exp['description']:
-                experience_texts.append(exp['description'])
-            if 'title' in exp and exp['title']:
-                experience_texts.append(exp['title'])
+        # Combine experience descriptions and titles into a single text
+        combined_experience = resume_experience_text(resume_experience)
         
-        if not experience_texts:
+        if not combined_experience:
             return 0.0
         
-        # Combine all experience into a single text
-        combined_experience = " ".join(experience_texts)
-        
         # Encode texts
-        experience_embedding = self.model.encode(combined_experience)
-        responsibility_embeddings = self.model.encode(job_responsibilities)
+        experience_embedding = self._encode(combined_experience, precomputed)
+        responsibility_embeddings = self._encode(job_responsibilities, precomputed)
         
         # Calculate similarity for each responsibility
         similarities = []
@@ -135,49 +173,21 @@ class MatchingAgent:
         # Average similarity score
         return sum(similarities) / len(similarities)
     
-    def _calculate_requirements_match(self, resume: Dict[str, Any], job_requirements: List[str]) -> float:
+    def _calculate_requirements_match(self, resume: Dict[str, Any], job_requirements: List[str],
+                                      precomputed: Optional[PrecomputedEmbeddings] = None) -> float:
         """Calculate match score for job requirements"""
         if not job_requirements:
             return 0.0
         
         # Create a comprehensive resume text
-        resume_parts = []
-        
-        # Add skills
-        if 'skills' in resume and resume['skills']:
-            resume_parts.append("Skills: " + ", ".join(resume['skills']))
-        
-        # Add education
-        if 'education' in resume and resume['education']:
-            education_texts = []
-            for edu in resume['education']:
-                parts = []
-                for key, value in edu.items():
-                    if value:
-                        parts.append(f"{key}: {value}")
-                education_texts.append(", ".join(parts))
-            resume_parts.append("Education: " + "; ".join(education_texts))
-        
-        # Add experience
-        if 'experience' in resume and resume['experience']:
-            experience_texts = []
-            for exp in resume['experience']:
-                parts = []
-                for key, value in exp.items():
-                    if value:
-                        parts.append(f"{key}: {value}")
-                experience_texts.append(", ".join(parts))
-            resume_parts.append("Experience: " + "; ".join(experience_texts))
-        
-        # Combine all resume parts
-        combined_resume = " ".join(resume_parts)
+        combined_resume = resume_profile_text(resume)
         
         if not combined_resume:
             return 0.0
         
         # Encode texts
-        resume_embedding = self.model.encode(combined_resume)
-        requirement_embeddings = self.model.encode(job_requirements)
+        resume_embedding = self._encode(combined_resume, precomputed)
+        requirement_embeddings = self._encode(job_requirements, precomputed)
         
         # Calculate similarity for each requirement
         similarities = []
@@ -0,0 +1,142 @@
+import os
+from typing import Any, Tuple
+
+import config
+from agents.model_manager import ModelHandle, manager
+
+# Models are shared between agents, so spaCy and the sentence model load once per process.
+# Agents get ModelHandles, so the manager can unload idle models and reload them on use.
+
+SENTENCE_MODELS = ['paraphrase-MiniLM-L6-v2', 'all-MiniLM-L6-v2']
+SUMMARIZATION_MODELS = ["facebook/bart-large-cnn", "sshleifer/distilbart-cnn-12-6"]
+
+
+class ModelUnavailableError(RuntimeError):
+    """Raised in offline mode when a model is not available locally"""
+
+
+def _apply_offline_env() -> None:
+    """Stop the Hugging Face libraries from reaching the network in offline mode"""
+    if config.OFFLINE:
+        os.environ["HF_HUB_OFFLINE"] = "1"
+        os.environ["TRANSFORMERS_OFFLINE"] = "1"
+
+
+def _cached(key: str, loader, label=None):
+    """Load a model once, even when several agents ask for it concurrently"""
+    return manager.get(key, loader, label)
+
+
+def _handle(key: str, loader, label=None, select=None) -> ModelHandle:
+    """Register a model with the manager and load it now, returning its handle"""
+    handle = manager.handle(key, loader, label, select)
+    handle.get()
+    return handle
+
+
+def ensure_nltk_punkt() -> None:
+    """Make sure the NLTK sentence tokenizer data is available"""
+    import nltk
+    
+    try:
+        nltk.data.find('tokenizers/punkt')
+    except LookupError:
+        if config.OFFLINE:
+            raise ModelUnavailableError(
+                "NLTK 'punkt' data is missing and AI_SERVICE_OFFLINE forbids downloading it; "
+                "run `python -m nltk.downloader punkt` on a connected machine")
+        nltk.download('punkt')
+
+
+def load_spacy() -> ModelHandle:
+    """Load the spaCy pipeline (large model, falling back to the small one)"""
+    def loader():
+        import spacy
+        
+        try:
+            return spacy.load("en_core_web_lg")
+        except OSError:
+            pass
+        try:
+            return spacy.load("en_core_web_sm")
+        except OSError:
+            if config.OFFLINE:
+                raise ModelUnavailableError(
+                    "Neither en_core_web_lg nor en_core_web_sm is installed and AI_SERVICE_OFFLINE "
+                    "forbids downloading; install one with `python -m spacy download en_core_web_sm`")
+            # If model not found, download a smaller one
+            spacy.cli.download("en_core_web_sm")
+            return spacy.load("en_core_web_sm")
+    
+    return _handle("spacy", loader, lambda nlp: f"spacy:{nlp.meta.get('lang', 'en')}_{nlp.meta.get('name', 'unknown')}")
+
+
+def load_sentence_transformer() -> Tuple[Any, str]:
+    """Load the full-precision Sentence-BERT model, returning it with its name"""
+    def loader():
+        _apply_offline_env()
+        from sentence_transformers import SentenceTransformer
+        
+        # A local weights directory takes precedence over hub names
+        if config.SENTENCE_MODEL_PATH:
+            name = os.path.basename(os.path.normpath(config.SENTENCE_MODEL_PATH))
+            return SentenceTransformer(config.SENTENCE_MODEL_PATH, device="cpu"), name
+        
+        errors = []
+        for name in SENTENCE_MODELS:
+            try:
+                return SentenceTransformer(name, device="cpu"), name
+            except Exception as e:
+                # Fallback to simpler model if needed
+                errors.append(f"{name}: {e}")
+        raise ModelUnavailableError("No sentence model could be loaded (" + "; ".join(errors) + ")")
+    
+    return _cached("sentence-transformers", loader, lambda loaded: f"sentence-transformers:{loaded[1]}")
+
+
+def load_embedding_backend(backend_name: str) -> ModelHandle:
+    """Load the sentence model wrapped in the named embedding backend"""
+    def loader():
+        from agents.embeddings import create_backend
+        
+        model, model_name = load_sentence_transformer()
+        return create_backend(backend_name, model, model_name, config.EMBEDDING_EXPORT_DIR)
+    
+    return _handle(f"embedding-backend:{backend_name}", loader)
+
+
+def load_sentence_model() -> Tuple[Any, str]:
+    """
+    Load the sentence embedder selected by EMBEDDING_BACKEND
+    
+    Returns:
+        The backend (with a SentenceTransformer-style encode()) and its model id
+    """
+    try:
+        backend = load_embedding_backend(config.EMBEDDING_BACKEND)
+    except Exception as e:
+        if config.EMBEDDING_BACKEND == "torch":
+            raise
+        # Fall back to the reference backend rather than failing the agents
+        print(f"Embedding backend '{config.EMBEDDING_BACKEND}' unavailable ({e}), using torch")
+        backend = load_embedding_backend("torch")
+    return backend, backend.model_id
+
+
+def load_summarizer() -> Tuple[ModelHandle, str]:
+    """Load the summarization pipeline, returning it with its model name"""
+    def loader():
+        _apply_offline_env()
+        from transformers import pipeline
+        
+        errors = []
+        for name in SUMMARIZATION_MODELS:
+            try:
+                return pipeline("summarization", model=name, max_length=150), name
+            except Exception as e:
+                # Fallback to an even smaller model if needed
+                errors.append(f"{name}: {e}")
+        raise ModelUnavailableError("No summarization model could be loaded (" + "; ".join(errors) + ")")
+    
+    handle = _handle("summarizer", loader, lambda loaded: f"transformers:{loaded[1]}", select=lambda loaded: loaded[0])
+    return handle, manager.get("summarizer")[1]
@@ -0,0 +1,370 @@
+import ctypes
+import ctypes.util
+import fnmatch
+import gc
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Any, Callable, Iterator, List, Optional, Set
+
+import config
+from utils import metrics, tracing
+from utils.metrics import record_model_load
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def resident_bytes() -> Optional[int]:
+    """Resident set size of this process (Linux), or None where it can't be read"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _release_memory() -> None:
+    """Collect the unloaded model and hand freed heap pages back to the OS"""
+    gc.collect()
+    # glibc keeps freed memory in its arenas; without this RSS barely drops after an unload
+    libc_name = ctypes.util.find_library("c")
+    if libc_name:
+        try:
+            ctypes.CDLL(libc_name).malloc_trim(0)
+        except (OSError, AttributeError):
+            pass
+
+
+class _Entry:
+    """A resident model and its bookkeeping"""
+    
+    def __init__(self, key: str, value: Any, label: str, pinned: bool, size_bytes: int, load_seconds: float,
+                 dependencies: Set[str]):
+        self.key = key
+        self.value = value
+        self.label = label
+        self.pinned = pinned
+        self.size_bytes = size_bytes
+        self.load_seconds = load_seconds
+        self.dependencies = dependencies
+        self.loaded_at = time.time()
+        self.last_used = time.monotonic()
+        self.in_use = 0
+
+
+class ModelManager:
+    """
+    Loads models on demand and keeps them within a memory budget
+    
+    Models are registered with a loader and loaded on first use. When the resident
+    models exceed the budget, the least recently used ones are unloaded; models idle
+    for longer than the TTL are unloaded too. Pinned models, models in use, and
+    models another resident model was built from are never unloaded. An unloaded
+    model is loaded again the next time it is used.
+    """
+    
+    def __init__(self, budget_bytes: int = 0, idle_ttl: float = 0, pinned: Optional[List[str]] = None,
+                 max_events: int = 200):
+        self.budget_bytes = budget_bytes
+        self.idle_ttl = idle_ttl
+        self.pinned_patterns = pinned or []
+        self.events = deque(maxlen=max_events)
+        self._loaders: Dict[str, Any] = {}
+        self._handles: Dict[str, "ModelHandle"] = {}
+        self._entries: Dict[str, _Entry] = {}
+        # Last measured size per model, so room can be made before a reload
+        self._known_sizes: Dict[str, int] = {}
+        self._load_counts: Dict[str, int] = {}
+        self._lock = threading.RLock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._local = threading.local()
+        self._sweeper: Optional[threading.Thread] = None
+    
+    def is_pinned(self, key: str) -> bool:
+        return any(fnmatch.fnmatchcase(key, pattern) for pattern in self.pinned_patterns)
+    
+    def register(self, key: str, loader: Callable[[], Any], label: Optional[Callable[[Any], str]] = None) -> None:
+        """Remember how to (re)load a model; the first registration wins"""
+        with self._lock:
+            self._loaders.setdefault(key, (loader, label))
+    
+    def handle(self, key: str, loader: Callable[[], Any], label: Optional[Callable[[Any], str]] = None,
+               select: Optional[Callable[[Any], Any]] = None) -> "ModelHandle":
+        """Register a model and return the (shared) handle agents keep instead of the model itself"""
+        self.register(key, loader, label)
+        with self._lock:
+            handle = self._handles.get(key)
+            if handle is None:
+                handle = self._handles[key] = ModelHandle(self, key, select)
+        return handle
+    
+    def get(self, key: str, loader: Optional[Callable[[], Any]] = None,
+            label: Optional[Callable[[Any], str]] = None) -> Any:
+        """Return a model, loading it (once, even across threads) if it isn't resident"""
+        if loader is not None:
+            self.register(key, loader, label)
+        
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.last_used = time.monotonic()
+                self._note_dependency(key)
+                return entry.value
+            lock = self._load_locks.setdefault(key, threading.Lock())
+        
+        # One lock per model so a slow BART load doesn't block spaCy users
+        with lock:
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is None:
+                entry = self._load(key)
+            else:
+                entry.last_used = time.monotonic()
+        self._note_dependency(key)
+        return entry.value
+    
+    @contextmanager
+    def lease(self, key: str) -> Iterator[Any]:
+        """Hold a model for the duration of the block, so it isn't unloaded mid-call"""
+        while True:
+            value = self.get(key)
+            with self._lock:
+                entry = self._entries.get(key)
+                # Unloaded between get() and here: load it again
+                if entry is not None and entry.value is value:
+                    entry.in_use += 1
+                    break
+        try:
+            yield value
+        finally:
+            with self._lock:
+                entry.in_use -= 1
+                entry.last_used = time.monotonic()
+    
+    def _stack(self) -> List[Dict[str, Any]]:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+    
+    def _note_dependency(self, key: str) -> None:
+        """Record that the model being loaded on this thread was built from `key`"""
+        stack = self._stack()
+        if stack and stack[-1]["key"] != key:
+            stack[-1]["dependencies"].add(key)
+    
+    def _load(self, key: str) -> _Entry:
+        loader, label = self._loaders[key]
+        # Make room for a model we have loaded before, instead of overshooting first
+        self._enforce_budget(incoming=self._known_sizes.get(key, 0), exclude=key)
+        
+        frame = {"key": key, "dependencies": set(), "nested_bytes": 0}
+        stack = self._stack()
+        stack.append(frame)
+        rss_before = resident_bytes()
+        start = time.perf_counter()
+        try:
+            # A cold load is often most of a slow request's time
+            with tracing.span("model.load", model=key):
+                value = loader()
+        finally:
+            stack.pop()
+        seconds = time.perf_counter() - start
+        rss_after = resident_bytes()
+        
+        # Approximate: RSS growth during the load, minus models loaded along the way
+        size_bytes = 0
+        if rss_before is not None and rss_after is not None:
+            size_bytes = max(rss_after - rss_before - frame["nested_bytes"], 0)
+        
+        entry = _Entry(key, value, label(value) if label else key, self.is_pinned(key), size_bytes, seconds,
+                       frame["dependencies"])
+        with self._lock:
+            self._entries[key] = entry
+            self._known_sizes[key] = size_bytes
+            self._load_counts[key] = self._load_counts.get(key, 0) + 1
+            reason = "reload" if self._load_counts[key] > 1 else "demand"
+        
+        record_model_load(entry.label, seconds)
+        metrics.MODEL_EVENTS.inc(key, "load", reason)
+        metrics.MODEL_RESIDENT_BYTES.set(key, value=size_bytes)
+        self._record_event(key, "load", reason, size_bytes, seconds)
+        if stack:
+            # Don't count this model again in the size of the one being built from it
+            stack[-1]["nested_bytes"] += size_bytes
+        
+        self._enforce_budget(exclude=key)
+        self._start_sweeper()
+        return entry
+    
+    def _record_event(self, key: str, event: str, reason: str, size_bytes: int, seconds: Optional[float] = None):
+        self.events.append({
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "model": key,
+            "event": event,
+            "reason": reason,
+            "bytes": size_bytes,
+            "seconds": seconds
+        })
+        print(f"Model {event}: {key} ({reason}, {size_bytes / 2**20:.0f}MB)")
+    
+    def resident_total(self) -> int:
+        with self._lock:
+            return sum(entry.size_bytes for entry in self._entries.values())
+    
+    def _evictable(self, entry: _Entry) -> bool:
+        if entry.pinned or entry.in_use:
+            return False
+        # A model another resident model was built from stays while that one is loaded
+        return not any(entry.key in other.dependencies for other in self._entries.values())
+    
+    def unload(self, key: str, reason: str = "manual") -> bool:
+        """Unload a model if nothing prevents it; False if it is not resident or must stay"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or not self._evictable(entry):
+                return False
+            del self._entries[key]
+        
+        size_bytes = entry.size_bytes
+        entry.value = None
+        del entry
+        _release_memory()
+        metrics.MODEL_EVENTS.inc(key, "unload", reason)
+        metrics.MODEL_RESIDENT_BYTES.set(key, value=0)
+        self._record_event(key, "unload", reason, size_bytes)
+        return True
+    
+    def _enforce_budget(self, incoming: int = 0, exclude: Optional[str] = None) -> None:
+        """Unload least recently used models until the resident ones (plus incoming) fit"""
+        if self.budget_bytes <= 0:
+            return
+        # Repeat while progress is made: unloading a model can free the one it was built from
+        unloaded = True
+        while unloaded and self.resident_total() + incoming > self.budget_bytes:
+            with self._lock:
+                candidates = sorted((entry.key for entry in self._entries.values() if entry.key != exclude),
+                                    key=lambda key: self._entries[key].last_used)
+            unloaded = False
+            for key in candidates:
+                if self.unload(key, "budget"):
+                    unloaded = True
+                    break
+        
+        if self.resident_total() + incoming > self.budget_bytes:
+            print(f"Models need {(self.resident_total() + incoming) / 2**20:.0f}MB, over the "
+                  f"{self.budget_bytes / 2**20:.0f}MB budget, and no other model can be unloaded")
+    
+    def sweep(self) -> List[str]:
+        """Unload models idle for longer than the TTL; returns their keys"""
+        if self.idle_ttl <= 0:
+            return []
+        unloaded = []
+        # Repeat while progress is made: unloading a model can free the one it was built from
+        while True:
+            now = time.monotonic()
+            with self._lock:
+                idle = [entry.key for entry in self._entries.values() if now - entry.last_used > self.idle_ttl]
+            progress = [key for key in idle if self.unload(key, "idle")]
+            if not progress:
+                return unloaded
+            unloaded.extend(progress)
+    
+    def _start_sweeper(self) -> None:
+        if self.idle_ttl <= 0 or self._sweeper is not None:
+            return
+        with self._lock:
+            if self._sweeper is not None:
+                return
+            interval = max(1.0, min(self.idle_ttl / 4, 60.0))
+            
+            def run():
+                while True:
+                    time.sleep(interval)
+                    try:
+                        self.sweep()
+                    except Exception as e:
+                        print(f"Model sweep failed: {e}")
+            
+            self._sweeper = threading.Thread(target=run, name="model-sweeper", daemon=True)
+            self._sweeper.start()
+    
+    def report(self) -> Dict[str, Any]:
+        """Budget, resident models and recent load/unload events"""
+        now = time.monotonic()
+        with self._lock:
+            models = {}
+            for key in self._loaders:
+                entry = self._entries.get(key)
+                models[key] = {
+                    "resident": entry is not None,
+                    "pinned": self.is_pinned(key),
+                    "label": entry.label if entry is not None else None,
+                    "residentBytes": entry.size_bytes if entry is not None else 0,
+                    "lastSizeBytes": self._known_sizes.get(key),
+                    "loadSeconds": entry.load_seconds if entry is not None else None,
+                    "idleSeconds": now - entry.last_used if entry is not None else None,
+                    "inUse": entry.in_use if entry is not None else 0,
+                    "dependsOn": sorted(entry.dependencies) if entry is not None else [],
+                    "loads": self._load_counts.get(key, 0)
+                }
+            return {
+                "budgetBytes": self.budget_bytes,
+                "residentBytes": sum(entry.size_bytes for entry in self._entries.values()),
+                "processResidentBytes": resident_bytes(),
+                "idleTtlSeconds": self.idle_ttl,
+                "pinned": self.pinned_patterns,
+                "models": models,
+                "events": list(self.events)
+            }
+
+
+class ModelHandle:
+    """
+    Stand-in for a managed model that agents keep instead of the model itself
+    
+    Calls and method calls are forwarded to the resident model, loading it again if
+    it was unloaded, and hold it while they run.
+    """
+    
+    def __init__(self, manager: ModelManager, key: str, select: Optional[Callable[[Any], Any]] = None):
+        self._manager = manager
+        self._key = key
+        self._select = select or (lambda value: value)
+    
+    def get(self) -> Any:
+        """The model itself (loaded if needed); holding on to it defeats unloading"""
+        return self._select(self._manager.get(self._key))
+    
+    @contextmanager
+    def lease(self) -> Iterator[Any]:
+        """Hold the model for a block, e.g. while a generator it returned is consumed"""
+        with self._manager.lease(self._key) as value:
+            yield self._select(value)
+    
+    def __call__(self, *args, **kwargs):
+        with self._manager.lease(self._key) as value:
+            return self._select(value)(*args, **kwargs)
+    
+    def __getattr__(self, attr):
+        if attr.startswith("_"):
+            raise AttributeError(attr)
+        value = getattr(self.get(), attr)
+        if not callable(value):
+            return value
+        
+        def leased(*args, **kwargs):
+            with self._manager.lease(self._key) as model:
+                return getattr(self._select(model), attr)(*args, **kwargs)
+        
+        return leased
+    
+    def __repr__(self) -> str:
+        return f"ModelHandle({self._key!r})"
+
+
+manager = ModelManager(
+    budget_bytes=config.MODEL_MEMORY_BUDGET_MB * 2**20,
+    idle_ttl=config.MODEL_IDLE_TTL,
+    pinned=config.MODEL_PINNED)
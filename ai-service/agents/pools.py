@@ -0,0 +1,271 @@
+import inspect
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, List, Optional, Tuple
+
+import config
+from agents import agent_tier, create_agent
+from utils import metrics, tracing
+
+# Agent families and the agents each one's worker processes host. Agents in one family
+# share models (spaCy for the parsers, the sentence model for matching and gap detection).
+FAMILIES = {
+    "parsing": ["resume_parser", "jd_parser"],
+    "embedding": ["matching", "gap_detection"],
+    "summarization": ["summarization"],
+    "scheduling": ["scheduler"],
+}
+
+# Agents hosted by this worker process (empty in the front end)
+_worker_agents: Dict[str, Any] = {}
+_worker_error: Optional[str] = None
+_start_barrier = None
+
+
+def limit_threads(threads: int) -> None:
+    """Cap the math libraries' thread pools before they start"""
+    for name in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "NUMEXPR_NUM_THREADS"):
+        os.environ[name] = str(threads)
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+    try:
+        import torch
+        torch.set_num_threads(threads)
+        torch.set_num_interop_threads(1)
+    except (ImportError, RuntimeError):
+        pass
+
+
+def _init_worker(family: str, threads: int, barrier) -> None:
+    """Worker initializer: apply the thread budget and load the family's agents"""
+    global _worker_error, _start_barrier
+    _start_barrier = barrier
+    limit_threads(threads)
+    try:
+        for name in FAMILIES[family]:
+            _worker_agents[name] = create_agent(name)
+        if config.WARMUP:
+            from agents.registry import WARMUP_CALLS
+            for name, agent in _worker_agents.items():
+                WARMUP_CALLS[name](agent)
+    except Exception as e:
+        # Reported by every call instead of breaking the pool
+        _worker_error = f"{type(e).__name__}: {e}"
+
+
+def _describe(agent) -> Dict[str, Any]:
+    """Public methods and plain class attributes of an agent, for the front-end proxy"""
+    methods, attributes = [], {}
+    for attr, value in inspect.getmembers(type(agent)):
+        if attr.startswith("_"):
+            continue
+        if callable(value):
+            methods.append(attr)
+        elif isinstance(value, (str, int, float, bool, dict, list, tuple, type(None))):
+            attributes[attr] = value
+    return {"methods": methods, "attributes": attributes, "class": type(agent).__name__, "tier": agent_tier(agent)}
+
+
+def _ping() -> Tuple[int, Optional[str], Dict[str, Any]]:
+    # Startup pings wait for each other, so every worker answers exactly one
+    _start_barrier.wait(timeout=600)
+    return os.getpid(), _worker_error, {name: _describe(agent) for name, agent in _worker_agents.items()}
+
+
+def _invoke(name: str, method: str, args: tuple, kwargs: dict,
+            traceparent: Optional[str] = None) -> Tuple[Any, List[Dict[str, Any]]]:
+    if _worker_error is not None:
+        raise RuntimeError(f"Agent worker failed to start ({_worker_error})")
+    # The worker's spans travel back with the result and join the caller's trace
+    with tracing.remote(traceparent, f"{name}.{method}", pid=os.getpid()) as spans:
+        result = getattr(_worker_agents[name], method)(*args, **kwargs)
+    return result, spans
+
+
+class AgentPool:
+    """A pool of worker processes hosting one agent family, each with its own thread budget"""
+    
+    def __init__(self, family: str, workers: int, threads: int):
+        self.family = family
+        self.workers = workers
+        self.threads = threads
+        self.pids: List[int] = []
+        self.error: Optional[str] = None
+        self.descriptions: Dict[str, Any] = {}
+        self.start_seconds: Optional[float] = None
+        self.restarts = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+    
+    def _create(self) -> ProcessPoolExecutor:
+        # spawn: workers start clean instead of inheriting the front end's threads and sockets
+        context = multiprocessing.get_context("spawn")
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=context, initializer=_init_worker,
+                                   initargs=(self.family, self.threads, context.Barrier(self.workers)))
+    
+    def start(self) -> ProcessPoolExecutor:
+        """Start every worker and wait until they have loaded their agents"""
+        with self._lock:
+            if self._executor is not None:
+                return self._executor
+            
+            start = time.perf_counter()
+            executor = self._create()
+            # Submitted together, so each ping starts its own worker
+            with tracing.span("pool.start", family=self.family, workers=self.workers):
+                pings = [executor.submit(_ping) for _ in range(self.workers)]
+                results = [ping.result() for ping in pings]
+            self.pids = sorted({pid for pid, _, _ in results})
+            self.error = next((error for _, error, _ in results if error), None)
+            self.descriptions = results[0][2]
+            self.start_seconds = time.perf_counter() - start
+            self._executor = executor
+            print(f"Agent pool '{self.family}': {len(self.pids)} workers x {self.threads} threads "
+                  f"ready in {self.start_seconds:.2f}s")
+            return executor
+    
+    def _restart(self, broken: ProcessPoolExecutor) -> None:
+        """Replace a pool whose worker died (e.g. killed for memory)"""
+        with self._lock:
+            if self._executor is not broken:
+                return
+            self._executor = None
+            self.restarts += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+        print(f"Agent pool '{self.family}' lost a worker, restarting")
+    
+    def call(self, name: str, method: str, *args, **kwargs) -> Any:
+        """Run an agent method in one of the pool's workers (blocking)"""
+        executor = self.start()
+        start = time.perf_counter()
+        try:
+            with tracing.span(f"pool.{self.family}", agent=name, method=method):
+                result, spans = executor.submit(_invoke, name, method, args, kwargs,
+                                                tracing.current_traceparent()).result()
+            tracing.export(spans)
+        except BrokenProcessPool:
+            metrics.AGENT_POOL_CALLS.inc(self.family, "broken")
+            self._restart(executor)
+            raise RuntimeError(f"Agent worker for '{self.family}' died; the pool is being restarted")
+        except Exception:
+            metrics.AGENT_POOL_CALLS.inc(self.family, "error")
+            raise
+        metrics.AGENT_POOL_CALLS.inc(self.family, "ok")
+        metrics.AGENT_POOL_CALL_SECONDS.observe(self.family, value=time.perf_counter() - start)
+        return result
+    
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+    
+    def status(self) -> Dict[str, Any]:
+        return {
+            "agents": FAMILIES[self.family],
+            "workers": self.workers,
+            "threadsPerWorker": self.threads,
+            "running": self._executor is not None,
+            "pids": self.pids,
+            "startSeconds": self.start_seconds,
+            "restarts": self.restarts,
+            "error": self.error
+        }
+
+
+class PooledAgent:
+    """
+    Front-end proxy for an agent running in an agent pool
+    
+    Mirrors LazyAgent: the pool starts on first use or during warm-up, and calls to the
+    agent's methods are executed by a worker process.
+    """
+    
+    def __init__(self, name: str, pool: AgentPool):
+        self.name = name
+        self.pool = pool
+        self.load_seconds: Optional[float] = None
+        self.warmup_seconds: Optional[float] = None
+        self.warm = False
+        self.error: Optional[str] = None
+    
+    @property
+    def loaded(self) -> bool:
+        return self.pool.start_seconds is not None
+    
+    @property
+    def tier(self) -> Optional[str]:
+        description = self.pool.descriptions.get(self.name)
+        return description["tier"] if description else None
+    
+    @property
+    def agent_class(self) -> Optional[str]:
+        description = self.pool.descriptions.get(self.name)
+        return description["class"] if description else None
+    
+    @property
+    def fallback(self) -> bool:
+        """Whether the workers run the simplified agent in place of the full one"""
+        return self.tier == "triage"
+    
+    def get(self):
+        """Return the proxy once the pool's workers are up"""
+        self.pool.start()
+        self.load_seconds = self.pool.start_seconds
+        self.error = self.pool.error
+        if self.error is not None:
+            raise RuntimeError(self.error)
+        return self
+    
+    def __getattr__(self, attr):
+        if attr.startswith("_"):
+            raise AttributeError(attr)
+        description = self.get().pool.descriptions[self.name]
+        if attr in description["methods"]:
+            return lambda *args, **kwargs: self.pool.call(self.name, attr, *args, **kwargs)
+        if attr in description["attributes"]:
+            return description["attributes"][attr]
+        raise AttributeError(f"{self.name} agent has no attribute '{attr}' usable across processes")
+    
+    def status(self) -> Dict[str, Any]:
+        return {
+            "loaded": self.loaded,
+            "warm": self.warm,
+            "loadSeconds": self.load_seconds,
+            "warmupSeconds": self.warmup_seconds,
+            "class": self.agent_class,
+            "tier": self.tier,
+            "fallback": self.fallback,
+            "error": self.error,
+            "pool": self.pool.family
+        }
+
+
+class AgentPools:
+    """The agent pools of the sharded deployment mode, one per family"""
+    
+    def __init__(self, sizes: Dict[str, Tuple[int, int]]):
+        self.pools = {family: AgentPool(family, workers, threads) for family, (workers, threads) in sizes.items()}
+        self._family_of = {name: family for family, names in FAMILIES.items() for name in names}
+    
+    @classmethod
+    def from_config(cls) -> "AgentPools":
+        return cls({
+            "parsing": (config.AGENT_POOL_PARSING_WORKERS, config.AGENT_POOL_PARSING_THREADS),
+            "embedding": (config.AGENT_POOL_EMBEDDING_WORKERS, config.AGENT_POOL_EMBEDDING_THREADS),
+            "summarization": (config.AGENT_POOL_SUMMARIZATION_WORKERS, config.AGENT_POOL_SUMMARIZATION_THREADS),
+            "scheduling": (config.AGENT_POOL_SCHEDULING_WORKERS, config.AGENT_POOL_SCHEDULING_THREADS),
+        })
+    
+    def agent(self, name: str) -> PooledAgent:
+        return PooledAgent(name, self.pools[self._family_of[name]])
+    
+    def shutdown(self) -> None:
+        for pool in self.pools.values():
+            pool.shutdown()
+    
+    def status(self) -> Dict[str, Any]:
+        return {family: pool.status() for family, pool in self.pools.items()}
@@ -0,0 +1,145 @@
+import threading
+import time
+import traceback
+from typing import Dict, Any, Callable, Optional
+
+from agents import agent_tier, create_agent
+
+# Small dummy inputs that push every model through one real inference
+WARMUP_RESUME = "Jane Doe\njane@example.com\nSKILLS:\nPython, SQL, Docker\nEXPERIENCE:\nJan 2020 - Present\nEngineer | Acme\nBuilt APIs"
+WARMUP_JOB = "Job Title: Backend Engineer\nREQUIREMENTS:\n• Python experience\nRESPONSIBILITIES:\n• Build APIs"
+WARMUP_TEXT = " ".join(["The candidate built reliable data pipelines and web services for several teams."] * 8)
+
+WARMUP_CALLS: Dict[str, Callable[[Any], Any]] = {
+    "resume_parser": lambda agent: agent.parse(WARMUP_RESUME),
+    "jd_parser": lambda agent: agent.parse(WARMUP_JOB),
+    "matching": lambda agent: agent.match({"skills": ["Python"], "experience": [{"title": "Engineer"}]},
+                                          {"skills": ["Python", "Go"], "requirements": ["Python"],
+                                           "responsibilities": ["Build APIs"]}),
+    "summarization": lambda agent: agent.summarize(WARMUP_TEXT, "general"),
+    "gap_detection": lambda agent: agent.detect({"skills": ["Python"]},
+                                                {"skills": ["Python", "Go"], "requirements": ["Python"]}),
+    "scheduler": lambda agent: agent.get_slots([], None),
+}
+
+
+class LazyAgent:
+    """Proxy that constructs its agent on first use"""
+    
+    def __init__(self, name: str):
+        self.name = name
+        self.load_seconds: Optional[float] = None
+        self.warmup_seconds: Optional[float] = None
+        self.warm = False
+        self.error: Optional[str] = None
+        self.tier: Optional[str] = None
+        self._agent = None
+        self._lock = threading.Lock()
+    
+    @property
+    def loaded(self) -> bool:
+        return self._agent is not None
+    
+    @property
+    def fallback(self) -> bool:
+        """Whether the simplified agent stands in for the full one"""
+        return self.tier == "triage"
+    
+    def get(self):
+        """Return the agent, constructing it if needed"""
+        agent = self._agent
+        if agent is not None:
+            return agent
+        
+        with self._lock:
+            if self._agent is None:
+                start = time.perf_counter()
+                try:
+                    self._agent = create_agent(self.name)
+                    self.tier = agent_tier(self._agent)
+                    self.error = None
+                except Exception as e:
+                    self.error = f"{type(e).__name__}: {e}"
+                    raise
+                finally:
+                    self.load_seconds = time.perf_counter() - start
+            return self._agent
+    
+    def __getattr__(self, attr):
+        # Only called for attributes the proxy itself doesn't have, i.e. agent methods
+        return getattr(self.get(), attr)
+    
+    def status(self) -> Dict[str, Any]:
+        return {
+            "loaded": self.loaded,
+            "warm": self.warm,
+            "loadSeconds": self.load_seconds,
+            "warmupSeconds": self.warmup_seconds,
+            "class": type(self._agent).__name__ if self._agent is not None else None,
+            "tier": self.tier,
+            "fallback": self.fallback,
+            "error": self.error
+        }
+
+
+class AgentRegistry:
+    """Lazily constructed agents with optional background warm-up and readiness tracking"""
+    
+    def __init__(self, names, pools=None):
+        # With agent pools, each agent runs in its family's worker processes
+        self.pools = pools
+        self.agents = {name: pools.agent(name) if pools is not None else LazyAgent(name) for name in names}
+        self.warmup_enabled = False
+        self.warmup_started_at: Optional[float] = None
+        self.warmup_finished_at: Optional[float] = None
+    
+    def __getitem__(self, name: str) -> LazyAgent:
+        return self.agents[name]
+    
+    def warm_up(self) -> None:
+        """Construct every agent and run one dummy inference through it"""
+        self.warmup_started_at = time.perf_counter()
+        for name, lazy_agent in self.agents.items():
+            try:
+                agent = lazy_agent.get()
+                start = time.perf_counter()
+                WARMUP_CALLS[name](agent)
+                lazy_agent.warmup_seconds = time.perf_counter() - start
+                lazy_agent.warm = True
+            except Exception as e:
+                # Keep warming the other agents; readiness reports the failure
+                lazy_agent.error = lazy_agent.error or f"{type(e).__name__}: {e}"
+                traceback.print_exc()
+        self.warmup_finished_at = time.perf_counter()
+        print(f"Agent warm-up finished in {self.warmup_finished_at - self.warmup_started_at:.2f}s")
+    
+    def start_warm_up(self) -> threading.Thread:
+        """Warm up in a background thread so the server accepts traffic immediately"""
+        self.warmup_enabled = True
+        thread = threading.Thread(target=self.warm_up, name="agent-warmup", daemon=True)
+        thread.start()
+        return thread
+    
+    def is_ready(self) -> bool:
+        """
+        Ready when warm-up is disabled (lazy mode) or every agent is warm, and no agent
+        has fallen back to its simplified version
+        """
+        if any(agent.fallback for agent in self.agents.values()):
+            return False
+        if not self.warmup_enabled:
+            return all(agent.error is None for agent in self.agents.values())
+        return all(agent.warm for agent in self.agents.values())
+    
+    def report(self) -> Dict[str, Any]:
+        """Startup timing and per-agent status"""
+        warmup_seconds = None
+        if self.warmup_started_at is not None and self.warmup_finished_at is not None:
+            warmup_seconds = self.warmup_finished_at - self.warmup_started_at
+        return {
+            "ready": self.is_ready(),
+            "warmupEnabled": self.warmup_enabled,
+            "warmupSeconds": warmup_seconds,
+            "agents": {name: agent.status() for name, agent in self.agents.items()},
+            "pools": self.pools.status() if self.pools is not None else None
+        }
@@ -0,0 +1,183 @@
+import re
+from typing import Callable, Dict, List
+
+from agents.document import section_span
+from agents.extraction import DEGREE_FIELD, INSTITUTION_NAME, YEAR, Entities
+
+# Education and experience entries of a resume, shared by the full parser and the triage
+# tier. Both work from the entities of one RESUME_ENTITIES scan; they differ only in how
+# the education section is split into sentences (NLTK or the regex splitter).
+
+RESUME_COMMON_HEADERS = ["education", "experience", "skills", "projects", "certifications",
+                         "publications", "awards", "languages", "interests", "references"]
+EDUCATION_HEADERS = ["education", "academic background", "academic qualifications"]
+EXPERIENCE_HEADERS = ["experience", "work experience", "professional experience", "employment"]
+
+# "Title | Company", "Title, Company", "Title - Company", "Title at Company"
+_TITLE_SEPARATOR = re.compile(r'\s*(?:\||,|\s[-–—]\s|\sat\s)\s*')
+_BULLET_START = re.compile(r'(?:•|\*|-|\d+[.)])\s')
+# Lines above an entry's dates taken as its title and company: short, and not a bullet or a sentence
+HEADING_MAX_WORDS = 8
+HEADING_MAX_LINES = 2
+
+
+def extract_education(text: str, entities: Entities,
+                      split_sentences: Callable[[str], List[str]]) -> List[Dict[str, str]]:
+    """
+    Education entries: one per sentence of the education section naming a degree or an institution
+    
+    Args:
+        text: Resume text
+        entities: RESUME_ENTITIES scan of text
+        split_sentences: Sentence splitter for the section (sentences must be substrings of it)
+    """
+    education_list = []
+    
+    # Find education section
+    span = section_span(text, EDUCATION_HEADERS, RESUME_COMMON_HEADERS)
+    if span is None or span[0] == span[1]:
+        return education_list
+    section_start, section_end = span
+    
+    # Find all sentences in education section, with their offsets in the text
+    cursor = section_start
+    for sentence in split_sentences(text[section_start:section_end]):
+        start = text.find(sentence, cursor, section_end)
+        if start == -1:
+            start = cursor
+        end = start + len(sentence)
+        cursor = end
+        
+        education_item = {
+            "degree": "",
+            "field": "",
+            "institution": "",
+            "year": ""
+        }
+        
+        # Extract degree and field (the field runs to the next comma or line end)
+        degree = entities.first("degree", start, end)
+        if degree:
+            education_item["degree"] = degree.text
+            field = DEGREE_FIELD.match(text, degree.end, end) if degree.variant != "mba" else None
+            if field:
+                education_item["field"] = field.group(1).strip()
+        
+        # Extract institution
+        institution = entities.first("institution", start, end)
+        institution_name = INSTITUTION_NAME.match(text, institution.end, end) if institution else None
+        if institution_name:
+            education_item["institution"] = text[institution.start:institution_name.end()]
+        else:
+            # Try another approach to find institution
+            for inst_candidate in sentence.split(','):
+                if "university" in inst_candidate.lower() or "college" in inst_candidate.lower():
+                    education_item["institution"] = inst_candidate.strip()
+                    break
+        
+        # Extract year (the first date in the sentence, or the start of a range)
+        date = entities.first(("date", "date_range"), start, end)
+        year_match = YEAR.search(text, date.start, date.end) if date else None
+        if year_match:
+            education_item["year"] = year_match.group(0)
+        
+        # Add to list if we have at least degree or institution
+        if education_item["degree"] or education_item["institution"]:
+            education_list.append(education_item)
+    
+    return education_list
+
+
+def _is_heading(text: str, start: int, end: int, entities: Entities) -> bool:
+    """Whether the line text[start:end] reads as a title or company line rather than a description"""
+    line = text[start:end].strip()
+    if not line or _BULLET_START.match(line) or line[-1] in ".!?:;":
+        return False
+    if len(line.split()) > HEADING_MAX_WORDS:
+        return False
+    date = entities.first(("date_range", "date"), start, end)
+    return date is None or text[start:date.start].strip() != ""
+
+
+def _entry_starts(text: str, entities: Entities, section_start: int, section_end: int) -> List[int]:
+    """
+    Offsets where experience entries start: at each line opening with a date, or at the
+    title and company lines directly above it, which belong to the same entry
+    """
+    starts = [section_start]
+    for entity in entities.between(section_start, section_end, ("date_range", "date")):
+        if entity.start <= section_start or text[entity.start - 1] != "\n":
+            continue
+        start = entity.start
+        for _ in range(HEADING_MAX_LINES):
+            line_end = start - 1
+            line_start = text.rfind("\n", 0, line_end) + 1
+            if line_start < starts[-1] or not _is_heading(text, line_start, line_end, entities):
+                break
+            start = line_start
+            # A line with both title and company is the whole heading
+            if _TITLE_SEPARATOR.search(text, line_start, line_end):
+                break
+        if start > starts[-1]:
+            starts.append(start)
+    return starts
+
+
+def extract_experience(text: str, entities: Entities) -> List[Dict[str, str]]:
+    """
+    Work experience entries of the experience section
+    
+    Entries are split at lines opening with a date. Title and company come from the entry's
+    first line ("Title | Company" and similar) or its first two lines, whether the dates
+    come before them, after them or on the same line.
+    
+    Args:
+        text: Resume text
+        entities: RESUME_ENTITIES scan of text
+    """
+    experience_list = []
+    
+    # Find experience section
+    span = section_span(text, EXPERIENCE_HEADERS, RESUME_COMMON_HEADERS)
+    if span is None or span[0] == span[1]:
+        return experience_list
+    section_start, section_end = span
+    
+    block_starts = _entry_starts(text, entities, section_start, section_end)
+    block_ends = [start - 1 for start in block_starts[1:]] + [section_end]
+    
+    for block_start, block_end in zip(block_starts, block_ends):
+        # Extract dates (month ranges, else year ranges)
+        date_range = (entities.first("date_range", block_start, block_end, variant="months")
+                      or entities.first("date_range", block_start, block_end, variant="years"))
+        duration = date_range.text if date_range else ""
+        
+        def without_dates(line: str) -> str:
+            return line.replace(duration, "").strip(" \t-–—|,") if duration else line.strip()
+        
+        # Lines holding only the dates are left out
+        lines = [line for line in text[block_start:block_end].strip().split('\n') if without_dates(line)]
+        if not lines:
+            continue
+        
+        # Title and company share the first line, or the company has the second
+        first_line = without_dates(lines[0])
+        parts = _TITLE_SEPARATOR.split(first_line, maxsplit=1)
+        if len(parts) == 2:
+            title, company = parts
+            description_lines = lines[1:]
+        else:
+            title = first_line
+            company = lines[1].strip() if len(lines) > 1 else ""
+            description_lines = lines[2:]
+        
+        # Add to list if we have at least title or company
+        if title or company:
+            experience_list.append({
+                "title": title.strip(),
+                "company": company.strip(),
+                "duration": duration,
+                "description": "\n".join(description_lines).strip()
+            })
+    
+    return experience_list
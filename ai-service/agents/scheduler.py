@@ -1,6 +1,9 @@
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime, timedelta
+import numpy as np
 import pytz
+from scipy.optimize import linear_sum_assignment
+from utils.metrics import stage
 
 class SchedulerAgent:
     """Agent for scheduling interviews"""
@@ -14,6 +17,7 @@ class SchedulerAgent:
         }
         self.default_duration = 60  # minutes
         self.default_timezone = pytz.timezone('America/New_York')  # Default timezone
+        self.batch_days_limit = 10  # Business days searched by batch scheduling
     
     def get_slots(self, existing_slots: List[Dict[str, Any]], preferences: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
@@ -56,7 +60,8 @@ class SchedulerAgent:
             # Check if current date is a business day
             if current_date.weekday() in business_hours['days']:
                 # Generate slots for this day
-                day_slots = self._generate_day_slots(current_date, business_hours, duration, busy_slots)
+                with stage("scheduler", "slot_generation"):
+                    day_slots = self._generate_day_slots(current_date, business_hours, duration, busy_slots)
                 available_slots.extend(day_slots)
                 
                 if len(available_slots) >= num_slots:
@@ -83,6 +88,182 @@ class SchedulerAgent:
             "timezone": str(timezone)
         }
     
+    def schedule_batch(self, candidates: List[Dict[str, Any]], interviewers: List[Dict[str, Any]],
+                       preferences: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Assign many candidates to interview slots at once
+        
+        Every interviewer calendar is cut into non-overlapping slots, and the
+        candidate x slot assignment is solved as a maximum-weight bipartite
+        matching, so no slot is booked twice and no candidate gets two slots.
+        Higher priority candidates win contested slots; among equal priorities
+        earlier slots are preferred.
+        
+        Args:
+            candidates: List of candidates with 'id', optional 'priority',
+                optional 'availability' windows ({'start', 'end'}) and optional
+                'interviewerIds' restricting who may interview them
+            interviewers: List of interviewers with 'id', optional 'existingSlots'
+                (same format as get_slots) and optional 'availability' windows
+            preferences: Scheduling preferences (optional, same as get_slots)
+            
+        Returns:
+            Dictionary with assignments and unassigned candidate ids
+        """
+        business_hours = self._parse_business_hours(preferences)
+        timezone = self._parse_timezone(preferences)
+        duration = self._parse_duration(preferences)
+        
+        # Build the slot pool: one row per (interviewer, start time)
+        with stage("scheduler", "slot_generation"):
+            slot_owners, slot_starts = self._generate_interviewer_slots(interviewers, business_hours, timezone, duration)
+        candidate_windows = [self._parse_windows(candidate.get('availability'), timezone) for candidate in candidates]
+        
+        candidate_ids = [str(candidate.get('id', i)) for i, candidate in enumerate(candidates)]
+        
+        if not candidates or not slot_starts:
+            return {
+                "assignments": [],
+                "unassigned": candidate_ids,
+                "timezone": str(timezone),
+                "stats": {"candidates": len(candidates), "slots": len(slot_starts), "feasiblePairs": 0}
+            }
+        
+        # Slot start/end times as epoch seconds so feasibility can be computed with numpy
+        starts = np.array([slot.timestamp() for slot in slot_starts])
+        ends = starts + duration * 60
+        owners = np.array(slot_owners, dtype=object)
+        
+        # Earlier slots get a bonus in [0, 1) so they never outweigh a priority level
+        order = np.argsort(starts, kind='stable')
+        earliness = np.empty(len(starts))
+        earliness[order] = 1.0 - np.arange(len(starts)) / len(starts)
+        
+        weights = np.zeros((len(candidates), len(starts)))
+        for i, candidate in enumerate(candidates):
+            feasible = self._candidate_feasibility(candidate, candidate_windows[i], starts, ends, owners)
+            priority = self._parse_priority(candidate)
+            weights[i, feasible] = (priority + 1) * 2.0 + earliness[feasible]
+        
+        # Drop slots nobody can take to keep the assignment matrix small
+        usable = weights.any(axis=0)
+        weights = weights[:, usable]
+        usable_indices = np.flatnonzero(usable)
+        
+        assignments = []
+        assigned = set()
+        if weights.size:
+            with stage("scheduler", "assignment"):
+                rows, cols = linear_sum_assignment(weights, maximize=True)
+            for row, col in zip(rows, cols):
+                # Zero weight means the pair was infeasible and the solver only filled the matrix
+                if weights[row, col] <= 0:
+                    continue
+                slot_index = usable_indices[col]
+                slot = slot_starts[slot_index]
+                assigned.add(row)
+                assignments.append({
+                    "candidateId": candidate_ids[row],
+                    "interviewerId": slot_owners[slot_index],
+                    "startTime": slot.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                    "endTime": (slot + timedelta(minutes=duration)).strftime("%Y-%m-%dT%H:%M:%S%z"),
+                    "duration": duration
+                })
+        
+        assignments.sort(key=lambda a: (a["startTime"], a["interviewerId"]))
+        
+        return {
+            "assignments": assignments,
+            "unassigned": [candidate_ids[i] for i in range(len(candidates)) if i not in assigned],
+            "timezone": str(timezone),
+            "stats": {
+                "candidates": len(candidates),
+                "slots": len(slot_starts),
+                "feasiblePairs": int(np.count_nonzero(weights))
+            }
+        }
+    
+    def _generate_interviewer_slots(self, interviewers: List[Dict[str, Any]], business_hours: Dict[str, Any],
+                                    timezone, duration: int) -> Tuple[List[str], List[datetime]]:
+        """Generate non-overlapping free slots for every interviewer"""
+        slot_owners = []
+        slot_starts = []
+        
+        # Same search window as get_slots: start from the next day
+        start_date = datetime.now(timezone) + timedelta(days=1)
+        start_date = start_date.replace(hour=business_hours['start_hour'], minute=0, second=0, microsecond=0)
+        
+        business_days = []
+        current_date = start_date
+        while len(business_days) < self.batch_days_limit:
+            if current_date.weekday() in business_hours['days']:
+                business_days.append(current_date)
+            current_date = current_date + timedelta(days=1)
+            # Guard against preferences with no business days at all
+            if (current_date - start_date).days > self.batch_days_limit * 7:
+                break
+        
+        for index, interviewer in enumerate(interviewers):
+            interviewer_id = str(interviewer.get('id', index))
+            busy_slots = self._parse_existing_slots(interviewer.get('existingSlots') or [])
+            windows = self._parse_windows(interviewer.get('availability'), timezone)
+            
+            for day in business_days:
+                # Step by the interview duration so one interviewer's slots never overlap
+                for slot in self._generate_day_slots(day, business_hours, duration, busy_slots, step=duration):
+                    slot_end = slot + timedelta(minutes=duration)
+                    if windows and not any(w['start'] <= slot and slot_end <= w['end'] for w in windows):
+                        continue
+                    slot_owners.append(interviewer_id)
+                    slot_starts.append(slot)
+        
+        return slot_owners, slot_starts
+    
+    def _candidate_feasibility(self, candidate: Dict[str, Any], windows: List[Dict[str, datetime]],
+                               starts: np.ndarray, ends: np.ndarray, owners: np.ndarray) -> np.ndarray:
+        """Return a boolean mask of the slots a candidate can attend"""
+        if windows:
+            feasible = np.zeros(len(starts), dtype=bool)
+            for window in windows:
+                feasible |= (starts >= window['start'].timestamp()) & (ends <= window['end'].timestamp())
+        else:
+            # No availability given means the candidate can take any slot
+            feasible = np.ones(len(starts), dtype=bool)
+        
+        interviewer_ids = candidate.get('interviewerIds')
+        if interviewer_ids:
+            feasible &= np.isin(owners, [str(i) for i in interviewer_ids])
+        
+        return feasible
+    
+    def _parse_windows(self, windows: Optional[List[Dict[str, Any]]], timezone) -> List[Dict[str, datetime]]:
+        """Parse availability windows into timezone-aware start/end datetimes"""
+        parsed = []
+        
+        for window in windows or []:
+            try:
+                start = self._localize(self._parse_datetime(window['start']), timezone)
+                end = self._localize(self._parse_datetime(window['end']), timezone)
+                if end > start:
+                    parsed.append({'start': start, 'end': end})
+            except:
+                continue
+        
+        return parsed
+    
+    def _localize(self, dt: datetime, timezone) -> datetime:
+        """Attach the scheduling timezone to naive datetimes"""
+        if dt.tzinfo is None:
+            return timezone.localize(dt)
+        return dt
+    
+    def _parse_priority(self, candidate: Dict[str, Any]) -> float:
+        """Parse candidate priority (higher is scheduled first)"""
+        priority = candidate.get('priority', 0)
+        if isinstance(priority, (int, float)) and priority >= 0:
+            return float(priority)
+        return 0.0
+    
     def _parse_business_hours(self, preferences: Optional[Dict[str, Any]]) -> Dict[str, Any]:
         """Parse business hours from preferences"""
         if not preferences or 'businessHours' not in preferences:
@@ -172,7 +353,7 @@ class SchedulerAgent:
                     return datetime.now(pytz.UTC)
     
     def _generate_day_slots(self, start_date: datetime, business_hours: Dict[str, Any], 
-                           duration: int, busy_slots: List[Dict[str, Any]]) -> List[datetime]:
+                           duration: int, busy_slots: List[Dict[str, Any]], step: int = 30) -> List[datetime]:
         """Generate available slots for a day"""
         available_slots = []
         
@@ -198,6 +379,6 @@ class SchedulerAgent:
                 available_slots.append(current_slot)
             
             # Move to next slot
-            current_slot = current_slot + timedelta(minutes=30)  # 30-minute increments
+            current_slot = current_slot + timedelta(minutes=step)  # 30-minute increments by default
         
         return available_slots
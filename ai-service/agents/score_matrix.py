@@ -0,0 +1,411 @@
+import argparse
+import heapq
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+import config
+from agents.embeddings import PrecomputedEmbeddings, embed_fields, job_embedding_fields, resume_embedding_fields
+from utils.metrics import stage
+
+# Component pairs of the matrix score and their weights (the same as MatchingAgent.SCORE_WEIGHTS):
+# resume skills vs job skills, resume experience vs job responsibilities, resume profile vs
+# job requirements. Each side's vector is the weighted concatenation of its unit-length field
+# centroids, so one dot product gives the weighted sum of the three cosine similarities.
+COMPONENTS = [
+    ("skills", "skills", "skills", 0.5),
+    ("experience", "experience", "responsibilities", 0.3),
+    ("requirements", "profile", "requirements", 0.2),
+]
+KINDS = ("candidate", "job")
+GROWTH_MINIMUM = 256
+
+
+def _centroid(vectors: Dict[str, np.ndarray], texts: List[str], dim: int) -> np.ndarray:
+    """Unit-length mean of the texts' unit vectors (zeros when there are none)"""
+    rows = [vectors[text] for text in texts if text in vectors]
+    if not rows:
+        return np.zeros(dim, dtype=np.float32)
+    matrix = np.asarray(rows, dtype=np.float32)
+    matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+    centroid = matrix.mean(axis=0)
+    return centroid / max(float(np.linalg.norm(centroid)), 1e-12)
+
+
+def document_vector(payload: Dict[str, Any], kind: str) -> np.ndarray:
+    """
+    Matrix vector of a candidate or job from its embeddings payload (see embeddings.embed_fields)
+    
+    Args:
+        payload: Embeddings payload returned with a parse (includeEmbeddings)
+        kind: "candidate" or "job"
+    
+    Returns:
+        float32 vector of len(COMPONENTS) * dim
+    """
+    lookup = PrecomputedEmbeddings()
+    lookup.add(payload, payload.get("modelId"))
+    dim = int(payload["dim"])
+    parts = []
+    for _, candidate_field, job_field, weight in COMPONENTS:
+        field = candidate_field if kind == "candidate" else job_field
+        texts = payload.get("fields", {}).get(field, {}).get("texts", [])
+        parts.append(np.sqrt(weight) * _centroid(lookup.vectors, texts, dim))
+    return np.concatenate(parts).astype(np.float32)
+
+
+class ScoreMatrix:
+    """
+    Materialized candidate x job scores, kept as memory-mapped arrays in a directory
+    
+    Candidate and job vectors are stored at fixed slots; scores are kept twice, by
+    candidate (candidates x jobs) and by job (jobs x candidates), so a row or a column
+    is always one contiguous read. Adding or changing a candidate recomputes its row
+    with one matrix-vector product against the job vectors, and a job its column; a
+    full rebuild runs blocked matrix products. Slot ids live in a small SQLite file.
+    
+    Single updates aren't synced to disk: they live in the page cache, which survives a
+    process crash; flush() (run after loads, rebuilds and at shutdown) covers the machine.
+    """
+    
+    def __init__(self, directory: str, block: int = 2048):
+        self.directory = directory
+        self.block = block
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(os.path.join(directory, "slots.sqlite"), check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS slots (
+                kind TEXT NOT NULL,
+                slot INTEGER NOT NULL,
+                doc_id TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (kind, doc_id)
+            );
+        """)
+        meta = dict(self._conn.execute("SELECT key, value FROM meta").fetchall())
+        self.model_id: Optional[str] = meta.get("modelId")
+        self.width = int(meta["width"]) if "width" in meta else None
+        self._ids: Dict[str, List[Optional[str]]] = {kind: [] for kind in KINDS}
+        self._slots: Dict[str, Dict[str, int]] = {kind: {} for kind in KINDS}
+        for kind, slot, doc_id in self._conn.execute("SELECT kind, slot, doc_id FROM slots"):
+            ids = self._ids[kind]
+            ids.extend([None] * (slot + 1 - len(ids)))
+            ids[slot] = doc_id
+            self._slots[kind][doc_id] = slot
+        # Free slots below the highest one in use, reused lowest first
+        self._free = {kind: [slot for slot, doc_id in enumerate(ids) if doc_id is None] for kind, ids in self._ids.items()}
+        self._vectors: Dict[str, Optional[np.memmap]] = {kind: None for kind in KINDS}
+        self._scores: Dict[str, Optional[np.memmap]] = {kind: None for kind in KINDS}
+        self._masks: Dict[str, Optional[np.ndarray]] = {kind: None for kind in KINDS}
+        if self.width is not None:
+            self._open()
+    
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+    
+    def _open(self) -> None:
+        if not all(os.path.exists(self._path(f"{kind}_vectors.npy")) for kind in KINDS):
+            # Model recorded but the arrays never written: they are allocated on the next add
+            return
+        for kind in KINDS:
+            self._vectors[kind] = np.load(self._path(f"{kind}_vectors.npy"), mmap_mode="r+")
+            self._scores[kind] = np.load(self._path(f"scores_by_{kind}.npy"), mmap_mode="r+")
+    
+    def _capacity(self, kind: str) -> int:
+        vectors = self._vectors[kind]
+        return 0 if vectors is None else vectors.shape[0]
+    
+    def _active(self, kind: str) -> np.ndarray:
+        """Mask of occupied slots up to the highest one in use"""
+        if self._masks[kind] is None:
+            self._masks[kind] = np.array([doc_id is not None for doc_id in self._ids[kind]], dtype=bool)
+        return self._masks[kind]
+    
+    def _resize(self, capacities: Dict[str, int]) -> None:
+        """Reallocate the arrays with new capacities, copying what is stored"""
+        for kind in KINDS:
+            other = KINDS[1 - KINDS.index(kind)]
+            old_vectors, old_scores = self._vectors[kind], self._scores[kind]
+            vectors_path, scores_path = self._path(f"{kind}_vectors.npy"), self._path(f"scores_by_{kind}.npy")
+            vectors = np.lib.format.open_memmap(vectors_path + ".tmp", mode="w+", dtype=np.float32,
+                                                shape=(capacities[kind], self.width))
+            # float16 halves the footprint; scores are reported to two decimals
+            scores = np.lib.format.open_memmap(scores_path + ".tmp", mode="w+", dtype=np.float16,
+                                               shape=(capacities[kind], capacities[other]))
+            if old_vectors is not None:
+                rows = min(old_vectors.shape[0], capacities[kind])
+                columns = min(old_scores.shape[1], capacities[other])
+                for start in range(0, rows, self.block):
+                    end = min(start + self.block, rows)
+                    vectors[start:end] = old_vectors[start:end]
+                    scores[start:end, :columns] = old_scores[start:end, :columns]
+            vectors.flush()
+            scores.flush()
+            del vectors, scores
+            self._vectors[kind] = self._scores[kind] = None
+            del old_vectors, old_scores
+            os.replace(vectors_path + ".tmp", vectors_path)
+            os.replace(scores_path + ".tmp", scores_path)
+        self._open()
+    
+    def _ensure(self, payload_model: str, width: int, needed: Dict[str, int]) -> None:
+        """Set the model on first use and grow the arrays to hold the needed slots"""
+        if self.model_id is None:
+            self.model_id, self.width = payload_model, width
+            with self._conn:
+                self._conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                                       [("modelId", payload_model), ("width", str(width))])
+        elif payload_model != self.model_id:
+            raise ValueError(f"Embeddings from {payload_model} can't be added to a score matrix built with "
+                             f"{self.model_id}; re-embed with that model or clear the matrix")
+        capacities = {kind: self._capacity(kind) for kind in KINDS}
+        if self._vectors["candidate"] is not None and all(needed[kind] <= capacities[kind] for kind in KINDS):
+            return
+        # Doubling, so a stream of additions copies the arrays only log(n) times
+        for kind in KINDS:
+            if needed[kind] > capacities[kind]:
+                capacities[kind] = max(needed[kind], 2 * capacities[kind])
+            capacities[kind] = max(capacities[kind], GROWTH_MINIMUM)
+        self._resize(capacities)
+    
+    def _slot(self, kind: str, doc_id: str) -> int:
+        """Slot of doc_id, assigning a free one (the lowest) if it is new"""
+        if doc_id in self._slots[kind]:
+            return self._slots[kind][doc_id]
+        ids = self._ids[kind]
+        if self._free[kind]:
+            slot = heapq.heappop(self._free[kind])
+        else:
+            slot = len(ids)
+            ids.append(None)
+        ids[slot] = doc_id
+        self._slots[kind][doc_id] = slot
+        self._masks[kind] = None
+        return slot
+    
+    def _store(self, kind: str, items: List[Tuple[str, Dict[str, Any]]]) -> List[int]:
+        """Write the vectors of (id, payload) items and return their slots (scores not updated)"""
+        vectors = [(doc_id, payload, document_vector(payload, kind)) for doc_id, payload in items]
+        if not vectors:
+            return []
+        model_ids = {payload.get("modelId") for _, payload, _ in vectors}
+        if len(model_ids) > 1:
+            raise ValueError(f"Embeddings from several models: {sorted(map(str, model_ids))}")
+        new = len({doc_id for doc_id, _, _ in vectors if doc_id not in self._slots[kind]})
+        free = len(self._free[kind])
+        needed = {other: len(self._ids[other]) for other in KINDS}
+        needed[kind] += max(0, new - free)
+        self._ensure(model_ids.pop(), len(vectors[0][2]), needed)
+        
+        slots = []
+        now = time.time()
+        with self._conn:
+            for doc_id, _, vector in vectors:
+                slot = self._slot(kind, doc_id)
+                self._vectors[kind][slot] = vector
+                self._conn.execute("INSERT OR REPLACE INTO slots (kind, slot, doc_id, updated_at) VALUES (?, ?, ?, ?)",
+                                   (kind, slot, doc_id, now))
+                slots.append(slot)
+        return slots
+    
+    def _score_slots(self, kind: str, slots: List[int]) -> None:
+        """Recompute the rows of kind's slots (the other kind's columns) against everything stored"""
+        other = KINDS[1 - KINDS.index(kind)]
+        count = len(self._ids[other])
+        if not slots or not count:
+            return
+        vectors = np.asarray(self._vectors[kind][slots])
+        for start in range(0, count, self.block):
+            end = min(start + self.block, count)
+            block = vectors @ np.asarray(self._vectors[other][start:end]).T
+            self._scores[kind][slots, start:end] = block
+            # The same scores in the other layout: one strided write per slot
+            for index, slot in enumerate(slots):
+                self._scores[other][start:end, slot] = block[index]
+    
+    def upsert(self, kind: str, doc_id: str, payload: Dict[str, Any]) -> None:
+        """
+        Add or replace a candidate or job and recompute its scores
+        
+        Args:
+            kind: "candidate" or "job"
+            doc_id: Stable id of the resume or job
+            payload: Its embeddings payload
+        """
+        with self._lock, stage("score_matrix", "upsert"):
+            slots = self._store(kind, [(doc_id, payload)])
+            self._score_slots(kind, slots)
+    
+    def load(self, kind: str, items: Iterable[Tuple[str, Dict[str, Any]]]) -> int:
+        """Store many vectors without scoring them (follow with rebuild())"""
+        with self._lock:
+            items = list(items)
+            self._store(kind, items)
+            self.flush()
+            return len(items)
+    
+    def remove(self, kind: str, doc_id: str) -> bool:
+        """Drop a candidate or job; its slot is reused by the next one added"""
+        with self._lock:
+            slot = self._slots[kind].pop(doc_id, None)
+            if slot is None:
+                return False
+            self._ids[kind][slot] = None
+            heapq.heappush(self._free[kind], slot)
+            self._masks[kind] = None
+            self._vectors[kind][slot] = 0
+            self._scores[kind][slot] = 0
+            other = KINDS[1 - KINDS.index(kind)]
+            self._scores[other][:, slot] = 0
+            with self._conn:
+                self._conn.execute("DELETE FROM slots WHERE kind = ? AND doc_id = ?", (kind, doc_id))
+            return True
+    
+    def rebuild(self) -> Dict[str, Any]:
+        """Recompute every score with blocked matrix products"""
+        with self._lock, stage("score_matrix", "rebuild"):
+            start = time.perf_counter()
+            candidates, jobs = len(self._ids["candidate"]), len(self._ids["job"])
+            for row in range(0, candidates, self.block):
+                row_end = min(row + self.block, candidates)
+                candidate_block = np.asarray(self._vectors["candidate"][row:row_end])
+                for column in range(0, jobs, self.block):
+                    column_end = min(column + self.block, jobs)
+                    block = candidate_block @ np.asarray(self._vectors["job"][column:column_end]).T
+                    self._scores["candidate"][row:row_end, column:column_end] = block
+                    self._scores["job"][column:column_end, row:row_end] = block.T
+            self.flush()
+            return {"candidates": candidates, "jobs": jobs, "seconds": round(time.perf_counter() - start, 3)}
+    
+    def flush(self) -> None:
+        """Write changed pages to disk now (otherwise the kernel writes them back in its own time)"""
+        for arrays in (self._vectors, self._scores):
+            for array in arrays.values():
+                if array is not None:
+                    array.flush()
+    
+    def top(self, kind: str, doc_id: str, k: int = 10) -> List[Dict[str, Any]]:
+        """
+        Best-scoring jobs of a candidate, or candidates of a job
+        
+        Args:
+            kind: Kind of doc_id ("candidate" or "job")
+            doc_id: The candidate or job
+            k: Number of results
+        
+        Returns:
+            [{"id", "score"}] in descending score order
+        """
+        with self._lock:
+            slot = self._slots[kind].get(doc_id)
+            if slot is None:
+                raise KeyError(doc_id)
+            other = KINDS[1 - KINDS.index(kind)]
+            active = self._active(other)
+            row = np.asarray(self._scores[kind][slot, :len(active)], dtype=np.float32)
+            row[~active] = -np.inf
+            k = min(k, int(active.sum()))
+            if k <= 0:
+                return []
+            best = np.argpartition(-row, k - 1)[:k]
+            best = best[np.argsort(-row[best], kind="stable")]
+            return [{"id": self._ids[other][index], "score": round(float(row[index]) * 100) / 100} for index in best]
+    
+    def score(self, candidate_id: str, job_id: str) -> Optional[float]:
+        """Stored score of one pair, or None if either is missing"""
+        with self._lock:
+            row, column = self._slots["candidate"].get(candidate_id), self._slots["job"].get(job_id)
+            if row is None or column is None:
+                return None
+            return round(float(self._scores["candidate"][row, column]) * 100) / 100
+    
+    def __contains__(self, key: Tuple[str, str]) -> bool:
+        kind, doc_id = key
+        return doc_id in self._slots[kind]
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "modelId": self.model_id,
+                "candidates": len(self._slots["candidate"]),
+                "jobs": len(self._slots["job"]),
+                "capacity": {kind: self._capacity(kind) for kind in KINDS},
+                "bytes": sum(os.path.getsize(self._path(name)) for name in os.listdir(self.directory)
+                             if name.endswith(".npy")),
+                "weights": {name: weight for name, _, _, weight in COMPONENTS}
+            }
+
+
+_matrix: Optional[ScoreMatrix] = None
+_matrix_lock = threading.Lock()
+
+
+def get_matrix() -> ScoreMatrix:
+    """Shared matrix at SCORE_MATRIX_DIR, opened on first use"""
+    global _matrix
+    with _matrix_lock:
+        if _matrix is None:
+            _matrix = ScoreMatrix(config.SCORE_MATRIX_DIR, config.SCORE_MATRIX_BLOCK)
+        return _matrix
+
+
+def flush_matrix() -> None:
+    """Flush the shared matrix, if it was opened"""
+    with _matrix_lock:
+        if _matrix is not None:
+            _matrix.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m agents.score_matrix",
+                                     description="Build or query the materialized candidate x job score matrix")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="load a batch run's records.jsonl and compute every score")
+    build_parser.add_argument("records", help="records.jsonl written by `python -m batch`")
+    build_parser.add_argument("--dir", default=config.SCORE_MATRIX_DIR)
+    for command, help_text in (("top-jobs", "best jobs of a candidate"), ("top-candidates", "best candidates of a job")):
+        top_parser = subparsers.add_parser(command, help=help_text)
+        top_parser.add_argument("id")
+        top_parser.add_argument("--k", type=int, default=10)
+        top_parser.add_argument("--dir", default=config.SCORE_MATRIX_DIR)
+    args = parser.parse_args()
+    
+    matrix = ScoreMatrix(args.dir, config.SCORE_MATRIX_BLOCK)
+    if args.command != "build":
+        kind = "candidate" if args.command == "top-jobs" else "job"
+        for item in matrix.top(kind, args.id, args.k):
+            print(f"{item['score']:.2f}  {item['id']}")
+        return
+    
+    backend = None
+    items = {kind: [] for kind in KINDS}
+    with open(args.records, "rb") as f:
+        for line in f:
+            record = json.loads(line)
+            if "parsed" not in record:
+                continue
+            payload = record.get("embeddings")
+            if payload is None:
+                # Records from a run without --score carry no payloads; embed them here
+                if backend is None:
+                    from agents.model_loader import load_sentence_model
+                    backend, _ = load_sentence_model()
+                fields = (resume_embedding_fields if record["kind"] == "resume" else job_embedding_fields)(record["parsed"])
+                payload = embed_fields(backend, fields)
+            items["candidate" if record["kind"] == "resume" else "job"].append((record["id"], payload))
+    for kind in KINDS:
+        matrix.load(kind, items[kind])
+    summary = matrix.rebuild()
+    summary.update(matrix.stats())
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
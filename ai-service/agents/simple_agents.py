@@ -1,129 +1,316 @@
-from fastapi import FastAPI
-from pydantic import BaseModel
-import time
+import re
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Set
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from agents.document import limit_text, section_span, split_sentences, words as split_words
+from agents.embeddings import resume_experience_text, resume_profile_text
+from agents.extraction import RESUME_ENTITIES, Entities, find_skills
+from agents.resume_sections import RESUME_COMMON_HEADERS, extract_education, extract_experience
+from utils.metrics import stage
+
+# Model-free triage tier: regex and keyword versions of the agents with the same output
+# schemas. They need no spaCy, NLTK data, sentence or summarization model, so they serve
+# as the fallback when those are missing and as the `tier: "triage"` of each endpoint,
+# for pre-filtering large intakes before the full agents see the shortlist.
+
+_BULLET = re.compile(r'^[ \t]*(?:•|\*|-|\d+[.)])[ \t]*(.+?)[ \t]*$', re.MULTILINE)
+_LEADING_BULLET = re.compile(r'^(?:•|\*|-)\s*')
+_WORD = re.compile(r'[a-z0-9][a-z0-9+#.]*')
+_STOP_WORDS = frozenset("""
+a about above after all also an and any are as at be been being both but by can could did do does
+for from had has have having he her his how i if in into is it its like may me more most must my
+no not of on or our out over per she should so some such than that the their them then there these
+they this those through to under up us use using very was we well were what when where which while
+who will with within would you your years year plus strong good great ability able including etc
+""".split())
+
+JOB_COMMON_HEADERS = ["requirements", "responsibilities", "qualifications", "about",
+                      "benefits", "company", "what we offer", "apply"]
+
+
+def content_words(text: str) -> Set[str]:
+    """Lowercased words of text without stop words and very short tokens"""
+    return {word.rstrip('.') for word in _WORD.findall(text.lower())
+            if len(word) > 2 and word.rstrip('.') not in _STOP_WORDS}
+
+
+def coverage(needle: str, haystack_words: Set[str]) -> float:
+    """Share of needle's content words found in haystack_words (0 when needle has none)"""
+    needle_words = content_words(needle)
+    if not needle_words:
+        return 0.0
+    return len(needle_words & haystack_words) / len(needle_words)
+
+
+def _section(text: str, section_headers: List[str], common_headers: List[str]) -> str:
+    span = section_span(text, section_headers, common_headers)
+    if span is None:
+        return ""
+    return text[span[0]:span[1]]
+
+
+def _bullets_or_sentences(section: str) -> List[str]:
+    """Bullet points of a section, or its sentences when it has none"""
+    bullet_points = [bp.strip() for bp in _BULLET.findall(section) if bp.strip()]
+    return bullet_points or split_sentences(section)
+
 
 class SimpleResumeParserAgent:
-    """Simplified agent for parsing resumes (for testing)"""
+    """Agent for parsing resumes with regexes and keywords only (triage tier)"""
     
-    def parse(self, content: str):
-        """Parse resume text (simplified for testing)"""
-        # In a real implementation, this would use NLP to extract information
-        lines = content.split('\n')
+    def parse(self, content: str) -> Dict[str, Any]:
+        """
+        Parse resume text and extract structured information
         
-        # Simple extraction logic for demo purposes
-        name = lines[0] if lines else "Unknown"
-        email = "candidate@example.com"
-        skills = ["Python", "JavaScript", "Communication"]
+        Args:
+            content: Raw resume text
         
-        return {
-            "name": name,
-            "email": email,
-            "phone": "555-123-4567",
-            "skills": skills,
-            "education": [
-                {"degree": "Bachelor's", "field": "Computer Science", "institution": "Example University", "year": "2020"}
-            ],
-            "experience": [
-                {
-                    "title": "Software Developer",
-                    "company": "Tech Company",
-                    "duration": "2020-2022",
-                    "description": "Developed web applications using modern frameworks"
-                }
-            ]
-        }
+        Returns:
+            Dictionary with the same fields as ResumeParserAgent.parse
+        """
+        text = limit_text(content)
+        with stage("resume_parser", "triage"):
+            entities = RESUME_ENTITIES.scan(text)
+            email = entities.first("email")
+            phone = entities.first("phone", variant="formatted") or entities.first("phone", variant="digits")
+            return {
+                "name": self._extract_name(text),
+                "email": email.text if email else "",
+                "phone": phone.text if phone else "",
+                "skills": self._extract_skills(text),
+                "education": self._extract_education(text, entities),
+                "experience": self._extract_experience(text, entities)
+            }
+    
+    def _extract_name(self, text: str) -> str:
+        """First line of 2-5 capitalized words among the first 10 lines"""
+        for line in text.split('\n', 10)[:10]:
+            line_words = line.split()
+            if 2 <= len(line_words) <= 5 and all(word[0].isupper() for word in line_words):
+                return line.strip()
+        return "Unknown"
+    
+    def _extract_skills(self, text: str) -> List[str]:
+        """Known technical skills, plus the entries of a skills section"""
+        found_skills = set(find_skills(text))
+        skills_section = _section(text, ["skills", "technical skills", "technologies"], RESUME_COMMON_HEADERS)
+        if skills_section:
+            additional_skills = re.findall(r'•\s*([^•\n]+)', skills_section) or skills_section.split(',')
+            for skill in additional_skills:
+                skill = skill.strip()
+                if 2 <= len(skill) <= 30:
+                    found_skills.add(skill)
+        return sorted(found_skills)
+    
+    def _extract_education(self, text: str, entities: Entities) -> List[Dict[str, str]]:
+        """Education entries, one per sentence of the education section"""
+        return extract_education(text, entities, split_sentences)
+    
+    def _extract_experience(self, text: str, entities: Entities) -> List[Dict[str, str]]:
+        """Experience entries, as the full parser finds them"""
+        return extract_experience(text, entities)
+
 
 class SimpleJDParserAgent:
-    """Simplified agent for parsing job descriptions (for testing)"""
+    """Agent for parsing job descriptions with regexes and keywords only (triage tier)"""
     
-    def parse(self, content: str):
-        """Parse job description text (simplified for testing)"""
-        # In a real implementation, this would use NLP to extract information
-        lines = content.split('\n')
+    TITLE_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in [
+        r'(?:Job Title|Position|Role):\s*([^\n]+)',
+        r'(?:Job Title|Position|Role)\s*-\s*([^\n]+)'
+    ]]
+    COMPANY_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in [
+        r'(?:Company|Organization):\s*([^\n]+)',
+        r'(?:Company|Organization)\s*-\s*([^\n]+)',
+        r'About\s+([^:\n]+):'
+    ]]
+    LOCATION_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in [
+        r'(?:Location|Place):\s*([^\n]+)',
+        r'(?:Location|Place)\s*-\s*([^\n]+)',
+        r'(?:located|based) in\s+([^\.\n]+)'
+    ]]
+    REMOTE = re.compile(r'\b(?:remote|work from home|wfh)\b', re.IGNORECASE)
+    JOB_TYPES = {
+        "Full-time": re.compile(r'\b(?:full-time|full time|permanent|regular)\b', re.IGNORECASE),
+        "Part-time": re.compile(r'\b(?:part-time|part time)\b', re.IGNORECASE),
+        "Contract": re.compile(r'\b(?:contract|temporary|contractor)\b', re.IGNORECASE),
+        "Internship": re.compile(r'\b(?:internship|intern)\b', re.IGNORECASE)
+    }
+    # Stand-in for spaCy's noun check: capitalized terms after the first word of a requirement,
+    # and whatever follows "experience with" and similar phrases
+    SKILL_TERM = re.compile(r'(?<=\s)[A-Z][A-Za-z0-9+#.]{2,}')
+    SKILL_PHRASE = re.compile(r'(?:experience with|knowledge of|proficiency in|familiarity with)\s+'
+                              r'([A-Za-z0-9+#./ ]{2,30}?)(?=\s*(?:[,.;()]|\band\b|\bor\b|$))', re.IGNORECASE)
+    
+    def parse(self, content: str) -> Dict[str, Any]:
+        """
+        Parse job description text and extract structured information
         
-        # Simple extraction logic for demo purposes
-        title = lines[0] if lines else "Software Developer"
+        Args:
+            content: Raw job description text
         
-        return {
-            "title": title,
-            "company": "Example Corp",
-            "requirements": [
-                "Bachelor's degree in Computer Science or related field",
-                "3+ years of experience in software development",
-                "Proficiency in Python and JavaScript"
-            ],
-            "responsibilities": [
-                "Develop and maintain web applications",
-                "Collaborate with cross-functional teams",
-                "Write clean, maintainable code"
-            ],
-            "skills": ["Python", "JavaScript", "React", "Node.js"],
-            "location": "Remote",
-            "jobType": "Full-time"
-        }
+        Returns:
+            Dictionary with the same fields as JDParserAgent.parse
+        """
+        text = limit_text(content)
+        with stage("jd_parser", "triage"):
+            requirements = _bullets_or_sentences(_section(text, [
+                "requirements", "qualifications", "what you need",
+                "what we're looking for", "what we require", "minimum requirements"
+            ], JOB_COMMON_HEADERS))
+            responsibilities = _bullets_or_sentences(_section(text, [
+                "responsibilities", "duties", "what you'll do",
+                "job description", "the role", "day-to-day"
+            ], JOB_COMMON_HEADERS))
+            return {
+                "title": self._extract_title(text),
+                "company": self._first_match(self.COMPANY_PATTERNS, text) or "Unknown Company",
+                "requirements": requirements,
+                "responsibilities": responsibilities,
+                "skills": self._extract_skills(text, requirements),
+                "location": self._extract_location(text),
+                "jobType": self._extract_job_type(text)
+            }
+    
+    def _first_match(self, patterns: List[re.Pattern], text: str) -> str:
+        for pattern in patterns:
+            match = pattern.search(text)
+            if match:
+                return match.group(1).strip()
+        return ""
+    
+    def _extract_title(self, text: str) -> str:
+        """A "Job Title:"-style line, else the first short non-empty line"""
+        title = self._first_match(self.TITLE_PATTERNS, text)
+        if title:
+            return title
+        for line in text.split('\n', 5)[:5]:
+            line = line.strip()
+            if line and len(line) < 100:
+                return line
+        return "Unknown Position"
+    
+    def _extract_skills(self, text: str, requirements: List[str]) -> List[str]:
+        """Known technical skills, plus terms the requirements ask experience with"""
+        found_skills = set(find_skills(text))
+        # Words of known skills ("Machine" of "Machine Learning") aren't skills of their own
+        known_words = {word.lower() for skill in found_skills for word in skill.split()}
+        for requirement in requirements:
+            found_skills.update(term.rstrip('.') for term in self.SKILL_TERM.findall(requirement)
+                                if term.lower() not in _STOP_WORDS and term.rstrip('.').lower() not in known_words)
+            found_skills.update(phrase.strip() for phrase in self.SKILL_PHRASE.findall(requirement))
+        return sorted(found_skills)
+    
+    def _extract_location(self, text: str) -> str:
+        location = self._first_match(self.LOCATION_PATTERNS, text)
+        if location:
+            return location
+        return "Remote" if self.REMOTE.search(text) else "Not specified"
+    
+    def _extract_job_type(self, text: str) -> str:
+        for job_type, pattern in self.JOB_TYPES.items():
+            if pattern.search(text):
+                return job_type
+        return "Full-time"
+
+
+def _skill_overlap(job_skill: str, resume_skills: List[str]) -> float:
+    """Best word overlap (Jaccard) of a job skill with any resume skill, e.g. "react native" vs "react" """
+    job_words = set(job_skill.split())
+    best = 0.0
+    for resume_skill in resume_skills:
+        resume_words = set(resume_skill.split())
+        best = max(best, len(job_words & resume_words) / len(job_words | resume_words))
+    return best
+
 
 class SimpleMatchingAgent:
-    """Simplified agent for matching resumes with job descriptions (for testing)"""
+    """Agent for matching resumes with job descriptions by keyword overlap (triage tier)"""
     
-    def match(self, resume, job):
-        """Match resume with job (simplified for testing)"""
-        # In a real implementation, this would use embedding similarity
+    # Same weights as MatchingAgent, so triage and full scores are on one scale
+    SCORE_WEIGHTS = {"skills": 0.5, "experience": 0.3, "requirements": 0.2}
+    
+    def match(self, resume: Dict[str, Any], job: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Match resume with job description and return match score
         
-        # Count matching skills
-        resume_skills = set([s.lower() for s in resume.get("skills", [])])
-        job_skills = set([s.lower() for s in job.get("skills", [])])
+        Exact skill matches count fully and other job skills by their word overlap
+        with the resume's skills; responsibilities and requirements are scored by the
+        share of their content words the resume's experience and profile mention.
         
-        matching_skills = resume_skills.intersection(job_skills)
+        Args:
+            resume: Parsed resume data (from either tier)
+            job: Parsed job description data (from either tier)
         
-        # Calculate simple score
-        if not job_skills:
-            score = 0.5  # Default score if no skills in job
-        else:
-            score = len(matching_skills) / len(job_skills)
+        Returns:
+            Dictionary with the same fields as MatchingAgent.match
+        """
+        with stage("matching", "triage"):
+            skills_score = self._skills_score(resume.get('skills', []), job.get('skills', []))
+            
+            experience_words = content_words(resume_experience_text(resume.get('experience', [])))
+            responsibilities = job.get('responsibilities', [])
+            experience_score = (sum(coverage(r, experience_words) for r in responsibilities) / len(responsibilities)
+                                if responsibilities and experience_words else 0.0)
+            
+            profile_words = content_words(resume_profile_text(resume))
+            requirements = job.get('requirements', [])
+            requirements_score = (sum(coverage(r, profile_words) for r in requirements) / len(requirements)
+                                  if requirements and profile_words else 0.0)
         
+        overall_score = (
+            skills_score * self.SCORE_WEIGHTS["skills"] +
+            experience_score * self.SCORE_WEIGHTS["experience"] +
+            requirements_score * self.SCORE_WEIGHTS["requirements"]
+        )
         return {
-            "score": score,
-            "skillsScore": score,
-            "experienceScore": 0.5,  # Placeholder
-            "requirementsScore": 0.5  # Placeholder
+            "score": round(overall_score * 100) / 100,
+            "skillsScore": round(skills_score * 100) / 100,
+            "experienceScore": round(experience_score * 100) / 100,
+            "requirementsScore": round(requirements_score * 100) / 100
         }
-
-class SimpleSummarizationAgent:
-    """Simplified agent for summarizing text (for testing)"""
     
-    def summarize(self, content: str, type: str = "general"):
-        """Summarize text (simplified for testing)"""
-        # In a real implementation, this would use a transformer model
-        
-        # Just return first 100 chars + type for demo
-        prefix = "Summary: "
-        if type == "resume":
-            prefix = "Professional Summary: "
-        elif type == "job":
-            prefix = "Job Overview: "
-            
-        summary = content[:100] + "..." if len(content) > 100 else content
-        return prefix + summary
+    def _skills_score(self, resume_skills: List[str], job_skills: List[str]) -> float:
+        if not resume_skills or not job_skills:
+            return 0.0
+        resume_skills_lower = [skill.lower() for skill in resume_skills]
+        present = set(resume_skills_lower)
+        return sum(1.0 if skill.lower() in present else _skill_overlap(skill.lower(), resume_skills_lower)
+                   for skill in job_skills) / len(job_skills)
+
 
 class SimpleGapDetectionAgent:
-    """Simplified agent for detecting gaps (for testing)"""
+    """Agent for detecting gaps between resume and job requirements by keyword overlap (triage tier)"""
     
-    def detect(self, resume, job):
-        """Detect gaps (simplified for testing)"""
-        # In a real implementation, this would compare requirements and skills
-        
-        # Find missing skills
-        resume_skills = set([s.lower() for s in resume.get("skills", [])])
-        job_skills = set([s.lower() for s in job.get("skills", [])])
+    # Word overlap at or above which a job skill counts as present, and the share of a
+    # requirement's content words the resume must mention for it to count as met
+    SKILL_OVERLAP_THRESHOLD = 0.5
+    REQUIREMENT_COVERAGE_THRESHOLD = 0.3
+    
+    def detect(self, resume: Dict[str, Any], job: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Detect gaps between resume and job requirements
         
-        missing_skills = [s for s in job.get("skills", []) if s.lower() not in resume_skills]
+        Args:
+            resume: Parsed resume data (from either tier)
+            job: Parsed job description data (from either tier)
         
-        # Simple gap detection in requirements
-        missing_requirements = []
-        if "requirements" in job:
-            # Just take first requirement for demo
-            if len(job["requirements"]) > 0:
-                missing_requirements.append(job["requirements"][0])
+        Returns:
+            Dictionary with the same fields as GapDetectionAgent.detect
+        """
+        with stage("gap_detection", "triage"):
+            resume_skills_lower = [skill.lower() for skill in resume.get('skills', [])]
+            present = set(resume_skills_lower)
+            missing_skills = [
+                skill for skill in job.get('skills', [])
+                if skill.lower() not in present
+                and _skill_overlap(skill.lower(), resume_skills_lower) < self.SKILL_OVERLAP_THRESHOLD]
+            
+            profile_words = content_words(resume_profile_text(resume))
+            missing_requirements = [
+                requirement for requirement in job.get('requirements', [])
+                if coverage(requirement, profile_words) < self.REQUIREMENT_COVERAGE_THRESHOLD]
         
         return {
             "gaps": missing_skills + missing_requirements,
@@ -131,35 +318,132 @@ class SimpleGapDetectionAgent:
             "missingRequirements": missing_requirements
         }
 
-class SimpleSchedulerAgent:
-    """Simplified agent for scheduling (for testing)"""
+
+class SimpleSummarizationAgent:
+    """Agent for summarizing text by picking its most representative sentences (triage tier)"""
     
-    def get_slots(self, existing_slots=None, preferences=None):
-        """Get available slots (simplified for testing)"""
-        # In a real implementation, this would calculate actual available times
+    MAX_WORDS = 3000
+    SUMMARY_SENTENCES = 4
+    MIN_SENTENCE_WORDS = 5
+    
+    def summarize(self, content: str, type: str = "general") -> str:
+        """
+        Summarize text content extractively
+        
+        Sentences are scored by the average corpus frequency of their content words and
+        the best are returned in their original order.
         
-        # Generate 5 slots for demo
-        slots = []
-        current_time = int(time.time())
+        Args:
+            content: Text content to summarize
+            type: Type of content ('resume', 'job', or 'general')
         
-        for i in range(5):
-            # Add slots for next 5 days at 10 AM
-            slot_time = current_time + (i + 1) * 86400  # Add days in seconds
-            slot_time_str = time.strftime("%Y-%m-%dT10:00:00-04:00", time.localtime(slot_time))
-            end_time_str = time.strftime("%Y-%m-%dT11:00:00-04:00", time.localtime(slot_time))
+        Returns:
+            Summarized text
+        """
+        with stage("summarization", "triage"):
+            clean_text = ' '.join(split_words(content)[:self.MAX_WORDS])
+            if len(split_words(content)) < 50:
+                return clean_text
             
-            slots.append({
-                "startTime": slot_time_str,
-                "endTime": end_time_str,
-                "duration": 60
-            })
+            # Lines and bullets are split before whitespace is collapsed; fragments such as
+            # date lines and headers aren't candidates
+            sentences = [' '.join(_LEADING_BULLET.sub('', sentence).split())
+                         for sentence in split_sentences(limit_text(content))]
+            sentences = [sentence for sentence in sentences if len(sentence.split()) >= self.MIN_SENTENCE_WORDS]
+            if not sentences:
+                return clean_text
+            frequencies = Counter(word for sentence in sentences for word in content_words(sentence))
+            
+            def score(sentence: str) -> float:
+                sentence_words = content_words(sentence)
+                return sum(frequencies[word] for word in sentence_words) / (len(sentence_words) or 1)
+            
+            best = sorted(range(len(sentences)), key=lambda index: score(sentences[index]), reverse=True)
+            summary = " ".join(sentences[index] if sentences[index][-1] in ".!?" else sentences[index] + "."
+                               for index in sorted(best[:self.SUMMARY_SENTENCES]))
+        
+        if type == "resume":
+            return "Professional Summary: " + summary
+        elif type == "job":
+            return "Job Overview: " + summary
+        return summary
+
+
+class SimpleSchedulerAgent:
+    """Agent for finding interview slots with the standard library only"""
+    
+    def __init__(self):
+        self.business_hours = {'start_hour': 9, 'end_hour': 17, 'days': [0, 1, 2, 3, 4]}
+        self.default_duration = 60  # minutes
+        self.default_timezone = 'America/New_York'
+        self.days_limit = 10
+    
+    def get_slots(self, existing_slots: Optional[List[Dict[str, Any]]] = None,
+                  preferences: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Get available interview slots (business-hour slots that don't overlap existing interviews)
+        
+        Args:
+            existing_slots: List of existing scheduled interviews
+            preferences: Scheduling preferences (optional), as for SchedulerAgent.get_slots
+        
+        Returns:
+            Dictionary with available slots
+        """
+        preferences = preferences or {}
+        hours = preferences.get('businessHours') or {}
+        start_hour = hours.get('startHour', self.business_hours['start_hour'])
+        end_hour = hours.get('endHour', self.business_hours['end_hour'])
+        days = hours.get('days', self.business_hours['days'])
+        duration = preferences.get('duration')
+        duration = duration if isinstance(duration, int) and duration > 0 else self.default_duration
+        num_slots = preferences.get('numSlots')
+        num_slots = num_slots if isinstance(num_slots, int) and num_slots > 0 else 10
+        try:
+            timezone_name = preferences.get('timezone') or self.default_timezone
+            timezone = ZoneInfo(timezone_name)
+        except (ZoneInfoNotFoundError, ValueError):
+            timezone_name, timezone = self.default_timezone, ZoneInfo(self.default_timezone)
+        
+        busy_slots = []
+        for slot in existing_slots or []:
+            try:
+                start = datetime.fromisoformat(slot['scheduledDate'].replace('Z', '+00:00'))
+            except (KeyError, TypeError, ValueError):
+                continue
+            if start.tzinfo is None:
+                start = start.replace(tzinfo=timezone)
+            busy_slots.append((start, start + timedelta(minutes=slot.get('duration', self.default_duration))))
+        
+        # Business days from tomorrow, in 30-minute steps
+        available_slots = []
+        day = datetime.now(timezone) + timedelta(days=1)
+        days_checked = 0
+        while days_checked < self.days_limit and len(available_slots) < num_slots:
+            if day.weekday() in days:
+                days_checked += 1
+                slot = day.replace(hour=start_hour, minute=0, second=0, microsecond=0)
+                end = day.replace(hour=end_hour, minute=0, second=0, microsecond=0)
+                while slot + timedelta(minutes=duration) <= end and len(available_slots) < num_slots:
+                    slot_end = slot + timedelta(minutes=duration)
+                    if not any(slot < busy_end and slot_end > busy_start for busy_start, busy_end in busy_slots):
+                        available_slots.append(slot)
+                    slot += timedelta(minutes=30)
+            day += timedelta(days=1)
         
         return {
-            "availableSlots": slots,
-            "timezone": "America/New_York"
+            "availableSlots": [
+                {
+                    "startTime": slot.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                    "endTime": (slot + timedelta(minutes=duration)).strftime("%Y-%m-%dT%H:%M:%S%z"),
+                    "duration": duration
+                }
+                for slot in available_slots
+            ],
+            "timezone": timezone_name
         }
 
-# Initialize simplified agents (for testing without dependencies)
+# Triage-tier agents, used per request with `tier: "triage"` (and with no models at all)
 resume_parser = SimpleResumeParserAgent()
 jd_parser = SimpleJDParserAgent()
 matching_agent = SimpleMatchingAgent()
@@ -0,0 +1,161 @@
+import argparse
+import json
+import os
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+import config
+
+VECTORS_FILE = "skill_vectors.npy"
+NEIGHBORS_FILE = "skill_neighbors.npy"
+NEIGHBOR_SCORES_FILE = "skill_neighbor_scores.npy"
+INDEX_FILE = "skills.json"
+
+
+def load_vocabulary(path: str) -> List[str]:
+    """Read one skill per line, skipping blanks and # comments"""
+    skills = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                skills.append(line)
+    return skills
+
+
+def build(backend, skills: List[str], out_dir: str, k: int = 10, batch_size: int = 256) -> Dict[str, Any]:
+    """
+    Embed the skill vocabulary once and precompute a top-k neighbor graph
+    
+    Args:
+        backend: Embedding backend used by the agents (its model id is recorded)
+        skills: Known skill names
+        out_dir: Directory for the table files
+        k: Neighbors kept per skill
+        batch_size: Encoding batch size
+    
+    Returns:
+        Summary of the built table
+    """
+    start = time.perf_counter()
+    
+    # Agents encode skills both as written and lowercased, so the table holds both forms
+    texts = list(dict.fromkeys(form for skill in skills for form in (skill, skill.lower())))
+    vectors = np.asarray(backend.encode(texts, batch_size=batch_size), dtype=np.float32)
+    
+    # Neighbor graph on cosine similarity, computed in blocks to bound memory
+    normalized = vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+    k = min(k, len(texts) - 1)
+    neighbors = np.zeros((len(texts), k), dtype=np.int32)
+    scores = np.zeros((len(texts), k), dtype=np.float32)
+    for block_start in range(0, len(texts), 1024):
+        block = normalized[block_start:block_start + 1024] @ normalized.T
+        rows = np.arange(block.shape[0])
+        block[rows, rows + block_start] = -np.inf  # a skill is not its own neighbor
+        top = np.argpartition(-block, k - 1, axis=1)[:, :k] if k > 0 else np.zeros((block.shape[0], 0), dtype=int)
+        top_scores = np.take_along_axis(block, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        neighbors[block_start:block_start + block.shape[0]] = np.take_along_axis(top, order, axis=1)
+        scores[block_start:block_start + block.shape[0]] = np.take_along_axis(top_scores, order, axis=1)
+    
+    os.makedirs(out_dir, exist_ok=True)
+    np.save(os.path.join(out_dir, VECTORS_FILE), vectors)
+    np.save(os.path.join(out_dir, NEIGHBORS_FILE), neighbors)
+    np.save(os.path.join(out_dir, NEIGHBOR_SCORES_FILE), scores)
+    summary = {"modelId": backend.model_id, "dim": int(vectors.shape[1]), "k": k, "texts": texts}
+    with open(os.path.join(out_dir, INDEX_FILE), "w", encoding="utf-8") as f:
+        json.dump(summary, f)
+    
+    return {"modelId": backend.model_id, "skills": len(skills), "entries": len(texts), "k": k,
+            "seconds": time.perf_counter() - start}
+
+
+class SkillTaxonomy:
+    """Memory-mapped skill embedding table with a precomputed neighbor graph"""
+    
+    def __init__(self, directory: str):
+        with open(os.path.join(directory, INDEX_FILE), encoding="utf-8") as f:
+            index = json.load(f)
+        self.model_id = index["modelId"]
+        self.texts = index["texts"]
+        self.rows = {text: i for i, text in enumerate(self.texts)}
+        
+        # Memory-mapped so several worker processes share the pages
+        self.vectors = np.load(os.path.join(directory, VECTORS_FILE), mmap_mode="r")
+        self.neighbor_index = np.load(os.path.join(directory, NEIGHBORS_FILE), mmap_mode="r")
+        self.neighbor_scores = np.load(os.path.join(directory, NEIGHBOR_SCORES_FILE), mmap_mode="r")
+    
+    @classmethod
+    def load(cls, directory: str, model_id: str) -> Optional["SkillTaxonomy"]:
+        """Load the table if it exists and was built with the running model"""
+        if not os.path.exists(os.path.join(directory, INDEX_FILE)):
+            return None
+        try:
+            taxonomy = cls(directory)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Ignoring skill taxonomy in {directory}: {e}")
+            return None
+        if taxonomy.model_id != model_id:
+            print(f"Ignoring skill taxonomy built for {taxonomy.model_id} (running {model_id}); rebuild it")
+            return None
+        return taxonomy
+    
+    def __contains__(self, text: str) -> bool:
+        return text in self.rows
+    
+    def get(self, text: str) -> Optional[np.ndarray]:
+        """Vector of a known skill, or None for unseen text"""
+        row = self.rows.get(text)
+        if row is None:
+            return None
+        return np.asarray(self.vectors[row], dtype=np.float32)
+    
+    def neighbors(self, text: str, k: Optional[int] = None) -> List[Tuple[str, float]]:
+        """Nearest known skills with their cosine similarity"""
+        row = self.rows.get(text)
+        if row is None:
+            return []
+        limit = self.neighbor_index.shape[1] if k is None else k
+        return [(self.texts[i], float(score))
+                for i, score in zip(self.neighbor_index[row][:limit], self.neighbor_scores[row][:limit])]
+
+
+_taxonomy_cache: Dict[str, Optional[SkillTaxonomy]] = {}
+
+
+def get_taxonomy(model_id: str) -> Optional[SkillTaxonomy]:
+    """Shared table for the running model (None if not built)"""
+    if model_id not in _taxonomy_cache:
+        _taxonomy_cache[model_id] = SkillTaxonomy.load(config.SKILL_TAXONOMY_DIR, model_id)
+    return _taxonomy_cache[model_id]
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m agents.skill_taxonomy",
+                                     description="Build the precomputed skill embedding table")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="embed the vocabulary and build the neighbor graph")
+    build_parser.add_argument("--vocabulary", default=config.SKILL_VOCABULARY_PATH, help="skills file, one per line")
+    build_parser.add_argument("--out", default=config.SKILL_TAXONOMY_DIR, help="output directory")
+    build_parser.add_argument("--k", type=int, default=10, help="neighbors kept per skill")
+    neighbors_parser = subparsers.add_parser("neighbors", help="show the nearest skills of a skill")
+    neighbors_parser.add_argument("skill")
+    neighbors_parser.add_argument("--dir", default=config.SKILL_TAXONOMY_DIR)
+    args = parser.parse_args()
+    
+    if args.command == "build":
+        from agents.model_loader import load_sentence_model
+        
+        backend, _ = load_sentence_model()
+        summary = build(backend, load_vocabulary(args.vocabulary), args.out, args.k)
+        print(json.dumps(summary, indent=2))
+    else:
+        taxonomy = SkillTaxonomy(args.dir)
+        for text, score in taxonomy.neighbors(args.skill):
+            print(f"{score:.3f}  {text}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,19 @@
-from transformers import pipeline
 from typing import Dict, Any, List, Optional
+import config
+from agents.chunking import Chunk, chunk_text, window_tokens
+from agents.document import words as split_words
+from agents.model_loader import load_summarizer
+from utils.metrics import stage
 
 class SummarizationAgent:
     """Agent for summarizing text content"""
     
+    # Words of a text that are summarized; the rest is ignored
+    MAX_WORDS = 3000
+    
     def __init__(self):
-        # Load pre-trained summarization model (smaller model for efficiency)
-        try:
-            self.summarizer = pipeline("summarization", model="facebook/bart-large-cnn", max_length=150)
-        except:
-            # Fallback to an even smaller model if needed
-            self.summarizer = pipeline("summarization", model="sshleifer/distilbart-cnn-12-6", max_length=150)
+        # Load pre-trained summarization model (falls back to a smaller model)
+        self.summarizer, self.model_name = load_summarizer()
     
     def summarize(self, text: str, type: str = "general") -> str:
         """
@@ -19,7 +22,7 @@ class SummarizationAgent:
         Args:
             text: Text content to summarize
             type: Type of content ('resume', 'job', or 'general')
-            
+        
         Returns:
             Summarized text
         """
@@ -27,29 +30,33 @@ class SummarizationAgent:
         clean_text = self._clean_text(text)
         
         # If text is very short, just return it
-        if len(clean_text.split()) < 50:
+        if len(split_words(text)) < 50:
             return clean_text
         
-        # Split text into chunks if too long (most models have a 1024 token limit)
-        max_chunk_length = 1000  # conservative chunk size
-        chunks = self._split_into_chunks(clean_text, max_chunk_length)
-        
-        summaries = []
-        for chunk in chunks:
-            # Skip very short chunks
-            if len(chunk.split()) < 30:
-                continue
+        # Split text into chunks that fill the model's input window, at sentence and section
+        # boundaries, each repeating the end of the previous one for context
+        with self.summarizer.lease() as summarizer:
+            with stage("summarization", "chunk"):
+                chunks = self._chunks(text, summarizer)
+            
+            summaries = []
+            for chunk in chunks:
+                # Skip very short chunks
+                if len(chunk.text.split()) < 30:
+                    continue
                 
-            try:
-                # Generate summary for this chunk
-                summary = self.summarizer(chunk, max_length=150, min_length=30, do_sample=False)[0]['summary_text']
-                summaries.append(summary)
-            except Exception as e:
-                print(f"Error summarizing chunk: {e}")
-                # If summarization fails, use the first few sentences
-                sentences = chunk.split('.')
-                fallback_summary = '. '.join(sentences[:3]) + '.'
-                summaries.append(fallback_summary)
+                try:
+                    # Generate summary for this chunk
+                    with stage("summarization", "generate"):
+                        summary = summarizer(chunk.text, max_length=150, min_length=30, do_sample=False,
+                                             truncation=True)[0]['summary_text']
+                    summaries.append(summary)
+                except Exception as e:
+                    print(f"Error summarizing chunk: {e}")
+                    # If summarization fails, use the first few sentences
+                    sentences = chunk.text.split('.')
+                    fallback_summary = '. '.join(sentences[:3]) + '.'
+                    summaries.append(fallback_summary)
         
         # Combine summaries
         combined_summary = " ".join(summaries)
@@ -64,43 +71,22 @@ class SummarizationAgent:
     
     def _clean_text(self, text: str) -> str:
         """Clean text for summarization"""
-        # Remove excessive newlines and spaces
-        cleaned = ' '.join(text.split())
+        # Remove excessive newlines and spaces (the split is shared when text is a Document)
+        words = split_words(text)
         
         # Truncate if extremely long (for efficiency)
-        max_words = 3000
-        words = cleaned.split()
-        if len(words) > max_words:
-            cleaned = ' '.join(words[:max_words])
-        
-        return cleaned
+        return ' '.join(words[:self.MAX_WORDS])
     
-    def _split_into_chunks(self, text: str, max_length: int) -> List[str]:
-        """Split text into chunks of maximum length"""
-        words = text.split()
-        chunks = []
-        
-        current_chunk = []
-        current_length = 0
-        
-        for word in words:
-            current_length += len(word) + 1  # +1 for the space
-            
-            if current_length <= max_length:
-                current_chunk.append(word)
-            else:
-                # Add current chunk to chunks
-                chunks.append(' '.join(current_chunk))
-                
-                # Start new chunk
-                current_chunk = [word]
-                current_length = len(word) + 1
+    def _chunks(self, text: str, summarizer) -> List[Chunk]:
+        """Chunks of text for generation, sized with the model's own tokenizer"""
+        tokenizer = summarizer.tokenizer
+        budget = window_tokens(tokenizer, getattr(getattr(summarizer, "model", None), "config", None),
+                               config.SUMMARIZATION_CHUNK_TOKENS)
         
-        # Add the last chunk
-        if current_chunk:
-            chunks.append(' '.join(current_chunk))
+        def count_tokens(texts: List[str]) -> List[int]:
+            return [len(ids) for ids in tokenizer(texts, add_special_tokens=False)["input_ids"]]
         
-        return chunks
+        return chunk_text(text, count_tokens, budget, config.SUMMARIZATION_CHUNK_OVERLAP_TOKENS, self.MAX_WORDS)
     
     def _format_resume_summary(self, summary: str) -> str:
         """Format summary for a resume"""
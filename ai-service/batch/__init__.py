@@ -0,0 +1,2 @@
+# Offline batch processing for migrations and re-scoring.
+# Run with `python -m batch --help` from the ai-service directory.
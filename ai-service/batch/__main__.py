@@ -0,0 +1,32 @@
+import argparse
+import json
+import os
+
+from batch.pipeline import BatchRun
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m batch",
+                                     description="Parse, embed and score directories or JSONL files of resumes and jobs")
+    parser.add_argument("inputs", nargs="+", help="directories of text files and/or JSONL files "
+                                                  "({\"id\", \"kind\", \"content\"} per line)")
+    parser.add_argument("--out", required=True, help="output directory (also holds the checkpoint)")
+    parser.add_argument("--kind", choices=["resume", "job"], default="resume",
+                        help="kind of documents that don't say (files outside resumes/ or jobs/ directories)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument("--threads", type=int, default=1, help="torch/BLAS threads per worker")
+    parser.add_argument("--chunk-size", type=int, default=32, help="documents per task (and per encoding batch)")
+    parser.add_argument("--no-embed", action="store_true", help="skip the document embedding matrices")
+    parser.add_argument("--score", action="store_true", help="match every resume against every job")
+    parser.add_argument("--restart", action="store_true", help="discard an earlier run in --out instead of resuming it")
+    parser.add_argument("--progress-interval", type=float, default=2.0, help="seconds between throughput lines")
+    args = parser.parse_args()
+    
+    run = BatchRun(args.inputs, args.out, kind=args.kind, workers=args.workers, threads=args.threads,
+                   chunk_size=args.chunk_size, embed=not args.no_embed, score=args.score, restart=args.restart,
+                   progress_interval=args.progress_interval)
+    print(json.dumps(run.run(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
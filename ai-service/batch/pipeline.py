@@ -0,0 +1,473 @@
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Any, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from agents import agent_tier, create_agent
+from agents.embeddings import (embed_fields, job_embedding_fields, job_profile_text, resume_embedding_fields,
+                               resume_profile_text)
+from agents.pools import limit_threads
+from utils import serialization
+
+KINDS = ("resume", "job")
+TEXT_SUFFIXES = (".txt", ".md", ".text")
+
+MANIFEST_FILE = "manifest.json"
+CHECKPOINT_FILE = "checkpoint.json"
+SUMMARY_FILE = "summary.json"
+RECORDS_FILE = "records.jsonl"
+SCORES_FILE = "scores.jsonl"
+EMBEDDING_FILES = {"resume": "resume_embeddings.npy", "job": "job_embeddings.npy"}
+
+
+class Source(NamedTuple):
+    """One input document: where to read it, and its row in its kind's embedding matrix"""
+    id: str
+    kind: str
+    row: int
+    path: str
+    # Byte offset of the line in a JSONL input; None for a whole text file
+    offset: Optional[int]
+
+
+def _kind_of(directory: str, default: str) -> str:
+    # Files under a resumes/ or jobs/ directory take their kind from it
+    for part in directory.lower().split(os.sep):
+        if part in ("resume", "resumes"):
+            return "resume"
+        if part in ("job", "jobs"):
+            return "job"
+    return default
+
+
+def discover(inputs: Iterable[str], default_kind: str = "resume") -> List[Source]:
+    """
+    List the documents of the inputs in a stable order
+    
+    Args:
+        inputs: Directories (text files, searched recursively) and JSONL files with
+            {"id", "kind", "content"} per line ("id" and "kind" are optional)
+        default_kind: Kind of documents that don't say ("resume" or "job")
+    
+    Returns:
+        Sources numbered per kind, so each has a fixed row in its embedding matrix
+    """
+    rows = {kind: 0 for kind in KINDS}
+    sources = []
+    
+    def add(source_id: str, kind: str, path: str, offset: Optional[int]) -> None:
+        if kind not in KINDS:
+            raise SystemExit(f"{path}: unknown kind '{kind}' for {source_id} (expected resume or job)")
+        sources.append(Source(source_id, kind, rows[kind], path, offset))
+        rows[kind] += 1
+    
+    for path in inputs:
+        if os.path.isdir(path):
+            for root, dirs, names in os.walk(path):
+                dirs.sort()
+                for name in sorted(names):
+                    if name.lower().endswith(TEXT_SUFFIXES):
+                        relative = os.path.relpath(os.path.join(root, name), path)
+                        add(relative, _kind_of(os.path.dirname(relative), default_kind), os.path.join(root, name), None)
+        else:
+            with open(path, "rb") as f:
+                offset = 0
+                for number, line in enumerate(f, 1):
+                    if line.strip():
+                        item = json.loads(line)
+                        add(str(item.get("id", f"{os.path.basename(path)}:{number}")), item.get("kind", default_kind),
+                            path, offset)
+                    offset += len(line)
+    return sources
+
+
+def _read(source: Source) -> str:
+    if source.offset is None:
+        with open(source.path, encoding="utf-8", errors="replace") as f:
+            return f.read()
+    with open(source.path, "rb") as f:
+        f.seek(source.offset)
+        return json.loads(f.readline())["content"]
+
+
+def _chunks(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _probe_agents(names: Tuple[str, ...], sentence_model: bool) -> Tuple[Dict[str, Dict[str, str]], Optional[str]]:
+    """Class and tier of the agents a worker constructs, and why the sentence model can't load (None if it can)"""
+    agents = {}
+    for name in names:
+        agent = create_agent(name)
+        agents[name] = {"class": type(agent).__name__, "tier": agent_tier(agent)}
+    if sentence_model:
+        from agents.model_loader import ModelUnavailableError, load_sentence_model
+        try:
+            load_sentence_model()
+        except (ImportError, ModelUnavailableError) as e:
+            return agents, str(e)
+    return agents, None
+
+
+# Worker processes: agents and models loaded once by the initializer
+_worker: Dict[str, Any] = {}
+
+
+def _init_parse_worker(threads: int, embed: bool, payloads: bool) -> None:
+    limit_threads(threads)
+    _worker["parsers"] = {"resume": create_agent("resume_parser"), "job": create_agent("jd_parser")}
+    _worker["embed"] = embed
+    _worker["payloads"] = payloads
+    _worker["backend"] = None
+    _worker["error"] = None
+    if embed or payloads:
+        from agents.model_loader import ModelUnavailableError, load_sentence_model
+        try:
+            _worker["backend"], _ = load_sentence_model()
+        except (ImportError, ModelUnavailableError) as e:
+            # Scoring falls back to the simplified matcher, which needs no vectors; document
+            # embeddings are reported by the first chunk instead of breaking the pool
+            _worker["payloads"] = False
+            if embed:
+                _worker["error"] = f"The sentence model is unavailable ({e}); rerun with --no-embed"
+
+
+def _parse_chunk(sources: List[Source]) -> Tuple[List[Dict[str, Any]], Optional[np.ndarray]]:
+    """Parse a chunk of documents; document vectors are encoded in one batch"""
+    if _worker["error"]:
+        raise RuntimeError(_worker["error"])
+    parsers, backend = _worker["parsers"], _worker["backend"]
+    records = []
+    profiles = []
+    for source in sources:
+        record = {"id": source.id, "kind": source.kind, "row": source.row}
+        try:
+            parsed = parsers[source.kind].parse(_read(source))
+            record["parsed"] = parsed
+            if _worker["payloads"]:
+                # Shipped with the record, like includeEmbeddings, so scoring doesn't encode again
+                fields = resume_embedding_fields(parsed) if source.kind == "resume" else job_embedding_fields(parsed)
+                record["embeddings"] = embed_fields(backend, fields)
+            if _worker["embed"]:
+                profiles.append(resume_profile_text(parsed) if source.kind == "resume" else job_profile_text(parsed))
+                record["embedded"] = True
+        except Exception as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+        records.append(record)
+    
+    if not profiles:
+        return records, None
+    # Unit length, so a dot product between rows is their cosine similarity
+    vectors = np.asarray(backend.encode(profiles), dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return records, vectors / np.maximum(norms, 1e-12)
+
+
+def _init_score_worker(threads: int, records_path: str) -> None:
+    limit_threads(threads)
+    _worker["matching"] = create_agent("matching")
+    _worker["jobs"] = [record for record in _iter_records(records_path)
+                       if record["kind"] == "job" and "parsed" in record]
+
+
+def _score_chunk(resumes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Match a chunk of resumes against every job"""
+    matching = _worker["matching"]
+    scores = []
+    for resume in resumes:
+        parsed_resume = dict(resume["parsed"], embeddings=resume.get("embeddings"))
+        for job in _worker["jobs"]:
+            result = matching.match(parsed_resume, dict(job["parsed"], embeddings=job.get("embeddings")))
+            scores.append(dict(resumeId=resume["id"], jobId=job["id"], **result))
+    return scores
+
+
+def _iter_records(path: str) -> Iterator[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return
+    with open(path, "rb") as f:
+        for line in f:
+            yield json.loads(line)
+
+
+class Progress:
+    """Counts work done in one stage and prints throughput every interval seconds"""
+    
+    def __init__(self, stage: str, total: int, done: int, unit: str, interval: float):
+        self.stage = stage
+        self.total = total
+        self.done = done
+        self.unit = unit
+        self.interval = interval
+        self.processed = 0
+        self.errors = 0
+        self.start = time.perf_counter()
+        self._printed = self.start
+    
+    def advance(self, count: int, errors: int = 0) -> None:
+        self.done += count
+        self.processed += count
+        self.errors += errors
+        now = time.perf_counter()
+        if now - self._printed >= self.interval:
+            self._printed = now
+            self.print()
+    
+    @property
+    def rate(self) -> float:
+        elapsed = time.perf_counter() - self.start
+        return self.processed / elapsed if elapsed > 0 else 0.0
+    
+    def print(self) -> None:
+        percent = 100.0 * self.done / self.total if self.total else 100.0
+        eta = (self.total - self.done) / self.rate if self.rate else float("inf")
+        print(f"[{self.stage}] {self.done}/{self.total} {self.unit} ({percent:.1f}%)  {self.rate:.1f} {self.unit}/s  "
+              f"ETA {eta:.0f}s  errors {self.errors}", flush=True)
+    
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "total": self.total,
+            "processed": self.processed,
+            "skipped": self.done - self.processed,
+            "errors": self.errors,
+            "seconds": round(time.perf_counter() - self.start, 3),
+            "perSecond": round(self.rate, 2),
+            "unit": self.unit
+        }
+
+
+class BatchRun:
+    """
+    Parse (and optionally embed and score) a set of documents into out_dir
+    
+    Documents are processed in chunks by a pool of worker processes. Outputs are
+    appended as chunks finish, and a checkpoint records the finished chunks and the
+    output sizes they account for; a restarted run truncates the outputs to the
+    checkpoint and only processes the remaining chunks.
+    
+    Outputs:
+        records.jsonl: one {"id", "kind", "row", "parsed" | "error"} line per document
+        resume_embeddings.npy, job_embeddings.npy: unit-length document vectors (float32,
+            row = the record's "row"), written through memory maps
+        scores.jsonl: one match result per resume and job (with score=True)
+    """
+    
+    def __init__(self, inputs: List[str], out_dir: str, kind: str = "resume", workers: int = 1, threads: int = 1,
+                 chunk_size: int = 32, embed: bool = True, score: bool = False, restart: bool = False,
+                 progress_interval: float = 2.0):
+        self.out_dir = out_dir
+        self.workers = workers
+        self.threads = threads
+        self.chunk_size = chunk_size
+        self.embed = embed
+        self.score = score
+        self.progress_interval = progress_interval
+        self.sources = discover(inputs, kind)
+        self.counts = {kind: sum(1 for source in self.sources if source.kind == kind) for kind in KINDS}
+        self.manifest = {
+            "inputs": [os.path.abspath(path) for path in inputs],
+            "defaultKind": kind,
+            "counts": self.counts,
+            "chunkSize": chunk_size,
+            "embed": embed,
+            "score": score
+        }
+        self._previous_agents: Optional[Dict[str, Dict[str, str]]] = None
+        self.checkpoint = {"dim": None, "parse": {"chunks": [], "bytes": 0}, "score": {"chunks": [], "bytes": 0}}
+        self._matrices: Dict[str, np.memmap] = {}
+        self._saved = 0.0
+        
+        os.makedirs(out_dir, exist_ok=True)
+        if restart:
+            self._clear()
+        self._load_checkpoint()
+    
+    def _path(self, name: str) -> str:
+        return os.path.join(self.out_dir, name)
+    
+    def _clear(self) -> None:
+        for name in [MANIFEST_FILE, CHECKPOINT_FILE, SUMMARY_FILE, RECORDS_FILE, SCORES_FILE, *EMBEDDING_FILES.values()]:
+            if os.path.exists(self._path(name)):
+                os.remove(self._path(name))
+    
+    def _load_checkpoint(self) -> None:
+        if os.path.exists(self._path(MANIFEST_FILE)):
+            with open(self._path(MANIFEST_FILE)) as f:
+                previous = json.load(f)
+            # The agents are recorded by run(), once they have been loaded
+            self._previous_agents = previous.pop("agents", None)
+            if previous != self.manifest:
+                raise SystemExit(f"{self.out_dir} holds a run with different inputs or options; "
+                                 f"use --restart to discard it or choose another --out")
+        else:
+            self._write_json(MANIFEST_FILE, self.manifest)
+        
+        if os.path.exists(self._path(CHECKPOINT_FILE)):
+            with open(self._path(CHECKPOINT_FILE)) as f:
+                self.checkpoint = json.load(f)
+        # Output written after the last checkpoint belongs to chunks that will run again
+        for stage, name in (("parse", RECORDS_FILE), ("score", SCORES_FILE)):
+            with open(self._path(name), "ab") as f:
+                f.truncate(self.checkpoint[stage]["bytes"])
+    
+    def _write_json(self, name: str, content: Dict[str, Any]) -> None:
+        # Written aside and renamed, so a crash never leaves a half-written file
+        temporary = self._path(name + ".tmp")
+        with open(temporary, "w") as f:
+            json.dump(content, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, self._path(name))
+    
+    def _save_checkpoint(self, output, force: bool = False) -> None:
+        if not force and time.monotonic() - self._saved < 1.0:
+            return
+        output.flush()
+        os.fsync(output.fileno())
+        for matrix in self._matrices.values():
+            matrix.flush()
+        self._write_json(CHECKPOINT_FILE, self.checkpoint)
+        self._saved = time.monotonic()
+    
+    def _matrix(self, kind: str, dim: int) -> np.memmap:
+        if kind not in self._matrices:
+            path = self._path(EMBEDDING_FILES[kind])
+            if self.checkpoint["dim"] is not None and os.path.exists(path):
+                self._matrices[kind] = np.load(path, mmap_mode="r+")
+            else:
+                self._matrices[kind] = np.lib.format.open_memmap(path, mode="w+", dtype=np.float32,
+                                                                 shape=(self.counts[kind], dim))
+            self.checkpoint["dim"] = dim
+        return self._matrices[kind]
+    
+    def _check_agents(self) -> Dict[str, Dict[str, str]]:
+        """
+        Load the workers' agents once, in a separate process, before any pool starts
+        
+        A missing sentence model stops the run here rather than in every worker, and
+        simplified agents standing in for missing models are reported and recorded.
+        """
+        names = ("resume_parser", "jd_parser") + (("matching",) if self.score else ())
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            try:
+                agents, sentence_error = executor.submit(_probe_agents, names, self.embed).result()
+            except Exception as e:
+                raise SystemExit(f"Could not load the agents: {type(e).__name__}: {e}")
+        if sentence_error is not None:
+            raise SystemExit(f"The sentence model is unavailable ({sentence_error}); rerun with --no-embed")
+        if self._previous_agents is not None and self._previous_agents != agents:
+            raise SystemExit(f"{self.out_dir} holds a run made with other agents ({self._previous_agents}); "
+                             f"use --restart to discard it or choose another --out")
+        fallback = [name for name, agent in agents.items() if agent["tier"] == "triage"]
+        if fallback:
+            print(f"Simplified agents stand in for {', '.join(fallback)} (models unavailable)", flush=True)
+        self.manifest["agents"] = agents
+        self._write_json(MANIFEST_FILE, self.manifest)
+        return agents
+    
+    def _run_stage(self, chunks: Iterable[Tuple[int, List[Any]]], initializer, initargs: tuple,
+                   function, handle) -> None:
+        """Run chunks through a worker pool, keeping a bounded number in flight"""
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=context, initializer=initializer,
+                                 initargs=initargs) as executor:
+            pending = iter(chunks)
+            in_flight = {}
+            
+            def submit_next() -> None:
+                for index, chunk in pending:
+                    in_flight[executor.submit(function, chunk)] = index
+                    return
+            
+            for _ in range(2 * self.workers):
+                submit_next()
+            while in_flight:
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    index = in_flight.pop(future)
+                    handle(index, future.result())
+                    submit_next()
+    
+    def _parse(self) -> Dict[str, Any]:
+        done = set(self.checkpoint["parse"]["chunks"])
+        chunks = [(index, chunk) for index, chunk in enumerate(_chunks(self.sources, self.chunk_size))
+                  if index not in done]
+        progress = Progress("parse", len(self.sources), len(self.sources) - sum(len(chunk) for _, chunk in chunks),
+                            "documents", self.progress_interval)
+        if not chunks:
+            return progress.summary()
+        
+        with open(self._path(RECORDS_FILE), "ab") as output:
+            def handle(index: int, result: Tuple[List[Dict[str, Any]], Optional[np.ndarray]]) -> None:
+                records, vectors = result
+                if vectors is not None:
+                    embedded = [record for record in records if record.pop("embedded", False)]
+                    for record, vector in zip(embedded, vectors):
+                        self._matrix(record["kind"], vectors.shape[1])[record["row"]] = vector
+                output.write(b"".join(serialization.encode(record, serialization.JSON) + b"\n" for record in records))
+                self.checkpoint["parse"]["chunks"].append(index)
+                self.checkpoint["parse"]["bytes"] = output.tell()
+                progress.advance(len(records), sum(1 for record in records if "error" in record))
+                self._save_checkpoint(output)
+            
+            self._run_stage(chunks, _init_parse_worker, (self.threads, self.embed, self.score),
+                            _parse_chunk, handle)
+            self._save_checkpoint(output, force=True)
+        progress.print()
+        return progress.summary()
+    
+    def _score(self) -> Dict[str, Any]:
+        parsed = {kind: 0 for kind in KINDS}
+        for record in _iter_records(self._path(RECORDS_FILE)):
+            if "parsed" in record:
+                parsed[record["kind"]] += 1
+        resumes, jobs = parsed["resume"], parsed["job"]
+        done = set(self.checkpoint["score"]["chunks"])
+        done_resumes = sum(min(self.chunk_size, resumes - index * self.chunk_size) for index in done)
+        progress = Progress("score", resumes * jobs, done_resumes * jobs, "pairs", self.progress_interval)
+        if done_resumes == resumes or not jobs:
+            return progress.summary()
+        
+        # records.jsonl is complete before scoring starts, so chunk numbers are stable across
+        # restarts; resumes are streamed from it rather than held in memory
+        resume_records = (record for record in _iter_records(self._path(RECORDS_FILE))
+                          if record["kind"] == "resume" and "parsed" in record)
+        chunks = ((index, chunk) for index, chunk in enumerate(_chunks(resume_records, self.chunk_size))
+                  if index not in done)
+        
+        with open(self._path(SCORES_FILE), "ab") as output:
+            def handle(index: int, scores: List[Dict[str, Any]]) -> None:
+                output.write(b"".join(serialization.encode(score, serialization.JSON) + b"\n" for score in scores))
+                self.checkpoint["score"]["chunks"].append(index)
+                self.checkpoint["score"]["bytes"] = output.tell()
+                progress.advance(len(scores))
+                self._save_checkpoint(output)
+            
+            self._run_stage(chunks, _init_score_worker, (self.threads, self._path(RECORDS_FILE)),
+                            _score_chunk, handle)
+            self._save_checkpoint(output, force=True)
+        progress.print()
+        return progress.summary()
+    
+    def run(self) -> Dict[str, Any]:
+        """Run the remaining work and return a summary of each stage"""
+        print(f"Batch: {self.counts['resume']} resumes, {self.counts['job']} jobs -> {self.out_dir} "
+              f"({self.workers} workers x {self.threads} threads)", flush=True)
+        agents = self._check_agents()
+        summary = {"counts": self.counts, "agents": agents, "parse": self._parse()}
+        if self.score:
+            summary["score"] = self._score()
+        self._write_json(SUMMARY_FILE, summary)
+        return summary
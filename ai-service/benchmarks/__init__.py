@@ -0,0 +1,2 @@
+# Benchmarks for the AI agents.
+# Run with `python -m benchmarks --help` from the ai-service directory.
@@ -0,0 +1,35 @@
+import argparse
+import os
+
+# Never download models from a benchmark run. Set before the benchmark modules import
+# config, which reads AI_SERVICE_OFFLINE once at import.
+os.environ.setdefault("AI_SERVICE_OFFLINE", "1")
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+
+from benchmarks import agent_methods, extraction, load, summarization, transport
+
+# Each benchmark module exposes add_arguments(parser) and run(args)
+BENCHMARKS = {
+    "agents": (agent_methods, "Latency and throughput of every agent method"),
+    "extraction": (extraction, "Single-scan resume entity extraction versus per-field regex passes"),
+    "load": (load, "Throughput, latency and saturation of the service under a realistic traffic mix"),
+    "summarization": (summarization, "Generate calls and latency of token-aware summarization chunks versus 1000-character chunks"),
+    "transport": (transport, "Per-request overhead of HTTP over TCP/UDS versus the binary RPC socket"),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="AI service benchmarks")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+    
+    for name, (module, help_text) in BENCHMARKS.items():
+        module.add_arguments(subparsers.add_parser(name, help=help_text))
+    
+    args = parser.parse_args()
+    module, _ = BENCHMARKS[args.benchmark]
+    module.run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import json
+import platform
+import time
+from typing import Dict, Any
+
+from benchmarks.corpus import generate_corpus
+from benchmarks.timing import measure
+
+METHODS = ["parse", "parse_job", "match", "detect", "summarize", "get_slots"]
+
+
+def load_agents(mode: str) -> Dict[str, Any]:
+    """
+    Construct the agents for a benchmark mode
+    
+    'stub' uses the simplified agents and needs no model weights. 'real' uses
+    the full agents and only reads weights that are already cached locally.
+    """
+    if mode == "stub":
+        from agents.simple_agents import (
+            SimpleResumeParserAgent, SimpleJDParserAgent, SimpleMatchingAgent,
+            SimpleSummarizationAgent, SimpleGapDetectionAgent, SimpleSchedulerAgent
+        )
+        return {
+            "resume_parser": SimpleResumeParserAgent(),
+            "jd_parser": SimpleJDParserAgent(),
+            "matching": SimpleMatchingAgent(),
+            "summarization": SimpleSummarizationAgent(),
+            "gap_detection": SimpleGapDetectionAgent(),
+            "scheduler": SimpleSchedulerAgent(),
+        }
+    
+    from agents.resume_parser import ResumeParserAgent
+    from agents.jd_parser import JDParserAgent
+    from agents.matching import MatchingAgent
+    from agents.summarization import SummarizationAgent
+    from agents.gap_detection import GapDetectionAgent
+    from agents.scheduler import SchedulerAgent
+    
+    agents = {}
+    load_times = {}
+    for key, cls in [("resume_parser", ResumeParserAgent), ("jd_parser", JDParserAgent),
+                     ("matching", MatchingAgent), ("summarization", SummarizationAgent),
+                     ("gap_detection", GapDetectionAgent), ("scheduler", SchedulerAgent)]:
+        start = time.perf_counter()
+        try:
+            agents[key] = cls()
+        except Exception as e:
+            raise SystemExit(f"Could not load {cls.__name__} from local weights ({e}). "
+                             f"Cache the models first or use --mode stub.")
+        load_times[key] = time.perf_counter() - start
+    
+    agents["_load_times"] = load_times
+    return agents
+
+
+def run_size(agents: Dict[str, Any], size: str, args) -> Dict[str, Any]:
+    """Benchmark every selected method on one corpus size"""
+    corpus = generate_corpus(size, count=args.corpus, seed=args.seed)
+    
+    # Parsed inputs for match/detect come from the parsers under test (untimed)
+    parsed_resumes = [agents["resume_parser"].parse(text) for text in corpus["resumes"]]
+    parsed_jobs = [agents["jd_parser"].parse(text) for text in corpus["jobs"]]
+    pairs = list(zip(parsed_resumes, parsed_jobs))
+    
+    calls = {
+        "parse": (agents["resume_parser"].parse, corpus["resumes"]),
+        "parse_job": (agents["jd_parser"].parse, corpus["jobs"]),
+        "match": (lambda pair: agents["matching"].match(*pair), pairs),
+        "detect": (lambda pair: agents["gap_detection"].detect(*pair), pairs),
+        "summarize": (lambda text: agents["summarization"].summarize(text, "resume"), corpus["resumes"]),
+        "get_slots": (lambda calendar: agents["scheduler"].get_slots(calendar, None), corpus["calendars"]),
+    }
+    
+    results = {}
+    for method in args.methods:
+        fn, inputs = calls[method]
+        results[method] = measure(fn, inputs, args.iterations, args.warmup)
+        stats = results[method]
+        print(f"  {size:>6} {method:<10} p50={stats['p50Ms']:9.3f}ms p99={stats['p99Ms']:9.3f}ms "
+              f"throughput={stats['throughputPerSec']:10.1f}/s")
+    
+    return {
+        "inputChars": {
+            "resume": sum(len(t) for t in corpus["resumes"]) // len(corpus["resumes"]),
+            "job": sum(len(t) for t in corpus["jobs"]) // len(corpus["jobs"]),
+        },
+        "methods": results
+    }
+
+
+def add_arguments(parser):
+    """Register command-line options for the agent benchmark"""
+    parser.add_argument("--mode", choices=["stub", "real"], default="stub",
+                        help="stub: simplified agents, no weights; real: full agents with locally cached weights")
+    parser.add_argument("--sizes", default="small,medium,large",
+                        help="comma-separated corpus sizes (small, medium, large or an integer scale)")
+    parser.add_argument("--methods", default=",".join(METHODS),
+                        help=f"comma-separated methods to time ({', '.join(METHODS)})")
+    parser.add_argument("--iterations", type=int, default=50, help="timed calls per method and size")
+    parser.add_argument("--warmup", type=int, default=3, help="untimed calls before timing")
+    parser.add_argument("--corpus", type=int, default=20, help="distinct documents generated per size")
+    parser.add_argument("--seed", type=int, default=42, help="corpus random seed")
+    parser.add_argument("--output", default="benchmark_results.json", help="where to write the JSON results")
+
+
+def run(args) -> Dict[str, Any]:
+    """Run the agent benchmark and write machine-readable results"""
+    args.methods = [m.strip() for m in args.methods.split(",") if m.strip()]
+    unknown = [m for m in args.methods if m not in METHODS]
+    if unknown:
+        raise SystemExit(f"Unknown methods: {', '.join(unknown)}")
+    
+    agents = load_agents(args.mode)
+    load_times = agents.pop("_load_times", {})
+    
+    report = {
+        "benchmark": "agents",
+        "mode": args.mode,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "iterations": args.iterations,
+        "seed": args.seed,
+        "modelLoadSeconds": load_times,
+        "sizes": {}
+    }
+    
+    print(f"Benchmarking agents in {args.mode} mode")
+    for size in [s.strip() for s in args.sizes.split(",") if s.strip()]:
+        report["sizes"][size] = run_size(agents, size, args)
+    
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+    
+    return report
@@ -0,0 +1,152 @@
+import random
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional
+
+# Vocabulary used to build synthetic documents
+FIRST_NAMES = ["Alice", "Bob", "Carmen", "Deepak", "Elena", "Farid", "Grace", "Hiro", "Ines", "Jamal"]
+LAST_NAMES = ["Anderson", "Bose", "Chen", "Dubois", "Evans", "Fischer", "Garcia", "Haddad", "Ivanova", "Johnson"]
+SKILLS = [
+    "Python", "Java", "JavaScript", "TypeScript", "Go", "React", "Angular", "Node.js", "Django", "Flask",
+    "SQL", "MongoDB", "PostgreSQL", "AWS", "Azure", "Docker", "Kubernetes", "Machine Learning", "NLP",
+    "TensorFlow", "PyTorch", "Git", "GraphQL", "Microservices", "CI/CD", "Communication", "Leadership"
+]
+TITLES = ["Software Engineer", "Data Scientist", "Backend Developer", "Frontend Developer",
+          "DevOps Engineer", "Machine Learning Engineer", "Engineering Manager"]
+COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella Labs", "Stark Industries", "Wayne Enterprises"]
+FIELDS = ["Computer Science", "Electrical Engineering", "Mathematics", "Statistics", "Physics"]
+UNIVERSITIES = ["University of Toronto", "University of Michigan", "Institute of Technology", "College of Engineering"]
+VERBS = ["Designed", "Built", "Led", "Optimized", "Migrated", "Maintained", "Automated", "Scaled"]
+OBJECTS = ["a payment platform", "internal dashboards", "data pipelines", "REST APIs", "a recommendation engine",
+           "the CI/CD workflow", "customer-facing web applications", "a search service"]
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+# Named corpus sizes: number of experience entries, bullets per entry and skills
+SIZES = {
+    "small": {"experience": 2, "bullets": 2, "skills": 5, "requirements": 4, "calendar": 10},
+    "medium": {"experience": 5, "bullets": 4, "skills": 12, "requirements": 8, "calendar": 50},
+    "large": {"experience": 15, "bullets": 8, "skills": 25, "requirements": 16, "calendar": 200},
+}
+
+
+def resolve_size(size: str) -> Dict[str, int]:
+    """Return the size parameters for a named size or an integer scale factor"""
+    if size in SIZES:
+        return SIZES[size]
+    
+    # Numeric sizes scale the small profile linearly
+    scale = max(int(size), 1)
+    return {key: value * scale for key, value in SIZES["small"].items()}
+
+
+def _sentence(rng: random.Random) -> str:
+    """Generate one accomplishment sentence"""
+    return f"{rng.choice(VERBS)} {rng.choice(OBJECTS)} using {rng.choice(SKILLS)} and {rng.choice(SKILLS)}."
+
+
+def generate_resume(rng: random.Random, size: str = "medium") -> str:
+    """
+    Generate a synthetic plain-text resume
+    
+    Args:
+        rng: Random generator (seeded for reproducible corpora)
+        size: Named size ('small', 'medium', 'large') or an integer scale
+        
+    Returns:
+        Resume text laid out like the documents the parsers expect
+    """
+    params = resolve_size(size)
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    
+    lines = [
+        name,
+        f"{name.split()[0].lower()}.{name.split()[1].lower()}@example.com | (555) {rng.randint(100, 999)}-{rng.randint(1000, 9999)}",
+        "",
+        "SUMMARY:",
+        " ".join(_sentence(rng) for _ in range(3)),
+        "",
+        "SKILLS:",
+        ", ".join(rng.sample(SKILLS, min(params["skills"], len(SKILLS)))),
+        "",
+        "EXPERIENCE:",
+    ]
+    
+    year = 2024
+    for _ in range(params["experience"]):
+        start_year = year - rng.randint(1, 3)
+        lines.append(f"{rng.choice(MONTHS)} {start_year} - {rng.choice(MONTHS)} {year}")
+        lines.append(f"{rng.choice(TITLES)} | {rng.choice(COMPANIES)}")
+        lines.extend(f"• {_sentence(rng)}" for _ in range(params["bullets"]))
+        year = start_year
+    
+    lines.extend([
+        "",
+        "EDUCATION:",
+        f"Bachelor of Science in {rng.choice(FIELDS)}, {rng.choice(UNIVERSITIES)}, {year - 4}",
+        f"Master of Science in {rng.choice(FIELDS)}, {rng.choice(UNIVERSITIES)}, {year - 2}",
+    ])
+    
+    return "\n".join(lines)
+
+
+def generate_job(rng: random.Random, size: str = "medium") -> str:
+    """
+    Generate a synthetic plain-text job description
+    
+    Args:
+        rng: Random generator (seeded for reproducible corpora)
+        size: Named size ('small', 'medium', 'large') or an integer scale
+        
+    Returns:
+        Job description text laid out like the documents the parsers expect
+    """
+    params = resolve_size(size)
+    
+    lines = [
+        f"Job Title: {rng.choice(TITLES)}",
+        f"Company: {rng.choice(COMPANIES)}",
+        f"Location: {rng.choice(['Remote', 'New York', 'Berlin', 'Toronto'])}",
+        "Full-time",
+        "",
+        "RESPONSIBILITIES:",
+    ]
+    lines.extend(f"• {_sentence(rng)}" for _ in range(params["requirements"]))
+    lines.extend(["", "REQUIREMENTS:"])
+    for _ in range(params["requirements"]):
+        lines.append(f"• {rng.randint(2, 8)}+ years of experience with {rng.choice(SKILLS)} and {rng.choice(SKILLS)}")
+    
+    return "\n".join(lines)
+
+
+def generate_calendar(rng: random.Random, size: str = "medium",
+                      start: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """
+    Generate existing interview bookings in the format get_slots expects
+    
+    Args:
+        rng: Random generator (seeded for reproducible corpora)
+        size: Named size ('small', 'medium', 'large') or an integer scale
+        start: First day of the calendar (defaults to tomorrow)
+        
+    Returns:
+        List of existing slots with 'scheduledDate' and 'duration'
+    """
+    params = resolve_size(size)
+    start = start or (datetime.utcnow() + timedelta(days=1))
+    
+    slots = []
+    for _ in range(params["calendar"]):
+        day = start + timedelta(days=rng.randint(0, 13))
+        slot = day.replace(hour=rng.randint(9, 16), minute=rng.choice([0, 30]), second=0, microsecond=0)
+        slots.append({"scheduledDate": slot.strftime("%Y-%m-%dT%H:%M:%S") + "Z", "duration": rng.choice([30, 45, 60])})
+    
+    return slots
+
+
+def generate_corpus(size: str = "medium", count: int = 20, seed: int = 42) -> Dict[str, Any]:
+    """Generate resumes, job descriptions and calendars for a benchmark run"""
+    rng = random.Random(seed)
+    return {
+        "resumes": [generate_resume(rng, size) for _ in range(count)],
+        "jobs": [generate_job(rng, size) for _ in range(count)],
+        "calendars": [generate_calendar(rng, size) for _ in range(count)],
+    }
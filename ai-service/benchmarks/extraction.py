@@ -0,0 +1,183 @@
+import json
+import platform
+import random
+import re
+import time
+from typing import Dict, Any, List
+
+from nltk.tokenize import sent_tokenize
+
+from agents.extraction import RESUME_ENTITIES
+from agents.resume_parser import ResumeParserAgent
+from benchmarks.corpus import generate_resume
+from benchmarks.timing import measure
+
+FIELDS = ["email", "phone", "education", "experience"]
+
+
+class LegacyExtraction:
+    """
+    The resume parser's field extraction before the single-scan engine, kept as the
+    benchmark baseline: one regex pass per field, per sentence and per experience block
+    """
+    
+    def __init__(self, sections: ResumeParserAgent):
+        self.sections = sections
+    
+    def extract(self, text: str) -> Dict[str, Any]:
+        return {
+            "email": self._extract_email(text),
+            "phone": self._extract_phone(text),
+            "education": self._extract_education(text),
+            "experience": self._extract_experience(text),
+        }
+    
+    def _extract_email(self, text: str) -> str:
+        emails = re.findall(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', text)
+        return emails[0] if emails else ""
+    
+    def _extract_phone(self, text: str) -> str:
+        for pattern in [r'\b(\+\d{1,3}[\s-]?)?\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}\b',
+                        r'\b(\+\d{1,3}[\s-]?)?\d{10,12}\b']:
+            phones = re.findall(pattern, text)
+            if phones:
+                return phones[0]
+        return ""
+    
+    def _extract_education(self, text: str) -> List[Dict[str, str]]:
+        education_list = []
+        education_section = self.sections._extract_section(text, ["education", "academic background",
+                                                                   "academic qualifications"])
+        if not education_section:
+            return education_list
+        degree_patterns = [
+            r'(B\.?S\.?|Bachelor of Science|Bachelor\'?s?)\s+(?:degree\s+)?(?:in\s+)?([^,\n]+)',
+            r'(B\.?A\.?|Bachelor of Arts|Bachelor\'?s?)\s+(?:degree\s+)?(?:in\s+)?([^,\n]+)',
+            r'(M\.?S\.?|Master of Science|Master\'?s?)\s+(?:degree\s+)?(?:in\s+)?([^,\n]+)',
+            r'(M\.?A\.?|Master of Arts|Master\'?s?)\s+(?:degree\s+)?(?:in\s+)?([^,\n]+)',
+            r'(Ph\.?D\.?|Doctor of Philosophy|Doctorate)\s+(?:degree\s+)?(?:in\s+)?([^,\n]+)',
+            r'(MBA|Master of Business Administration)',
+        ]
+        uni_pattern = r'(University|College|Institute|School) of ([^,\n]+)'
+        for sentence in sent_tokenize(education_section):
+            item = {"degree": "", "field": "", "institution": "", "year": ""}
+            for pattern in degree_patterns:
+                matches = re.search(pattern, sentence)
+                if matches:
+                    item["degree"] = matches.group(1)
+                    if len(matches.groups()) > 1 and matches.group(2):
+                        item["field"] = matches.group(2).strip()
+                    break
+            uni_matches = re.search(uni_pattern, sentence)
+            if uni_matches:
+                item["institution"] = f"{uni_matches.group(1)} of {uni_matches.group(2)}"
+            else:
+                for candidate in sentence.split(','):
+                    if "university" in candidate.lower() or "college" in candidate.lower():
+                        item["institution"] = candidate.strip()
+                        break
+            year_match = re.search(r'(19|20)\d{2}(-|–|—)?(19|20)?\d{0,2}', sentence)
+            if year_match:
+                item["year"] = year_match.group(0)
+            if item["degree"] or item["institution"]:
+                education_list.append(item)
+        return education_list
+    
+    def _extract_experience(self, text: str) -> List[Dict[str, str]]:
+        durations = []
+        experience_section = self.sections._extract_section(text, ["experience", "work experience",
+                                                                    "professional experience", "employment"])
+        if not experience_section:
+            return durations
+        blocks = re.split(r'\n(?=(19|20)\d{2}|(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]* (19|20)\d{2})',
+                          experience_section)
+        # re.split also returns the lookahead's groups (None when they didn't take part)
+        for block in blocks[::3]:
+            if not block.strip():
+                continue
+            date_match = re.search(r'((?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]* (19|20)\d{2})\s*'
+                                   r'(-|–|—|to)\s*((?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]* '
+                                   r'(19|20)\d{2}|Present|Current)', block)
+            if date_match:
+                duration = date_match.group(0)
+            else:
+                year_match = re.search(r'(19|20)\d{2}\s*(-|–|—|to)\s*((19|20)\d{2}|Present|Current)', block)
+                duration = year_match.group(0) if year_match else ""
+            durations.append({"duration": duration, "firstLine": block.split('\n')[0].strip()})
+        return durations
+
+
+def engine_extract(parser: ResumeParserAgent, text: str) -> Dict[str, Any]:
+    """The same fields through the single-scan engine, as ResumeParserAgent.parse extracts them"""
+    entities = RESUME_ENTITIES.scan(text)
+    experience = parser._extract_experience(text, entities)
+    return {
+        "email": parser._extract_email(entities),
+        "phone": parser._extract_phone(entities),
+        "education": parser._extract_education(text, entities),
+        "experience": experience,
+    }
+
+
+def _comparable(fields: Dict[str, Any]) -> Dict[str, Any]:
+    """Fields both implementations produce the same way (the old phone extraction returned
+    only the country-code group, and experience is compared on duration and first line)"""
+    return {
+        "email": fields["email"],
+        "education": fields["education"],
+        "durations": [item["duration"] for item in fields["experience"]],
+    }
+
+
+def add_arguments(parser):
+    """Register command-line options for the extraction benchmark"""
+    parser.add_argument("--sizes", default="medium,large,10,40",
+                        help="comma-separated resume sizes (small, medium, large or an integer scale)")
+    parser.add_argument("--iterations", type=int, default=200, help="timed calls per implementation and size")
+    parser.add_argument("--warmup", type=int, default=5, help="untimed calls before timing")
+    parser.add_argument("--corpus", type=int, default=10, help="distinct resumes generated per size")
+    parser.add_argument("--seed", type=int, default=42, help="corpus random seed")
+    parser.add_argument("--output", default="extraction_results.json", help="where to write the JSON results")
+
+
+def run(args) -> Dict[str, Any]:
+    """Compare the legacy per-field regex passes with the single-scan engine"""
+    # Field extraction needs no models, so the parser is used without loading spaCy
+    parser = ResumeParserAgent.__new__(ResumeParserAgent)
+    legacy = LegacyExtraction(parser)
+    
+    report = {
+        "benchmark": "extraction",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "iterations": args.iterations,
+        "seed": args.seed,
+        "sizes": {}
+    }
+    
+    for size in [s.strip() for s in args.sizes.split(",") if s.strip()]:
+        rng = random.Random(args.seed)
+        resumes = [generate_resume(rng, size) for _ in range(args.corpus)]
+        
+        mismatches = sum(_comparable(legacy.extract(text)) != _comparable(engine_extract(parser, text))
+                         for text in resumes)
+        results = {
+            "inputChars": sum(len(text) for text in resumes) // len(resumes),
+            "entitiesPerResume": sum(len(RESUME_ENTITIES.scan(text)) for text in resumes) // len(resumes),
+            "mismatches": mismatches,
+            "legacy": measure(legacy.extract, resumes, args.iterations, args.warmup),
+            "engine": measure(lambda text: engine_extract(parser, text), resumes, args.iterations, args.warmup),
+            "scanOnly": measure(RESUME_ENTITIES.scan, resumes, args.iterations, args.warmup),
+        }
+        results["speedup"] = results["legacy"]["meanMs"] / max(results["engine"]["meanMs"], 1e-9)
+        report["sizes"][size] = results
+        print(f"  {size:>6} chars={results['inputChars']:7d} legacy p50={results['legacy']['p50Ms']:8.3f}ms "
+              f"engine p50={results['engine']['p50Ms']:8.3f}ms scan p50={results['scanOnly']['p50Ms']:8.3f}ms "
+              f"speedup={results['speedup']:5.2f}x mismatches={mismatches}")
+    
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+    
+    return report
@@ -0,0 +1,398 @@
+import asyncio
+import json
+import os
+import platform
+import random
+import tempfile
+import time
+from collections import Counter
+from contextlib import asynccontextmanager, nullcontext
+from typing import Dict, Any, List, Optional, Tuple
+
+from benchmarks.corpus import generate_calendar, generate_job, generate_resume
+from benchmarks.timing import latency_stats
+
+# Endpoints the harness can drive
+ENDPOINTS = {
+    "parse-resume": ("POST", "/parse-resume"),
+    "parse-job": ("POST", "/parse-job"),
+    "match": ("POST", "/match"),
+    "summarize": ("POST", "/summarize"),
+    "detect-gaps": ("POST", "/detect-gaps"),
+    "schedule-slots": ("POST", "/schedule-slots"),
+}
+
+# Named traffic mixes, as endpoint weights
+MIXES = {
+    "default": "match:5,parse-resume:3,summarize:2",
+    "screening": "parse-resume:4,match:4,detect-gaps:2",
+    "ingest": "parse-resume:5,parse-job:2,summarize:3",
+}
+
+# A step saturates when it completes less than this share of the offered rate (open loop)
+# or gains less than this over the previous step's throughput (closed loop)
+OPEN_LOOP_SHORTFALL = 0.9
+CLOSED_LOOP_GAIN = 1.05
+
+
+def parse_weights(spec: str, known: Optional[List[str]] = None) -> Dict[str, float]:
+    """Parse 'name:weight,name:weight' (a missing weight is 1)"""
+    weights = {}
+    for item in [part.strip() for part in spec.split(",") if part.strip()]:
+        name, _, weight = item.partition(":")
+        if known is not None and name not in known:
+            raise SystemExit(f"Unknown name '{name}' (choose from {', '.join(known)})")
+        weights[name] = float(weight) if weight else 1.0
+    if not weights or sum(weights.values()) <= 0:
+        raise SystemExit(f"No positive weights in '{spec}'")
+    return weights
+
+
+class Payloads:
+    """Request bodies per endpoint and corpus size, drawn at random for every request"""
+    
+    def __init__(self, sizes: Dict[str, float], count: int, seed: int, use_cache: bool):
+        rng = random.Random(seed)
+        self.sizes = sizes
+        self.use_cache = use_cache
+        self.texts = {size: {"resumes": [generate_resume(rng, size) for _ in range(count)],
+                             "jobs": [generate_job(rng, size) for _ in range(count)],
+                             "calendars": [generate_calendar(rng, size) for _ in range(count)]}
+                      for size in sizes}
+        # Parsed documents for /match and /detect-gaps, from the service itself
+        self.parsed: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
+    
+    async def prepare(self, client, endpoints) -> None:
+        """Parse the corpus through the service (untimed) when the mix needs parsed documents"""
+        if not {"match", "detect-gaps"} & set(endpoints):
+            return
+        for size, texts in self.texts.items():
+            self.parsed[size] = {"resumes": [], "jobs": []}
+            for kind, path in (("resumes", "/parse-resume"), ("jobs", "/parse-job")):
+                for text in texts[kind]:
+                    response = await client.post(path, json={"content": text})
+                    if response.status_code >= 400:
+                        raise SystemExit(f"Could not prepare payloads: {path} returned {response.status_code}")
+                    self.parsed[size][kind].append(response.json())
+    
+    def draw(self, rng: random.Random, endpoint: str) -> Tuple[str, Dict[str, Any]]:
+        """Pick a size by weight and a body for the endpoint"""
+        size = rng.choices(list(self.sizes), weights=list(self.sizes.values()))[0]
+        texts = self.texts[size]
+        if endpoint == "parse-resume":
+            return size, {"content": rng.choice(texts["resumes"])}
+        if endpoint == "parse-job":
+            return size, {"content": rng.choice(texts["jobs"])}
+        if endpoint == "summarize":
+            return size, {"content": rng.choice(texts["resumes"]), "type": "resume"}
+        if endpoint == "schedule-slots":
+            return size, {"existingSlots": rng.choice(texts["calendars"])}
+        # match and detect-gaps: a random resume/job pair, so repeats are rare
+        parsed = self.parsed[size]
+        return size, {"resume": rng.choice(parsed["resumes"]), "job": rng.choice(parsed["jobs"]),
+                      "useCache": self.use_cache}
+
+
+class Recorder:
+    """Outcomes of one step: latency, endpoint, size and status of every request"""
+    
+    def __init__(self):
+        self.samples: List[Tuple[str, str, float, str]] = []
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+    
+    def record(self, endpoint: str, size: str, latency: float, status: str) -> None:
+        self.samples.append((endpoint, size, latency, status))
+    
+    def _summary(self, samples, wall_time: float) -> Dict[str, Any]:
+        # Latency percentiles cover successful requests; failures are counted separately
+        ok = [latency for _, _, latency, status in samples if status.startswith(("2", "3"))]
+        stats = latency_stats(ok, wall_time)
+        errors = len(samples) - len(ok)
+        stats.update({
+            "requests": len(samples),
+            "errors": errors,
+            "errorRate": errors / len(samples) if samples else 0.0,
+            "statusCodes": dict(Counter(status for _, _, _, status in samples))
+        })
+        return stats
+    
+    def report(self) -> Dict[str, Any]:
+        wall_time = (self.finished or time.perf_counter()) - self.started
+        by_endpoint: Dict[str, list] = {}
+        by_size: Dict[str, list] = {}
+        for sample in self.samples:
+            by_endpoint.setdefault(sample[0], []).append(sample)
+            by_size.setdefault(sample[1], []).append(sample)
+        return {
+            "wallSeconds": wall_time,
+            "overall": self._summary(self.samples, wall_time),
+            "endpoints": {name: self._summary(samples, wall_time) for name, samples in sorted(by_endpoint.items())},
+            "sizes": {name: self._summary(samples, wall_time) for name, samples in sorted(by_size.items())}
+        }
+
+
+async def _send(client, endpoint: str, size: str, body: Dict[str, Any], recorder: Recorder,
+                scheduled: Optional[float] = None) -> None:
+    """Make one request; latency runs from its scheduled arrival (open loop) or from sending"""
+    method, path = ENDPOINTS[endpoint]
+    start = time.perf_counter() if scheduled is None else scheduled
+    try:
+        response = await client.request(method, path, json=body)
+        await response.aread()
+        status = str(response.status_code)
+    except Exception as e:
+        status = type(e).__name__
+    recorder.record(endpoint, size, time.perf_counter() - start, status)
+
+
+async def open_loop(client, payloads: Payloads, mix: Dict[str, float], rate: float, duration: float,
+                    rng: random.Random, max_in_flight: int) -> Recorder:
+    """
+    Poisson arrivals at `rate` per second for `duration` seconds, whether or not earlier
+    requests have finished
+    
+    Latency includes any time a request waited behind the client's own scheduling, so a
+    slow service can't hide its queueing (no coordinated omission). Arrivals beyond
+    max_in_flight outstanding requests are recorded as 'dropped'.
+    """
+    recorder = Recorder()
+    endpoints, weights = list(mix), list(mix.values())
+    tasks = set()
+    deadline = recorder.started + duration
+    arrival = recorder.started
+    while True:
+        arrival += rng.expovariate(rate)
+        if arrival >= deadline:
+            break
+        delay = arrival - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        endpoint = rng.choices(endpoints, weights=weights)[0]
+        size, body = payloads.draw(rng, endpoint)
+        if len(tasks) >= max_in_flight:
+            recorder.record(endpoint, size, 0.0, "dropped")
+            continue
+        task = asyncio.create_task(_send(client, endpoint, size, body, recorder, scheduled=arrival))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    if tasks:
+        await asyncio.gather(*tasks)
+    recorder.finished = time.perf_counter()
+    return recorder
+
+
+async def closed_loop(client, payloads: Payloads, mix: Dict[str, float], users: int, duration: float,
+                      rng: random.Random, think_seconds: float) -> Recorder:
+    """`users` clients each sending a request, waiting for it, then thinking (exponential)"""
+    recorder = Recorder()
+    endpoints, weights = list(mix), list(mix.values())
+    deadline = recorder.started + duration
+    
+    async def user():
+        while time.perf_counter() < deadline:
+            endpoint = rng.choices(endpoints, weights=weights)[0]
+            size, body = payloads.draw(rng, endpoint)
+            await _send(client, endpoint, size, body, recorder)
+            if think_seconds > 0:
+                await asyncio.sleep(rng.expovariate(1 / think_seconds))
+    
+    await asyncio.gather(*(user() for _ in range(users)))
+    recorder.finished = time.perf_counter()
+    return recorder
+
+
+def _load_agents(agents, allow_fallback: bool) -> None:
+    """Construct the in-process agents, refusing to measure simplified stand-ins unless asked to"""
+    for name in agents.agents:
+        try:
+            agents[name].get()
+        except Exception as e:
+            raise SystemExit(f"Could not load the {name} agent from local weights ({e}). Cache the models first, "
+                             f"or run with AI_SERVICE_OFFLINE=0 and --allow-fallback to measure the simplified agents.")
+    fallback = [name for name, agent in agents.agents.items() if agent.fallback]
+    if fallback and not allow_fallback:
+        raise SystemExit(f"Simplified agents stand in for {', '.join(fallback)} (models unavailable). "
+                         f"Cache the models first, or pass --allow-fallback to measure the simplified agents.")
+
+
+async def _agent_tiers(client) -> Dict[str, Dict[str, Any]]:
+    """Class and tier of each agent that served the run, from the readiness report"""
+    response = await client.get("/health/ready")
+    return {name: {"class": status.get("class"), "tier": status.get("tier")}
+            for name, status in response.json().get("agents", {}).items()}
+
+
+@asynccontextmanager
+async def _client(args):
+    """An httpx client for the app in this process, a given URL or a locally started service"""
+    import httpx
+    
+    timeout = httpx.Timeout(args.timeout)
+    limits = httpx.Limits(max_connections=args.max_in_flight, max_keepalive_connections=args.max_in_flight)
+    headers = {"X-Priority": args.priority} if args.priority else None
+    
+    if args.target == "inprocess":
+        from main import agents, app
+        
+        # The app's startup/shutdown handlers run as they would under uvicorn
+        async with app.router.lifespan_context(app):
+            _load_agents(agents, args.allow_fallback)
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://load-test",
+                                         timeout=timeout, headers=headers) as client:
+                yield client
+        return
+    
+    from benchmarks.transport import _free_port, start_service
+    
+    with tempfile.TemporaryDirectory() if args.url is None else nullcontext() as tmp:
+        process = None
+        url = args.url
+        if url is None:
+            port = _free_port()
+            process = start_service(port, os.path.join(tmp, "http.sock"), os.path.join(tmp, "rpc.sock"))
+            url = f"http://127.0.0.1:{port}"
+        try:
+            async with httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits, headers=headers) as client:
+                yield client
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait(timeout=10)
+
+
+def _saturation(curve: List[Dict[str, Any]], loop: str, slo_ms: Optional[float],
+                max_error_rate: float) -> Optional[Dict[str, Any]]:
+    """The first step past the service's capacity, and why"""
+    previous = None
+    for point in curve:
+        reasons = []
+        if point["errorRate"] > max_error_rate:
+            reasons.append(f"error rate {point['errorRate']:.1%} > {max_error_rate:.1%}")
+        if slo_ms is not None and point["p99Ms"] > slo_ms:
+            reasons.append(f"p99 {point['p99Ms']:.0f}ms > {slo_ms:.0f}ms")
+        if loop == "open" and point["throughputPerSec"] < OPEN_LOOP_SHORTFALL * point["offered"]:
+            reasons.append(f"throughput {point['throughputPerSec']:.1f}/s < {OPEN_LOOP_SHORTFALL:.0%} of offered")
+        if loop == "closed" and previous is not None \
+                and point["throughputPerSec"] < CLOSED_LOOP_GAIN * previous["throughputPerSec"]:
+            reasons.append("throughput stopped growing with concurrency")
+        if reasons:
+            return {"step": point["offered"], "reasons": reasons,
+                    "capacityPerSec": max((p["throughputPerSec"] for p in curve[:curve.index(point)]), default=None)}
+        previous = point
+    return None
+
+
+def add_arguments(parser):
+    """Register command-line options for the load test"""
+    parser.add_argument("--target", choices=["inprocess", "http"], default="inprocess",
+                        help="inprocess: drive main.app through ASGI in this process; http: a running or "
+                             "locally started service")
+    parser.add_argument("--url", help="service URL for --target http (default: start server.py locally)")
+    parser.add_argument("--allow-fallback", action="store_true",
+                        help="inprocess: run even when simplified agents stand in for missing models "
+                             "(needs AI_SERVICE_OFFLINE=0; measures the simplified agents)")
+    parser.add_argument("--mix", default="default",
+                        help=f"traffic mix: {', '.join(MIXES)} or endpoint weights like 'match:5,summarize:1' "
+                             f"(endpoints: {', '.join(ENDPOINTS)})")
+    parser.add_argument("--sizes", default="small:6,medium:3,large:1",
+                        help="payload sizes and weights (small, medium, large or an integer scale)")
+    parser.add_argument("--loop", choices=["open", "closed"], default="open",
+                        help="open: Poisson arrivals at fixed rates; closed: fixed numbers of concurrent users")
+    parser.add_argument("--rates", default="2,5,10,20,40", help="open loop: requests per second for each step")
+    parser.add_argument("--concurrency", default="1,2,4,8,16", help="closed loop: concurrent users for each step")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="closed loop: mean think time between requests")
+    parser.add_argument("--duration", type=float, default=20.0, help="measured seconds per step")
+    parser.add_argument("--warmup", type=float, default=3.0, help="unmeasured seconds before each step")
+    parser.add_argument("--max-in-flight", type=int, default=512,
+                        help="open loop: outstanding requests before arrivals are dropped")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-request timeout in seconds")
+    parser.add_argument("--slo-ms", type=float, help="p99 latency above which a step counts as saturated")
+    parser.add_argument("--max-error-rate", type=float, default=0.01,
+                        help="error rate above which a step counts as saturated")
+    parser.add_argument("--priority", choices=["interactive", "bulk"], help="X-Priority header to send")
+    parser.add_argument("--use-cache", action="store_true", help="let /match reuse stored results")
+    parser.add_argument("--corpus", type=int, default=20, help="distinct documents generated per size")
+    parser.add_argument("--seed", type=int, default=42, help="corpus and arrival random seed")
+    parser.add_argument("--output", default="load_results.json", help="where to write the JSON results")
+
+
+async def _run(args, mix: Dict[str, float], sizes: Dict[str, float], steps: List[float]) -> Dict[str, Any]:
+    rng = random.Random(args.seed)
+    payloads = Payloads(sizes, args.corpus, args.seed, args.use_cache)
+    report = {
+        "benchmark": "load",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "target": args.target if args.url is None else args.url,
+        "loop": args.loop,
+        "mix": mix,
+        "sizes": sizes,
+        "durationSeconds": args.duration,
+        "thinkMs": args.think_ms if args.loop == "closed" else None,
+        "steps": []
+    }
+    
+    async with _client(args) as client:
+        await payloads.prepare(client, mix)
+        for step in steps:
+            if args.loop == "open":
+                run_step = lambda seconds: open_loop(client, payloads, mix, step, seconds, rng, args.max_in_flight)
+            else:
+                run_step = lambda seconds: closed_loop(client, payloads, mix, int(step), seconds, rng,
+                                                       args.think_ms / 1000)
+            if args.warmup > 0:
+                await run_step(args.warmup)
+            result = (await run_step(args.duration)).report()
+            result["offered"] = step
+            report["steps"].append(result)
+            
+            overall = result["overall"]
+            label = f"{step:g}/s" if args.loop == "open" else f"{int(step)} users"
+            print(f"  {label:>10} throughput={overall['throughputPerSec']:8.1f}/s p50={overall['p50Ms']:9.1f}ms "
+                  f"p99={overall['p99Ms']:9.1f}ms errors={overall['errorRate']:6.1%}")
+            for name, stats in result["endpoints"].items():
+                print(f"  {'':>10}   {name:<15} {stats['requests']:6d} req p50={stats['p50Ms']:9.1f}ms "
+                      f"p99={stats['p99Ms']:9.1f}ms errors={stats['errorRate']:6.1%}")
+        
+        report["agents"] = await _agent_tiers(client)
+    
+    # One point per step: what was offered against what the service delivered
+    curve = [dict(offered=result["offered"], throughputPerSec=result["overall"]["throughputPerSec"],
+                  p50Ms=result["overall"]["p50Ms"], p99Ms=result["overall"]["p99Ms"],
+                  errorRate=result["overall"]["errorRate"]) for result in report["steps"]]
+    report["saturationCurve"] = curve
+    report["saturation"] = _saturation(curve, args.loop, args.slo_ms, args.max_error_rate)
+    return report
+
+
+def run(args) -> Dict[str, Any]:
+    """Replay a traffic mix against the service at increasing load and record the saturation curve"""
+    mix = parse_weights(MIXES.get(args.mix, args.mix), list(ENDPOINTS))
+    sizes = parse_weights(args.sizes)
+    steps = [float(step) for step in (args.rates if args.loop == "open" else args.concurrency).split(",")
+             if step.strip()]
+    if not steps or min(steps) <= 0:
+        raise SystemExit("Steps must be positive numbers")
+    
+    print(f"Load test ({args.loop} loop, {args.target}): " + ", ".join(f"{k}={v:g}" for k, v in mix.items()))
+    report = asyncio.run(_run(args, mix, sizes, steps))
+    
+    fallback = [name for name, agent in report["agents"].items() if agent["tier"] == "triage"]
+    if fallback:
+        print(f"Simplified agents served {', '.join(fallback)}: these results don't measure the full models")
+    
+    saturation = report["saturation"]
+    if saturation is None:
+        print("No saturation within the tested steps")
+    else:
+        capacity = saturation["capacityPerSec"]
+        print(f"Saturated at {saturation['step']:g}: {'; '.join(saturation['reasons'])}"
+              + (f" (capacity about {capacity:.1f}/s)" if capacity is not None else ""))
+    
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+    
+    return report
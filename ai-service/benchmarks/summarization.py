@@ -0,0 +1,169 @@
+import json
+import platform
+import random
+import time
+from typing import Dict, Any, List
+
+import config
+from agents.chunking import chunk_text, window_tokens
+from benchmarks.corpus import generate_resume
+from benchmarks.timing import measure
+
+# Chunks shorter than this are skipped by the summarizer, so they cost no generate call
+MIN_CHUNK_WORDS = 30
+
+
+class LegacyChunking:
+    """
+    The summarizer's chunking before token-aware chunks, kept as the benchmark baseline:
+    the whitespace-collapsed text cut into runs of at most 1000 characters
+    """
+    
+    MAX_CHUNK_CHARS = 1000
+    MAX_WORDS = 3000
+    
+    def chunks(self, text: str) -> List[str]:
+        chunks = []
+        current_chunk = []
+        current_length = 0
+        for word in text.split()[:self.MAX_WORDS]:
+            current_length += len(word) + 1
+            if current_length <= self.MAX_CHUNK_CHARS:
+                current_chunk.append(word)
+            else:
+                chunks.append(' '.join(current_chunk))
+                current_chunk = [word]
+                current_length = len(word) + 1
+        if current_chunk:
+            chunks.append(' '.join(current_chunk))
+        return chunks
+    
+    def summarize(self, summarizer, text: str) -> str:
+        summaries = []
+        for chunk in self.chunks(text):
+            if len(chunk.split()) >= MIN_CHUNK_WORDS:
+                summaries.append(summarizer(chunk, max_length=150, min_length=30, do_sample=False)[0]['summary_text'])
+        return " ".join(summaries)
+
+
+def _calls(chunks: List[str]) -> int:
+    return sum(len(chunk.split()) >= MIN_CHUNK_WORDS for chunk in chunks)
+
+
+def _load_tokenizer():
+    """The first summarization model's tokenizer and config found in the local cache (offline, see benchmarks/__main__)"""
+    from transformers import AutoTokenizer
+    from agents.model_loader import SUMMARIZATION_MODELS
+    
+    errors = []
+    for name in SUMMARIZATION_MODELS:
+        try:
+            tokenizer = AutoTokenizer.from_pretrained(name)
+        except Exception as e:
+            errors.append(f"{name}: {e}")
+            continue
+        try:
+            from transformers import AutoConfig
+            model_config = AutoConfig.from_pretrained(name)
+        except Exception:
+            model_config = None
+        return name, tokenizer, model_config
+    raise SystemExit("No summarization tokenizer is cached locally (" + "; ".join(errors) + ")")
+
+
+def add_arguments(parser):
+    """Register command-line options for the summarization benchmark"""
+    parser.add_argument("--mode", choices=["tokens", "real"], default="tokens",
+                        help="tokens: chunk and call counts with the cached tokenizer only; "
+                             "real: also time summaries with the locally cached model")
+    parser.add_argument("--sizes", default="medium,large,10,40",
+                        help="comma-separated resume sizes (small, medium, large or an integer scale)")
+    parser.add_argument("--corpus", type=int, default=5, help="distinct documents generated per size")
+    parser.add_argument("--iterations", type=int, default=5, help="timed summaries per implementation and size (real)")
+    parser.add_argument("--seed", type=int, default=42, help="corpus random seed")
+    parser.add_argument("--output", default="summarization_results.json", help="where to write the JSON results")
+
+
+def run(args) -> Dict[str, Any]:
+    """Compare generate calls and latency of 1000-character chunks with token-aware chunks"""
+    legacy = LegacyChunking()
+    if args.mode == "real":
+        from agents.summarization import SummarizationAgent
+        try:
+            agent = SummarizationAgent()
+        except Exception as e:
+            raise SystemExit(f"Could not load the summarization model from local weights ({e}). "
+                             f"Cache it first or use --mode tokens.")
+        model_name = agent.model_name
+        summarizer = agent.summarizer.get()
+        tokenizer = summarizer.tokenizer
+        model_config = getattr(getattr(summarizer, "model", None), "config", None)
+    else:
+        model_name, tokenizer, model_config = _load_tokenizer()
+    
+    budget = window_tokens(tokenizer, model_config, config.SUMMARIZATION_CHUNK_TOKENS)
+    overlap = config.SUMMARIZATION_CHUNK_OVERLAP_TOKENS
+    
+    def count_tokens(texts: List[str]) -> List[int]:
+        return [len(ids) for ids in tokenizer(texts, add_special_tokens=False)["input_ids"]]
+    
+    def token_chunks(text: str):
+        return chunk_text(text, count_tokens, budget, overlap, LegacyChunking.MAX_WORDS)
+    
+    report = {
+        "benchmark": "summarization",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "mode": args.mode,
+        "model": model_name,
+        "budgetTokens": budget,
+        "overlapTokens": overlap,
+        "seed": args.seed,
+        "sizes": {}
+    }
+    print(f"Summarization chunking with {model_name}: {budget}-token chunks, {overlap}-token overlap")
+    
+    for size in [s.strip() for s in args.sizes.split(",") if s.strip()]:
+        rng = random.Random(args.seed)
+        documents = [generate_resume(rng, size) for _ in range(args.corpus)]
+        
+        legacy_calls = [_calls(legacy.chunks(text)) for text in documents]
+        chunked = [token_chunks(text) for text in documents]
+        token_calls = [_calls([chunk.text for chunk in chunks]) for chunks in chunked]
+        # Share of each generate call's window filled with input (the last, partial chunk included)
+        fills = [chunk.tokens / budget for chunks in chunked for chunk in chunks]
+        legacy_fills = [sum(count_tokens(chunks)) / max(len(chunks), 1) / budget
+                        for chunks in (legacy.chunks(text) for text in documents)]
+        
+        results = {
+            "inputWords": sum(min(len(text.split()), LegacyChunking.MAX_WORDS) for text in documents) // len(documents),
+            "legacyCalls": sum(legacy_calls) / len(documents),
+            "tokenCalls": sum(token_calls) / len(documents),
+            "legacyWindowFill": sum(legacy_fills) / len(legacy_fills),
+            "tokenWindowFill": sum(fills) / len(fills) if fills else 0.0,
+            "overlapTokens": sum(chunk.overlap for chunks in chunked for chunk in chunks) / len(documents),
+            "chunking": measure(token_chunks, documents, max(args.iterations, len(documents)), 1),
+        }
+        results["callReduction"] = 1 - results["tokenCalls"] / max(results["legacyCalls"], 1e-9)
+        line = (f"  {size:>6} words={results['inputWords']:5d} calls legacy={results['legacyCalls']:5.1f} "
+                f"token={results['tokenCalls']:5.1f} ({results['callReduction']:.0%} fewer) "
+                f"fill legacy={results['legacyWindowFill']:.0%} token={results['tokenWindowFill']:.0%} "
+                f"chunking p50={results['chunking']['p50Ms']:.2f}ms")
+        
+        if args.mode == "real":
+            results["legacy"] = measure(lambda text: legacy.summarize(agent.summarizer, text), documents,
+                                        args.iterations, 1)
+            results["token"] = measure(agent.summarize, documents, args.iterations, 1)
+            results["speedup"] = results["legacy"]["meanMs"] / max(results["token"]["meanMs"], 1e-9)
+            line += (f" latency p50 legacy={results['legacy']['p50Ms']:.0f}ms "
+                     f"token={results['token']['p50Ms']:.0f}ms speedup={results['speedup']:.2f}x")
+        
+        report["sizes"][size] = results
+        print(line)
+    
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+    
+    return report
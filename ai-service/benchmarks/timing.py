@@ -0,0 +1,68 @@
+import time
+from typing import Callable, Dict, List, Sequence, Any
+
+
+def percentile(sorted_values: Sequence[float], pct: float) -> float:
+    """Linear-interpolated percentile of an already sorted sequence"""
+    if not sorted_values:
+        return 0.0
+    
+    position = (len(sorted_values) - 1) * pct / 100.0
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    fraction = position - lower
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * fraction
+
+
+def latency_stats(latencies: List[float], wall_time: float) -> Dict[str, Any]:
+    """
+    Summarize latencies (in seconds) as milliseconds percentiles and throughput
+    
+    Args:
+        latencies: Per-call latencies in seconds
+        wall_time: Total elapsed time of the measured loop in seconds
+        
+    Returns:
+        Dictionary with call count, percentiles, mean and throughput
+    """
+    ordered = sorted(latencies)
+    count = len(ordered)
+    
+    return {
+        "calls": count,
+        "meanMs": (sum(ordered) / count * 1000) if count else 0.0,
+        "minMs": ordered[0] * 1000 if count else 0.0,
+        "p50Ms": percentile(ordered, 50) * 1000,
+        "p90Ms": percentile(ordered, 90) * 1000,
+        "p95Ms": percentile(ordered, 95) * 1000,
+        "p99Ms": percentile(ordered, 99) * 1000,
+        "maxMs": ordered[-1] * 1000 if count else 0.0,
+        "throughputPerSec": count / wall_time if wall_time > 0 else 0.0
+    }
+
+
+def measure(fn: Callable[[Any], Any], inputs: Sequence[Any], iterations: int, warmup: int = 1) -> Dict[str, Any]:
+    """
+    Time fn over the inputs, cycling through them for the requested iterations
+    
+    Args:
+        fn: Callable taking one input
+        inputs: Inputs to cycle through
+        iterations: Number of timed calls
+        warmup: Number of untimed calls made first
+        
+    Returns:
+        Latency statistics as produced by latency_stats
+    """
+    for i in range(warmup):
+        fn(inputs[i % len(inputs)])
+    
+    latencies = []
+    wall_start = time.perf_counter()
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn(inputs[i % len(inputs)])
+        latencies.append(time.perf_counter() - start)
+    wall_time = time.perf_counter() - wall_start
+    
+    return latency_stats(latencies, wall_time)
@@ -0,0 +1,199 @@
+import http.client
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, Any, List
+
+from benchmarks.corpus import generate_calendar
+from benchmarks.timing import latency_stats
+
+TRANSPORTS = ["http-new-connection", "http-keepalive", "http-uds", "rpc-msgpack", "rpc-json", "rpc-pipelined"]
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP/1.1 connection over a Unix domain socket"""
+    
+    def __init__(self, path: str):
+        super().__init__("localhost")
+        self.path = path
+    
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.path)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_service(port: int, uds_path: str, rpc_path: str) -> subprocess.Popen:
+    """Start server.py with TCP, UDS and RPC listeners and wait until it answers"""
+    env = dict(os.environ, AI_SERVICE_HOST="127.0.0.1", AI_SERVICE_PORT=str(port), AI_SERVICE_UDS=uds_path,
+               AI_SERVICE_RPC_SOCKET=rpc_path, AI_SERVICE_WARMUP="false")
+    process = subprocess.Popen([sys.executable, "server.py"], cwd=SERVICE_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise SystemExit("AI service exited during startup")
+        if os.path.exists(rpc_path) and os.path.exists(uds_path):
+            try:
+                connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+                connection.request("GET", "/health/live")
+                if connection.getresponse().status == 200:
+                    connection.close()
+                    return process
+            except OSError:
+                pass
+        time.sleep(0.1)
+    process.kill()
+    raise SystemExit("AI service did not start within 60s")
+
+
+def _http_call(connection: http.client.HTTPConnection, method: str, path: str, body: bytes) -> None:
+    headers = {"Content-Type": "application/json"} if body else {}
+    connection.request(method, path, body=body or None, headers=headers)
+    response = connection.getresponse()
+    response.read()
+    if response.status >= 400:
+        raise RuntimeError(f"{method} {path} returned {response.status}")
+
+
+def _clients(port: int, uds_path: str, rpc_path: str, method: str, path: str, payload: Any) -> Dict[str, Callable]:
+    """One callable per transport, each making one request"""
+    from utils.rpc import RpcClient, MSGPACK_CODEC, JSON_CODEC
+    
+    body = json.dumps(payload).encode() if payload is not None else b""
+    keepalive = http.client.HTTPConnection("127.0.0.1", port)
+    unix = UnixHTTPConnection(uds_path)
+    rpc_msgpack = RpcClient(rpc_path, MSGPACK_CODEC)
+    rpc_json = RpcClient(rpc_path, JSON_CODEC)
+    
+    def new_connection():
+        connection = http.client.HTTPConnection("127.0.0.1", port)
+        try:
+            _http_call(connection, method, path, body)
+        finally:
+            connection.close()
+    
+    def rpc(client):
+        def call():
+            status, result = client.call(method, path, payload)
+            if status >= 400:
+                raise RuntimeError(f"{method} {path} returned {status}: {result}")
+        return call
+    
+    return {
+        "http-new-connection": new_connection,
+        "http-keepalive": lambda: _http_call(keepalive, method, path, body),
+        "http-uds": lambda: _http_call(unix, method, path, body),
+        "rpc-msgpack": rpc(rpc_msgpack),
+        "rpc-json": rpc(rpc_json),
+        # Handled separately: timed per batch
+        "rpc-pipelined": rpc_msgpack,
+    }
+
+
+def _time_calls(call: Callable, iterations: int, warmup: int) -> Dict[str, Any]:
+    for _ in range(warmup):
+        call()
+    latencies = []
+    wall_start = time.perf_counter()
+    for _ in range(iterations):
+        start = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - start)
+    return latency_stats(latencies, time.perf_counter() - wall_start)
+
+
+def _time_pipelined(client, method: str, path: str, payload: Any, iterations: int, depth: int) -> Dict[str, Any]:
+    """Send requests in batches of `depth`; latency is per request (batch time / depth)"""
+    calls = [(method, path, payload)] * depth
+    client.pipeline(calls)
+    latencies: List[float] = []
+    wall_start = time.perf_counter()
+    for _ in range(max(1, iterations // depth)):
+        start = time.perf_counter()
+        results = client.pipeline(calls)
+        elapsed = time.perf_counter() - start
+        if any(status >= 400 for status, _ in results):
+            raise RuntimeError(f"{method} {path} failed in pipeline")
+        latencies.extend([elapsed / depth] * depth)
+    return latency_stats(latencies, time.perf_counter() - wall_start)
+
+
+def add_arguments(parser):
+    """Register command-line options for the transport benchmark"""
+    parser.add_argument("--transports", default=",".join(TRANSPORTS),
+                        help=f"comma-separated transports to time ({', '.join(TRANSPORTS)})")
+    parser.add_argument("--sizes", default="small,large",
+                        help="calendar sizes for the /schedule-slots payload (small, medium, large or an integer)")
+    parser.add_argument("--iterations", type=int, default=500, help="timed calls per transport and target")
+    parser.add_argument("--warmup", type=int, default=20, help="untimed calls before timing")
+    parser.add_argument("--pipeline-depth", type=int, default=8, help="requests per batch for rpc-pipelined")
+    parser.add_argument("--seed", type=int, default=42, help="payload random seed")
+    parser.add_argument("--output", default="transport_results.json", help="where to write the JSON results")
+
+
+def run(args) -> Dict[str, Any]:
+    """Start the service locally and compare per-request overhead across transports"""
+    transports = [t.strip() for t in args.transports.split(",") if t.strip()]
+    unknown = [t for t in transports if t not in TRANSPORTS]
+    if unknown:
+        raise SystemExit(f"Unknown transports: {', '.join(unknown)}")
+    
+    rng = random.Random(args.seed)
+    # A near-empty endpoint shows the fixed per-request cost; /schedule-slots adds a payload
+    targets = {"GET /health/live": ("GET", "/health/live", None)}
+    for size in [s.strip() for s in args.sizes.split(",") if s.strip()]:
+        targets[f"POST /schedule-slots ({size})"] = (
+            "POST", "/schedule-slots", {"existingSlots": generate_calendar(rng, size)})
+    
+    report = {
+        "benchmark": "transport",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "iterations": args.iterations,
+        "pipelineDepth": args.pipeline_depth,
+        "targets": {}
+    }
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        uds_path = os.path.join(tmp, "http.sock")
+        rpc_path = os.path.join(tmp, "rpc.sock")
+        port = _free_port()
+        process = start_service(port, uds_path, rpc_path)
+        try:
+            for target, (method, path, payload) in targets.items():
+                clients = _clients(port, uds_path, rpc_path, method, path, payload)
+                results = {}
+                for transport in transports:
+                    if transport == "rpc-pipelined":
+                        stats = _time_pipelined(clients[transport], method, path, payload, args.iterations,
+                                                args.pipeline_depth)
+                    else:
+                        stats = _time_calls(clients[transport], args.iterations, args.warmup)
+                    results[transport] = stats
+                    print(f"  {target:<30} {transport:<20} p50={stats['p50Ms']:8.3f}ms "
+                          f"p99={stats['p99Ms']:8.3f}ms throughput={stats['throughputPerSec']:9.1f}/s")
+                report["targets"][target] = results
+        finally:
+            process.terminate()
+            process.wait(timeout=10)
+    
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+    
+    return report
@@ -0,0 +1,139 @@
+import os
+
+# Service settings, read from the environment once at startup
+
+
+def _env_bool(name: str, default: bool = False) -> bool:
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+# Profiling: admins send `X-Profile: 1` with `X-Profile-Token: <PROFILE_ADMIN_TOKEN>`
+PROFILE_ADMIN_TOKEN = os.environ.get("PROFILE_ADMIN_TOKEN", "")
+PROFILE_SAMPLE_INTERVAL_MS = _env_float("PROFILE_SAMPLE_INTERVAL_MS", 2.0)
+# Fraction of ordinary requests profiled in the background (0 disables always-on mode)
+PROFILE_SAMPLE_RATE = _env_float("PROFILE_SAMPLE_RATE", 0.0)
+# Number of slowest sampled profiles kept, and of on-demand profiles kept
+PROFILE_KEEP_SLOWEST = _env_int("PROFILE_KEEP_SLOWEST", 20)
+PROFILE_KEEP_RECENT = _env_int("PROFILE_KEEP_RECENT", 50)
+
+# Tracing: W3C traceparent headers are continued into spans for the request, queue waits,
+# model loads and agent stages. Requests without a traceparent start a trace at
+# TRACING_SAMPLE_RATE. The last TRACING_KEEP_TRACES traces are kept in memory (/debug/traces).
+# TRACING_FILE also appends every span to a JSONL file; the backend's TRACE_FILE uses the same format.
+TRACING_ENABLED = _env_bool("TRACING_ENABLED", True)
+TRACING_SAMPLE_RATE = _env_float("TRACING_SAMPLE_RATE", 1.0)
+TRACING_KEEP_TRACES = _env_int("TRACING_KEEP_TRACES", 200)
+TRACING_FILE = os.environ.get("TRACING_FILE", "")
+
+# Startup: fail fast instead of downloading models, and warm models up in the background
+OFFLINE = _env_bool("AI_SERVICE_OFFLINE", False)
+WARMUP = _env_bool("AI_SERVICE_WARMUP", True)
+
+# Sentence embeddings: backend (torch, int8, torchscript, onnx), optional local weights
+# directory, and where exported graphs are written
+EMBEDDING_BACKEND = os.environ.get("EMBEDDING_BACKEND", "torch")
+SENTENCE_MODEL_PATH = os.environ.get("SENTENCE_MODEL_PATH", "")
+EMBEDDING_EXPORT_DIR = os.environ.get(
+    "EMBEDDING_EXPORT_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "models", "exports"))
+
+# Skill taxonomy table built by `python -m agents.skill_taxonomy build`
+SKILL_VOCABULARY_PATH = os.environ.get(
+    "SKILL_VOCABULARY_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "skills.txt"))
+SKILL_TAXONOMY_DIR = os.environ.get(
+    "SKILL_TAXONOMY_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "models", "skill_taxonomy"))
+
+# Local state written at runtime (dedup index, result caches)
+STORAGE_DIR = os.environ.get("AI_SERVICE_STORAGE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "storage"))
+
+# Near-duplicate resume detection: MinHash LSH index and default similarity threshold
+DEDUP_INDEX_PATH = os.environ.get("DEDUP_INDEX_PATH", os.path.join(STORAGE_DIR, "resume_dedup.sqlite"))
+DEDUP_THRESHOLD = _env_float("DEDUP_THRESHOLD", 0.8)
+
+# Stored /match and /detect-gaps results, keyed by resume, job and scorer hashes
+RESULT_STORE_ENABLED = _env_bool("RESULT_STORE_ENABLED", True)
+RESULT_STORE_PATH = os.environ.get("RESULT_STORE_PATH", os.path.join(STORAGE_DIR, "match_results.sqlite"))
+RESULT_STORE_MAX_ENTRIES = _env_int("RESULT_STORE_MAX_ENTRIES", 100000)
+
+# Materialized candidate x job score matrix (memory-mapped arrays) and the block size of its
+# matrix products
+SCORE_MATRIX_DIR = os.environ.get("SCORE_MATRIX_DIR", os.path.join(STORAGE_DIR, "score_matrix"))
+SCORE_MATRIX_BLOCK = _env_int("SCORE_MATRIX_BLOCK", 2048)
+
+# Wire format: responses at least this large are gzip-compressed (when the client accepts it),
+# and this fraction of payloads is also timed with the stdlib JSON encoder to report savings
+COMPRESSION_MIN_BYTES = _env_int("COMPRESSION_MIN_BYTES", 1024)
+SERIALIZATION_BASELINE_SAMPLE_RATE = _env_float("SERIALIZATION_BASELINE_SAMPLE_RATE", 0.05)
+
+# Share one computation between concurrent identical parse/match/summarize requests
+SINGLEFLIGHT_ENABLED = _env_bool("SINGLEFLIGHT_ENABLED", True)
+
+# Priority classes: execution slots shared by model endpoints, slots kept free for
+# interactive requests, interactive:bulk scheduling weight, total queued requests
+# before shedding, and how long each class may wait for a slot (seconds)
+PRIORITY_CONCURRENCY = _env_int("PRIORITY_CONCURRENCY", 4)
+PRIORITY_INTERACTIVE_RESERVED = _env_int("PRIORITY_INTERACTIVE_RESERVED", 1)
+PRIORITY_INTERACTIVE_WEIGHT = _env_int("PRIORITY_INTERACTIVE_WEIGHT", 4)
+PRIORITY_QUEUE_LIMIT = _env_int("PRIORITY_QUEUE_LIMIT", 128)
+PRIORITY_INTERACTIVE_MAX_WAIT = _env_float("PRIORITY_INTERACTIVE_MAX_WAIT", 10.0)
+PRIORITY_BULK_MAX_WAIT = _env_float("PRIORITY_BULK_MAX_WAIT", 120.0)
+
+# Serving (server.py): TCP address, optional Unix domain socket for co-located callers,
+# keep-alive timeout (longer than the backend's idle socket timeout, so the server never
+# closes a connection the client is about to reuse), and the optional binary RPC socket
+HOST = os.environ.get("AI_SERVICE_HOST", "0.0.0.0")
+PORT = _env_int("AI_SERVICE_PORT", 8000)
+UDS_PATH = os.environ.get("AI_SERVICE_UDS", "")
+KEEPALIVE_TIMEOUT = _env_int("AI_SERVICE_KEEPALIVE_TIMEOUT", 75)
+RPC_SOCKET = os.environ.get("AI_SERVICE_RPC_SOCKET", "")
+
+# Model memory: budget for resident models in MB (0 = unlimited), idle time in seconds after
+# which unpinned models are unloaded (0 = never), and models that are never unloaded
+# (comma-separated keys or patterns: spacy, sentence-transformers, embedding-backend:<name>, summarizer)
+MODEL_MEMORY_BUDGET_MB = _env_int("MODEL_MEMORY_BUDGET_MB", 0)
+MODEL_IDLE_TTL = _env_float("MODEL_IDLE_TTL", 1800.0)
+MODEL_PINNED = [key.strip() for key in os.environ.get("MODEL_PINNED", "spacy,embedding-backend:*").split(",")
+                if key.strip()]
+
+# Long documents: texts longer than LONG_DOCUMENT_CHARS are parsed by spaCy in section-aware
+# windows of LONG_DOCUMENT_WINDOW_CHARS (keeping only entities), spaCy stops after
+# LONG_DOCUMENT_MAX_TOKENS tokens, and parsers ignore text beyond LONG_DOCUMENT_MAX_CHARS
+LONG_DOCUMENT_CHARS = _env_int("LONG_DOCUMENT_CHARS", 100000)
+LONG_DOCUMENT_WINDOW_CHARS = _env_int("LONG_DOCUMENT_WINDOW_CHARS", 20000)
+LONG_DOCUMENT_MAX_TOKENS = _env_int("LONG_DOCUMENT_MAX_TOKENS", 200000)
+LONG_DOCUMENT_MAX_CHARS = _env_int("LONG_DOCUMENT_MAX_CHARS", 2000000)
+
+# Summarization chunking: texts are split at sentence and section boundaries into chunks
+# that fill the summarization model's input window, counted with its tokenizer (or
+# SUMMARIZATION_CHUNK_TOKENS, when set and smaller); each chunk opens with up to
+# SUMMARIZATION_CHUNK_OVERLAP_TOKENS of the previous chunk's last sentences for context
+SUMMARIZATION_CHUNK_TOKENS = _env_int("SUMMARIZATION_CHUNK_TOKENS", 0)
+SUMMARIZATION_CHUNK_OVERLAP_TOKENS = _env_int("SUMMARIZATION_CHUNK_OVERLAP_TOKENS", 64)
+
+# Sharded deployment: run each agent family in its own pool of worker processes, with a
+# per-worker thread budget for torch/BLAS, instead of all agents in the front-end process
+AGENT_POOLS_ENABLED = _env_bool("AGENT_POOLS_ENABLED", False)
+AGENT_POOL_PARSING_WORKERS = _env_int("AGENT_POOL_PARSING_WORKERS", 2)
+AGENT_POOL_PARSING_THREADS = _env_int("AGENT_POOL_PARSING_THREADS", 1)
+AGENT_POOL_EMBEDDING_WORKERS = _env_int("AGENT_POOL_EMBEDDING_WORKERS", 1)
+AGENT_POOL_EMBEDDING_THREADS = _env_int("AGENT_POOL_EMBEDDING_THREADS", 2)
+AGENT_POOL_SUMMARIZATION_WORKERS = _env_int("AGENT_POOL_SUMMARIZATION_WORKERS", 1)
+AGENT_POOL_SUMMARIZATION_THREADS = _env_int("AGENT_POOL_SUMMARIZATION_THREADS", 2)
+AGENT_POOL_SCHEDULING_WORKERS = _env_int("AGENT_POOL_SCHEDULING_WORKERS", 1)
+AGENT_POOL_SCHEDULING_THREADS = _env_int("AGENT_POOL_SCHEDULING_THREADS", 1)
@@ -1,24 +1,46 @@
-from fastapi import FastAPI, HTTPException
+import asyncio
+import time
+
+# Startup timing starts before the heavier imports
+PROCESS_START = time.perf_counter()
+
+from fastapi import Depends, FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
 import uvicorn
 from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
+from starlette.concurrency import run_in_threadpool
+from typing import List, Dict, Any, Literal, Optional
 
-# Import agents
-from agents.resume_parser import ResumeParserAgent
-from agents.jd_parser import JDParserAgent
-from agents.matching import MatchingAgent
-from agents.summarization import SummarizationAgent
-from agents.gap_detection import GapDetectionAgent
-from agents.scheduler import SchedulerAgent
+# Agents are imported and constructed lazily so startup stays fast and side-effect free
+import config
+from agents import dedup, simple_agents
+from agents.document import Document
+from agents.embeddings import BACKENDS, check_parity, job_embedding_fields, resume_embedding_fields
+from agents.model_loader import load_embedding_backend
+from agents.model_manager import manager as model_manager
+from agents.pools import AgentPools
+from agents.registry import AgentRegistry
+from agents.score_matrix import flush_matrix, get_matrix
+from utils import metrics, priority, profiling, serialization, tracing
+from utils.rpc import RpcServer
+from utils.result_store import get_store
+from utils.singleflight import SingleFlight
 
 # Create FastAPI app
 app = FastAPI(
     title="AI Recruitment Service",
     description="AI Microservices for Recruitment System",
-    version="1.0.0"
+    version="1.0.0",
+    # Model endpoints wait for an execution slot by priority class (interactive or bulk);
+    # coalesced endpoints wait in the single-flight leader instead
+    dependencies=[Depends(priority.prioritized)]
 )
 
+# MessagePack/JSON content negotiation with the fast encoders; must be set before routes are declared
+app.router.route_class = serialization.NegotiatedRoute
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -28,38 +50,288 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize agents
-resume_parser = ResumeParserAgent()
-jd_parser = JDParserAgent()
-matching_agent = MatchingAgent()
-summarization_agent = SummarizationAgent()
-gap_detection_agent = GapDetectionAgent()
-scheduler_agent = SchedulerAgent()
+# Compress large responses (batch results, embedding payloads) for clients that accept gzip
+app.add_middleware(GZipMiddleware, minimum_size=config.COMPRESSION_MIN_BYTES)
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Count requests and record latency per endpoint"""
+    metrics.REQUESTS_IN_PROGRESS.inc()
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by route template so unknown paths don't create new series
+        route = request.scope.get("route")
+        endpoint = route.path if route is not None else "unmatched"
+        metrics.REQUEST_LATENCY.observe(endpoint, value=time.perf_counter() - start)
+        metrics.REQUESTS.inc(endpoint, str(status))
+        metrics.REQUESTS_IN_PROGRESS.dec()
+
+@app.middleware("http")
+async def profile_requests(request: Request, call_next):
+    """Profile requests on admin demand (X-Profile header) or by background sampling"""
+    profile = profiling.start_for_request(request.headers, request.url.path, request.method)
+    if profile is None:
+        return await call_next(request)
+    
+    status = None
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        profiling.finish(profile, status)
+    
+    if profile.mode == "on-demand":
+        response.headers["X-Profile-Id"] = profile.id
+        response.headers["Server-Timing"] = profile.server_timing()
+    return response
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """Continue the caller's trace (traceparent header) with a span covering the request"""
+    # Probes, scrapes and trace reads would crowd real work out of the kept traces
+    if request.url.path.startswith(("/health", "/metrics", "/debug")):
+        return await call_next(request)
+    span = tracing.start_request(f"{request.method} {request.url.path}", request.headers.get("traceparent"))
+    if span is None:
+        return await call_next(request)
+    
+    status = None
+    error = None
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        # Named by route template, like the request metrics
+        route = request.scope.get("route")
+        if route is not None:
+            span.name = f"{request.method} {route.path}"
+        tracing.finish_request(span, status, error)
+    response.headers["X-Trace-Id"] = span.trace_id
+    return response
+
+# Initialize agents (each is constructed on first use or by the background warm-up),
+# in this process or, with AGENT_POOLS_ENABLED, in per-family worker processes
+agent_pools = AgentPools.from_config() if config.AGENT_POOLS_ENABLED else None
+agents = AgentRegistry(["resume_parser", "jd_parser", "matching", "summarization", "gap_detection", "scheduler"],
+                       pools=agent_pools)
+resume_parser = agents["resume_parser"]
+jd_parser = agents["jd_parser"]
+matching_agent = agents["matching"]
+summarization_agent = agents["summarization"]
+gap_detection_agent = agents["gap_detection"]
+scheduler_agent = agents["scheduler"]
+
+def _tiered(request, full_agent, triage_agent):
+    """The agent serving a request: the full agent, or its model-free version for tier "triage" """
+    return triage_agent if request.tier == "triage" else full_agent
+
+# Concurrent identical parse/match/summarize requests share one computation
+flights = SingleFlight(config.SINGLEFLIGHT_ENABLED, admit=priority.admitted)
+
+startup_seconds = None
+rpc_server = RpcServer(app, config.RPC_SOCKET) if config.RPC_SOCKET else None
+
+@app.on_event("startup")
+async def startup():
+    """Start background warm-up and record how long startup took"""
+    global startup_seconds
+    if config.WARMUP:
+        agents.start_warm_up()
+    if rpc_server is not None:
+        await rpc_server.start()
+    startup_seconds = time.perf_counter() - PROCESS_START
+    print(f"AI service accepting traffic after {startup_seconds:.3f}s (warm-up {'on' if config.WARMUP else 'off'})")
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Stop the RPC listener and the agent worker processes"""
+    if rpc_server is not None:
+        await rpc_server.stop()
+    if agent_pools is not None:
+        await run_in_threadpool(agent_pools.shutdown)
+    await run_in_threadpool(flush_matrix)
 
 # Models
 class ContentRequest(BaseModel):
     content: str
     type: Optional[str] = "general"
+    includeEmbeddings: Optional[bool] = False
+    tier: Optional[Literal["full", "triage"]] = "full"
 
 class MatchRequest(BaseModel):
     resume: Dict[str, Any]
     job: Dict[str, Any]
+    useCache: Optional[bool] = True
+    tier: Optional[Literal["full", "triage"]] = "full"
 
 class ScheduleRequest(BaseModel):
     existingSlots: Optional[List[Dict[str, Any]]] = []
     preferences: Optional[Dict[str, Any]] = None
 
+class ParityRequest(BaseModel):
+    backends: Optional[List[str]] = None
+    texts: Optional[List[str]] = None
+    tolerance: Optional[float] = 0.01
+
+class BatchScheduleRequest(BaseModel):
+    candidates: List[Dict[str, Any]]
+    interviewers: List[Dict[str, Any]]
+    preferences: Optional[Dict[str, Any]] = None
+
+class IngestRequest(BaseModel):
+    content: str
+    summarize: Optional[bool] = True
+    includeEmbeddings: Optional[bool] = True
+    detectDuplicates: Optional[bool] = False
+    documentId: Optional[str] = None
+    tier: Optional[Literal["full", "triage"]] = "full"
+
+class DuplicateRequest(BaseModel):
+    content: str
+    documentId: Optional[str] = None
+    threshold: Optional[float] = None
+    metadata: Optional[Dict[str, Any]] = None
+
 @app.get("/")
 async def root():
     """Root endpoint"""
     return {"message": "AI Recruitment Service API", "status": "running"}
 
+@app.get("/health/live")
+async def health_live():
+    """Liveness probe: the process is up and serving"""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def health_ready():
+    """Readiness probe: 200 once models are loaded and warm, 503 before"""
+    report = agents.report()
+    report["startupSeconds"] = startup_seconds
+    report["scheduler"] = priority.scheduler.status()
+    return JSONResponse(report, status_code=200 if report["ready"] else 503)
+
+@app.get("/models")
+async def models():
+    """Model memory budget, resident models with their approximate size, and load/unload events"""
+    return model_manager.report()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus metrics for requests, agent stages, model loads and caches"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/debug/serialization")
+async def serialization_report():
+    """Serialization time per endpoint and the estimated time saved versus stdlib JSON"""
+    return serialization.report()
+
+def _require_profile_admin(request: Request):
+    """Reject profile and trace access without the admin token"""
+    if not profiling.is_admin(request.headers):
+        raise HTTPException(status_code=403, detail="Profiles and traces require a valid X-Profile-Token")
+
+@app.get("/debug/traces")
+async def list_traces(request: Request):
+    """Recent traces kept in memory, newest first"""
+    _require_profile_admin(request)
+    return {"traces": tracing.memory.list()}
+
+@app.get("/debug/traces/{trace_id}")
+async def get_trace(trace_id: str, request: Request):
+    """Every span recorded in this service for one trace"""
+    _require_profile_admin(request)
+    spans = tracing.memory.get(trace_id)
+    if spans is None:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    return {"traceId": trace_id, "spans": spans}
+
+@app.get("/debug/traces/{trace_id}/tree", response_class=PlainTextResponse)
+async def get_trace_tree(trace_id: str, request: Request):
+    """One trace as an indented span tree with start offsets and durations"""
+    _require_profile_admin(request)
+    spans = tracing.memory.get(trace_id)
+    if spans is None:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    return PlainTextResponse(tracing.render(spans))
+
+@app.get("/debug/profiles")
+async def list_profiles(request: Request):
+    """List recent on-demand profiles and the slowest sampled profiles"""
+    _require_profile_admin(request)
+    return profiling.store.list()
+
+@app.get("/debug/profiles/{profile_id}")
+async def get_profile(profile_id: str, request: Request):
+    """Stage breakdown of one profiled request"""
+    _require_profile_admin(request)
+    profile = profiling.store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return profile.to_dict()
+
+@app.get("/debug/profiles/{profile_id}/flamegraph", response_class=PlainTextResponse)
+async def get_profile_flamegraph(profile_id: str, request: Request):
+    """Collapsed stack samples of one profiled request, for flamegraph tools"""
+    _require_profile_admin(request)
+    profile = profiling.store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(profile.collapsed_stacks())
+
+# Given in place of embeddings when the matching agent is the simplified fallback
+EMBEDDINGS_UNAVAILABLE = "The sentence model is unavailable, so texts can't be encoded"
+
+def _can_embed() -> bool:
+    """Whether the matching agent can encode texts (the simplified fallback has no sentence model)"""
+    return hasattr(matching_agent, "embed")
+
+def _with_embeddings(result: Dict[str, Any], fields: Dict[str, List[str]]) -> Dict[str, Any]:
+    """Ship vectors with the parse so /match and /detect-gaps can skip encoding, or say why there are none"""
+    if _can_embed():
+        result["embeddings"] = matching_agent.embed(fields)
+    else:
+        result["embeddings"] = None
+        result["embeddingsUnavailable"] = EMBEDDINGS_UNAVAILABLE
+    return result
+
+def _parse_resume(request: ContentRequest) -> Dict[str, Any]:
+    result = _tiered(request, resume_parser, simple_agents.resume_parser).parse(request.content)
+    # The triage tier has no sentence model (and its matching doesn't use vectors)
+    if request.includeEmbeddings and request.tier != "triage":
+        _with_embeddings(result, resume_embedding_fields(result))
+    return result
+
+def _parse_job(request: ContentRequest) -> Dict[str, Any]:
+    result = _tiered(request, jd_parser, simple_agents.jd_parser).parse(request.content)
+    if request.includeEmbeddings and request.tier != "triage":
+        _with_embeddings(result, job_embedding_fields(result))
+    return result
+
+def _memoized(kind: str, agent, compute, request: MatchRequest):
+    """Run a resume/job comparison, through the result store unless disabled; returns (result, cache state)"""
+    if config.RESULT_STORE_ENABLED and request.useCache:
+        # Unchanged resume, job and scorer: return the stored result
+        result, hit = get_store().memoize(kind, agent, request.resume, request.job, compute)
+        if hit is not None:
+            return result, "hit" if hit else "miss"
+        return result, None
+    return compute(request.resume, request.job), None
+
 @app.post("/parse-resume")
 async def parse_resume(request: ContentRequest):
     """Parse resume text and extract structured information"""
     try:
-        result = resume_parser.parse(request.content)
-        return result
+        return await flights.run("/parse-resume", request, _parse_resume, request)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error parsing resume: {str(e)}")
 
@@ -67,17 +339,76 @@ async def parse_resume(request: ContentRequest):
 async def parse_job(request: ContentRequest):
     """Parse job description text and extract structured information"""
     try:
-        result = jd_parser.parse(request.content)
-        return result
+        return await flights.run("/parse-job", request, _parse_job, request)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error parsing job description: {str(e)}")
 
+@app.post("/ingest-resume")
+async def ingest_resume(request: IngestRequest):
+    """
+    Parse, summarize, embed and check a resume for duplicates in one request
+    
+    The stages share one Document (one spaCy parse, one word split) and run
+    concurrently; a failed stage is reported in `errors` while the others still return.
+    """
+    document = Document(request.content)
+    errors: Dict[str, str] = {}
+    timings: Dict[str, float] = {}
+    
+    async def run_stage(name: str, fn, *args):
+        start = time.perf_counter()
+        try:
+            with tracing.span(f"ingest.{name}"):
+                return await run_in_threadpool(fn, *args)
+        except Exception as e:
+            errors[name] = str(e)
+            return None
+        finally:
+            timings[name] = round((time.perf_counter() - start) * 1000, 2)
+    
+    parser = _tiered(request, resume_parser, simple_agents.resume_parser)
+    summarizer = _tiered(request, summarization_agent, simple_agents.summarization_agent)
+    
+    async def parse_and_embed():
+        parsed = await run_stage("parse", parser.parse, document)
+        if parsed is not None and request.includeEmbeddings and request.tier != "triage":
+            # Without a sentence model the stage is skipped: null embeddings and the reason, not an error
+            await run_stage("embed", lambda: _with_embeddings(parsed, resume_embedding_fields(parsed)))
+        return parsed
+    
+    async def nothing():
+        return None
+    
+    # Independent stages run at the same time; embedding waits for the parse it encodes
+    parsed_data, summary, duplicates = await asyncio.gather(
+        parse_and_embed(),
+        run_stage("summarize", summarizer.summarize, document, "resume") if request.summarize else nothing(),
+        run_stage("dedup", lambda: dedup.get_index().check_and_add(document, request.documentId))
+        if request.detectDuplicates or request.documentId else nothing())
+    
+    if errors and len(errors) == len(timings):
+        raise HTTPException(status_code=500, detail=f"Error ingesting resume: {errors}")
+    return {
+        "parsedData": parsed_data,
+        "summary": summary,
+        "duplicates": duplicates,
+        "errors": errors,
+        "timingsMs": timings
+    }
+
 @app.post("/match")
-async def match(request: MatchRequest):
+async def match(request: MatchRequest, response: Response):
     """Match resume with job description and return match score"""
     try:
-        result = matching_agent.match(request.resume, request.job)
+        agent = _tiered(request, matching_agent, simple_agents.matching_agent)
+        result, cache_state = await flights.run("/match", request, _memoized, "match", agent, agent.match, request)
+        if cache_state:
+            response.headers["X-Result-Cache"] = cache_state
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error matching resume with job: {str(e)}")
 
@@ -85,17 +416,26 @@ async def match(request: MatchRequest):
 async def summarize(request: ContentRequest):
     """Summarize text content"""
     try:
-        result = summarization_agent.summarize(request.content, request.type)
+        agent = _tiered(request, summarization_agent, simple_agents.summarization_agent)
+        result = await flights.run("/summarize", request, agent.summarize, request.content, request.type)
         return {"summary": result}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error summarizing content: {str(e)}")
 
 @app.post("/detect-gaps")
-async def detect_gaps(request: MatchRequest):
+async def detect_gaps(request: MatchRequest, response: Response):
     """Detect gaps between resume and job requirements"""
     try:
-        result = gap_detection_agent.detect(request.resume, request.job)
+        agent = _tiered(request, gap_detection_agent, simple_agents.gap_detection_agent)
+        result, cache_state = await flights.run("/detect-gaps", request, _memoized, "gaps", agent, agent.detect,
+                                                request)
+        if cache_state:
+            response.headers["X-Result-Cache"] = cache_state
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error detecting gaps: {str(e)}")
 
@@ -108,5 +448,150 @@ async def schedule_slots(request: ScheduleRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error scheduling slots: {str(e)}")
 
+@app.post("/schedule-batch")
+async def schedule_batch(request: BatchScheduleRequest):
+    """Assign a batch of candidates to conflict-free interview slots"""
+    try:
+        result = scheduler_agent.schedule_batch(request.candidates, request.interviewers, request.preferences)
+        return result
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error scheduling batch: {str(e)}")
+
+def _embedding_backend_parity(request: ParityRequest) -> Dict[str, Any]:
+    reference = load_embedding_backend("torch")
+    names = request.backends or [name for name in BACKENDS if name != "torch"]
+    
+    candidates = []
+    errors = {}
+    for name in names:
+        try:
+            candidates.append(load_embedding_backend(name))
+        except Exception as e:
+            errors[name] = str(e)
+    
+    result = check_parity(reference, candidates, request.texts, request.tolerance)
+    result["active"] = config.EMBEDDING_BACKEND
+    result["errors"] = errors
+    return result
+
+@app.post("/embedding-backends/parity")
+async def embedding_backend_parity(request: ParityRequest):
+    """Compare embedding backends with eager torch: cosine drift and speedup"""
+    try:
+        # Loads and encodes with every backend, so it runs off the event loop
+        return await run_in_threadpool(_embedding_backend_parity, request)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error checking embedding backends: {str(e)}")
+
+@app.get("/match-results")
+async def match_results():
+    """Size of the stored match and gap results"""
+    return get_store().stats()
+
+@app.post("/resume-duplicates")
+async def resume_duplicates(request: DuplicateRequest):
+    """Find near-duplicates of a resume, indexing it under documentId when one is given"""
+    try:
+        index = dedup.get_index()
+        duplicates = index.check_and_add(request.content, request.documentId, request.threshold, request.metadata)
+        return {
+            "duplicates": duplicates,
+            "indexed": bool(request.documentId),
+            "indexSize": len(index)
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error detecting duplicates: {str(e)}")
+
+@app.delete("/resume-duplicates/{document_id}")
+async def remove_resume_duplicate(document_id: str):
+    """Remove a resume from the duplicate index"""
+    if not dedup.get_index().remove(document_id):
+        raise HTTPException(status_code=404, detail="Document not indexed")
+    return {"removed": document_id}
+
+def _score_matrix_payload(kind: str, document: Dict[str, Any]) -> Dict[str, Any]:
+    """Embeddings payload of a parsed resume/job, encoded unless it came with usable vectors"""
+    payload = document.get("embeddings")
+    model_id = get_matrix().model_id
+    if not payload or (model_id is not None and payload.get("modelId") != model_id):
+        if not _can_embed():
+            raise HTTPException(status_code=503, detail="Sentence model unavailable; the score matrix can't be updated")
+        fields = resume_embedding_fields(document) if kind == "candidate" else job_embedding_fields(document)
+        payload = matching_agent.embed(fields)
+    return payload
+
+def _upsert_score_matrix(kind: str, doc_id: str, document: Dict[str, Any], k: int) -> List[Dict[str, Any]]:
+    matrix = get_matrix()
+    matrix.upsert(kind, doc_id, _score_matrix_payload(kind, document))
+    return matrix.top(kind, doc_id, k)
+
+@app.get("/score-matrix")
+async def score_matrix_stats():
+    """Size and model of the materialized candidate x job score matrix"""
+    return get_matrix().stats()
+
+@app.put("/score-matrix/candidates/{candidate_id}")
+async def upsert_score_matrix_candidate(candidate_id: str, resume: Dict[str, Any], k: int = 10):
+    """Add or update a candidate (parsed resume, optionally with embeddings) and recompute its row"""
+    try:
+        top = await run_in_threadpool(_upsert_score_matrix, "candidate", candidate_id, resume, k)
+        return {"candidateId": candidate_id, "topJobs": [{"jobId": item["id"], "score": item["score"]} for item in top]}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error updating score matrix: {str(e)}")
+
+@app.put("/score-matrix/jobs/{job_id}")
+async def upsert_score_matrix_job(job_id: str, job: Dict[str, Any], k: int = 10):
+    """Add or update a job (parsed job description, optionally with embeddings) and recompute its column"""
+    try:
+        top = await run_in_threadpool(_upsert_score_matrix, "job", job_id, job, k)
+        return {"jobId": job_id,
+                "topCandidates": [{"candidateId": item["id"], "score": item["score"]} for item in top]}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error updating score matrix: {str(e)}")
+
+@app.get("/score-matrix/candidates/{candidate_id}/top-jobs")
+async def score_matrix_top_jobs(candidate_id: str, k: int = 10):
+    """Best-scoring jobs of a candidate, read from the score matrix"""
+    try:
+        top = await run_in_threadpool(get_matrix().top, "candidate", candidate_id, k)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Candidate not in the score matrix")
+    return {"candidateId": candidate_id, "jobs": [{"jobId": item["id"], "score": item["score"]} for item in top]}
+
+@app.get("/score-matrix/jobs/{job_id}/top-candidates")
+async def score_matrix_top_candidates(job_id: str, k: int = 10):
+    """Best-scoring candidates of a job, read from the score matrix"""
+    try:
+        top = await run_in_threadpool(get_matrix().top, "job", job_id, k)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Job not in the score matrix")
+    return {"jobId": job_id, "candidates": [{"candidateId": item["id"], "score": item["score"]} for item in top]}
+
+@app.delete("/score-matrix/candidates/{candidate_id}")
+async def remove_score_matrix_candidate(candidate_id: str):
+    """Remove a candidate from the score matrix"""
+    if not await run_in_threadpool(get_matrix().remove, "candidate", candidate_id):
+        raise HTTPException(status_code=404, detail="Candidate not in the score matrix")
+    return {"removed": candidate_id}
+
+@app.delete("/score-matrix/jobs/{job_id}")
+async def remove_score_matrix_job(job_id: str):
+    """Remove a job from the score matrix"""
+    if not await run_in_threadpool(get_matrix().remove, "job", job_id):
+        raise HTTPException(status_code=404, detail="Job not in the score matrix")
+    return {"removed": job_id}
+
+@app.post("/score-matrix/rebuild")
+async def rebuild_score_matrix():
+    """Recompute every score from the stored vectors with blocked matrix products"""
+    try:
+        return await run_in_threadpool(get_matrix().rebuild)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error rebuilding score matrix: {str(e)}")
+
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
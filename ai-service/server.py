@@ -0,0 +1,58 @@
+import os
+import socket
+
+import uvicorn
+
+import config
+
+
+def _tcp_socket(host: str, port: int) -> socket.socket:
+    # IPPROTO_TCP explicitly: asyncio only sets TCP_NODELAY on accepted connections of
+    # sockets created with it, and without it keep-alive responses stall on delayed ACKs
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM,
+                         socket.IPPROTO_TCP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    return sock
+
+
+def _unix_socket(path: str) -> socket.socket:
+    if os.path.exists(path):
+        os.unlink(path)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(path)
+    os.chmod(path, 0o660)
+    return sock
+
+
+def serve() -> None:
+    """
+    Run the AI service on TCP and, when AI_SERVICE_UDS is set, on a Unix domain socket
+    
+    Both listeners share one event loop and one app. Connections are kept alive for
+    AI_SERVICE_KEEPALIVE_TIMEOUT seconds and HTTP/1.1 pipelined requests are answered
+    in order. The binary RPC socket (AI_SERVICE_RPC_SOCKET) is started by the app itself.
+    """
+    server = uvicorn.Server(uvicorn.Config(
+        "main:app",
+        timeout_keep_alive=config.KEEPALIVE_TIMEOUT,
+        backlog=2048,
+        # httptools and uvloop when installed
+        http="auto",
+        loop="auto",
+        access_log=False))
+    
+    sockets = [_tcp_socket(config.HOST, config.PORT)]
+    if config.UDS_PATH:
+        sockets.append(_unix_socket(config.UDS_PATH))
+    print(f"AI service on {config.HOST}:{config.PORT}" + (f" and {config.UDS_PATH}" if config.UDS_PATH else ""))
+    
+    try:
+        server.run(sockets=sockets)
+    finally:
+        if config.UDS_PATH and os.path.exists(config.UDS_PATH):
+            os.unlink(config.UDS_PATH)
+
+
+if __name__ == "__main__":
+    serve()
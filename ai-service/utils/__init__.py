@@ -0,0 +1 @@
+# Shared infrastructure for the AI service (metrics, caching, transport helpers)
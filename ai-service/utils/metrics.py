@@ -0,0 +1,285 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Tuple, List, Optional, Sequence
+
+# Latency buckets in seconds, from sub-millisecond regex work up to long BART generations
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(labelnames: Sequence[str], labelvalues: Sequence[str], extra: str = "") -> str:
+    """Render a Prometheus label set"""
+    parts = []
+    for name, value in zip(labelnames, labelvalues):
+        escaped = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{name}="{escaped}"')
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    """Render a sample value the way Prometheus expects"""
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """Base class for a labelled metric family"""
+    
+    type_name = "untyped"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], float] = {}
+    
+    def _key(self, labels: Sequence[str]) -> Tuple[str, ...]:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {labels}")
+        return tuple(str(label) for label in labels)
+    
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter"""
+    
+    type_name = "counter"
+    
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+    
+    def get(self, *labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+    
+    type_name = "gauge"
+    
+    def set(self, *labels: str, value: float) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+    
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+    
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+    
+    def get(self, *labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Histogram(_Metric):
+    """Bucketed distribution of observed values"""
+    
+    type_name = "histogram"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [per-bucket counts (last one is +Inf), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+    
+    def observe(self, *labels: str, value: float) -> None:
+        key = self._key(labels)
+        # Counts are stored per bucket and made cumulative only when rendering
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                self._series[key] = series
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+    
+    def snapshot(self, *labels: str) -> Optional[Dict[str, float]]:
+        """Return the sum and count for one label set"""
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            if series is None:
+                return None
+            return {"sum": series[1], "count": series[2]}
+    
+    def snapshots(self) -> Dict[Tuple[str, ...], Dict[str, float]]:
+        """Return the sum and count of every label set"""
+        with self._lock:
+            return {labels: {"sum": series[1], "count": series[2]} for labels, series in self._series.items()}
+    
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        with self._lock:
+            items = [(labels, list(series[0]), series[1], series[2]) for labels, series in self._series.items()]
+        for labels, counts, total, count in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = _format_labels(self.labelnames, labels, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            label_str = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_str} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_str} {count}")
+        return lines
+
+
+class Registry:
+    """Collection of metrics rendered together in Prometheus text format"""
+    
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors = []
+    
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+    
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+    
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+    
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+    
+    def add_collector(self, collector) -> None:
+        """Register a callable run before rendering to refresh derived metrics"""
+        self._collectors.append(collector)
+    
+    def render(self) -> str:
+        for collector in self._collectors:
+            collector()
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+REQUESTS = REGISTRY.counter(
+    "ai_service_requests_total", "HTTP requests handled, by endpoint and status code", ["endpoint", "status"])
+REQUEST_LATENCY = REGISTRY.histogram(
+    "ai_service_request_duration_seconds", "HTTP request latency by endpoint", ["endpoint"])
+REQUESTS_IN_PROGRESS = REGISTRY.gauge(
+    "ai_service_requests_in_progress", "Requests accepted but not yet answered (queue depth)")
+STAGE_LATENCY = REGISTRY.histogram(
+    "ai_service_stage_duration_seconds", "Latency of stages inside each agent", ["agent", "stage"])
+MODEL_LOAD_SECONDS = REGISTRY.gauge(
+    "ai_service_model_load_seconds", "Time taken to load each model", ["model"])
+MODEL_RESIDENT_BYTES = REGISTRY.gauge(
+    "ai_service_model_resident_bytes", "Approximate resident memory of each loaded model (0 once unloaded)",
+    ["model"])
+MODEL_EVENTS = REGISTRY.counter(
+    "ai_service_model_events_total", "Model loads and unloads by reason (demand, reload, budget, idle)",
+    ["model", "event", "reason"])
+LONG_DOCUMENTS = REGISTRY.counter(
+    "ai_service_long_documents_total", "Texts parsed in long-document windows, by whether the token limit stopped parsing",
+    ["outcome"])
+AGENT_POOL_CALLS = REGISTRY.counter(
+    "ai_service_agent_pool_calls_total", "Agent calls sent to worker pools, by pool and result", ["pool", "result"])
+AGENT_POOL_CALL_SECONDS = REGISTRY.histogram(
+    "ai_service_agent_pool_call_seconds", "Agent call latency through a worker pool, including IPC", ["pool"])
+TRACE_SPANS = REGISTRY.counter(
+    "ai_service_trace_spans_total", "Spans recorded for traced requests, including agent pool workers' spans")
+CACHE_REQUESTS = REGISTRY.counter(
+    "ai_service_cache_requests_total", "Cache lookups by cache and result (hit or miss)", ["cache", "result"])
+CACHE_HIT_RATIO = REGISTRY.gauge(
+    "ai_service_cache_hit_ratio", "Share of cache lookups that were hits", ["cache"])
+SINGLEFLIGHT_REQUESTS = REGISTRY.counter(
+    "ai_service_singleflight_requests_total",
+    "Coalescable requests by role: leaders ran the computation, followers shared a leader's result",
+    ["endpoint", "role"])
+SINGLEFLIGHT_IN_FLIGHT = REGISTRY.gauge(
+    "ai_service_singleflight_in_flight", "Distinct computations currently shared by identical requests")
+PRIORITY_QUEUE_DEPTH = REGISTRY.gauge(
+    "ai_service_priority_queue_depth", "Requests waiting for an execution slot, by priority class", ["priority"])
+PRIORITY_RUNNING = REGISTRY.gauge(
+    "ai_service_priority_running", "Requests holding an execution slot, by priority class", ["priority"])
+PRIORITY_QUEUE_WAIT = REGISTRY.histogram(
+    "ai_service_priority_queue_wait_seconds", "Time requests waited for an execution slot", ["priority"])
+PRIORITY_SHED = REGISTRY.counter(
+    "ai_service_priority_shed_total", "Requests refused under overload, by priority class and reason",
+    ["priority", "reason"])
+SERIALIZATION_SECONDS = REGISTRY.histogram(
+    "ai_service_serialization_seconds", "Time spent decoding request bodies and encoding responses",
+    ["endpoint", "direction", "format"])
+SERIALIZATION_BASELINE_SECONDS = REGISTRY.histogram(
+    "ai_service_serialization_baseline_seconds",
+    "Time the stdlib JSON encoder/decoder takes on a sample of the same payloads", ["endpoint", "direction"])
+
+
+def _update_cache_hit_ratio() -> None:
+    """Derive hit ratios from the hit/miss counters"""
+    totals: Dict[str, Dict[str, float]] = {}
+    with CACHE_REQUESTS._lock:
+        for (cache, result), value in CACHE_REQUESTS._values.items():
+            totals.setdefault(cache, {})[result] = value
+    for cache, counts in totals.items():
+        lookups = counts.get("hit", 0) + counts.get("miss", 0)
+        CACHE_HIT_RATIO.set(cache, value=counts.get("hit", 0) / lookups if lookups else 0.0)
+
+
+REGISTRY.add_collector(_update_cache_hit_ratio)
+
+
+# Callables run when a stage starts; each may return a callback that receives the stage duration
+_STAGE_HOOKS = []
+
+
+def add_stage_hook(hook) -> None:
+    """Register a hook called as hook(agent, name) at the start of every stage"""
+    _STAGE_HOOKS.append(hook)
+
+
+@contextmanager
+def stage(agent: str, name: str):
+    """Time a stage inside an agent, e.g. `with stage("resume_parser", "spacy"):`"""
+    finishers = [hook(agent, name) for hook in _STAGE_HOOKS]
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_LATENCY.observe(agent, name, value=elapsed)
+        for finish in finishers:
+            if finish is not None:
+                finish(elapsed)
+
+
+def record_model_load(model: str, seconds: float) -> None:
+    """Record how long a model took to load"""
+    MODEL_LOAD_SECONDS.set(model, value=seconds)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """Record a cache lookup result"""
+    CACHE_REQUESTS.inc(cache, "hit" if hit else "miss")
+
+
+def render() -> str:
+    """Render all metrics in Prometheus text exposition format"""
+    return REGISTRY.render()
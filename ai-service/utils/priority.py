@@ -0,0 +1,241 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, Optional
+
+from fastapi import HTTPException, Request
+
+import config
+from utils import metrics, tracing
+
+# Priority classes, highest first
+INTERACTIVE = "interactive"
+BULK = "bulk"
+CLASSES = (INTERACTIVE, BULK)
+
+# Endpoints that are bulk work unless the caller says otherwise (X-Priority header)
+BULK_ENDPOINTS = {"/summarize", "/ingest-resume", "/schedule-batch", "/embedding-backends/parity",
+                  "/score-matrix/rebuild"}
+
+# Coalesced endpoints take their slot in the single-flight leader (see admitted), so
+# identical requests waiting on that computation don't hold or queue for slots of their own
+COALESCED_ENDPOINTS = {"/parse-resume", "/parse-job", "/match", "/summarize", "/detect-gaps"}
+
+# Priority class of the request being handled, set by the prioritized dependency
+_request_priority: ContextVar[str] = ContextVar("request_priority", default=INTERACTIVE)
+
+
+class Overloaded(Exception):
+    """Raised when a request is shed instead of queued"""
+    
+    def __init__(self, priority: str, reason: str, retry_after: int = 1):
+        super().__init__(f"{priority} request shed ({reason})")
+        self.priority = priority
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def classify(path: str, header: Optional[str]) -> str:
+    """Priority class from the X-Priority header, else from the endpoint"""
+    if header:
+        value = header.strip().lower()
+        if value in CLASSES:
+            return value
+    return BULK if path in BULK_ENDPOINTS else INTERACTIVE
+
+
+class PriorityScheduler:
+    """
+    Admits requests into a fixed number of execution slots, by priority class
+    
+    Waiting requests sit in one queue per class. A freed slot goes to the class with
+    the lowest stride pass (weighted round robin), so interactive work gets most slots
+    without starving bulk work. Bulk requests may never hold the slots reserved for
+    interactive traffic. When the queues are full, a waiting lower-priority request
+    is shed to make room before a higher-priority one is refused.
+    """
+    
+    def __init__(self, concurrency: int, weights: Dict[str, int], queue_limit: int,
+                 max_wait: Dict[str, float], interactive_reserved: int = 1):
+        self.concurrency = concurrency
+        self.weights = weights
+        self.queue_limit = queue_limit
+        self.max_wait = max_wait
+        # Slots bulk work can't take, so an interactive request never waits behind a full bulk batch
+        self.interactive_reserved = min(interactive_reserved, concurrency - 1)
+        self.running = {cls: 0 for cls in CLASSES}
+        self.queues = {cls: deque() for cls in CLASSES}
+        self.passes = {cls: 0.0 for cls in CLASSES}
+    
+    def _can_run(self, priority: str) -> bool:
+        busy = sum(self.running.values())
+        if busy >= self.concurrency:
+            return False
+        if priority == BULK:
+            return self.running[BULK] < self.concurrency - self.interactive_reserved
+        return True
+    
+    def _start(self, priority: str) -> None:
+        self.running[priority] += 1
+        self.passes[priority] += 1.0 / self.weights[priority]
+        metrics.PRIORITY_RUNNING.set(priority, value=self.running[priority])
+    
+    def _queued(self) -> int:
+        return sum(len(queue) for queue in self.queues.values())
+    
+    def _update_depth(self) -> None:
+        for cls, queue in self.queues.items():
+            metrics.PRIORITY_QUEUE_DEPTH.set(cls, value=len(queue))
+    
+    def _shed_lower(self, priority: str) -> bool:
+        """Refuse the newest waiting request of a lower class; False if there is none"""
+        for cls in reversed(CLASSES[CLASSES.index(priority) + 1:]):
+            queue = self.queues[cls]
+            while queue:
+                waiter = queue.pop()
+                if not waiter.done():
+                    waiter.set_exception(Overloaded(cls, "displaced"))
+                    return True
+        return False
+    
+    def _dispatch(self) -> None:
+        """Hand free slots to waiting requests, lowest pass first"""
+        while True:
+            ready = [cls for cls in CLASSES if self.queues[cls] and self._can_run(cls)]
+            if not ready:
+                break
+            cls = min(ready, key=lambda c: (self.passes[c], CLASSES.index(c)))
+            waiter = self.queues[cls].popleft()
+            if waiter.done():
+                continue
+            self._start(cls)
+            waiter.set_result(True)
+        self._update_depth()
+    
+    def _activate(self, priority: str) -> None:
+        """Bring an idle class's pass up to the busy ones so it doesn't burst on return"""
+        if self.running[priority] or self.queues[priority]:
+            return
+        busy = [self.passes[cls] for cls in CLASSES if self.running[cls] or self.queues[cls]]
+        if busy:
+            self.passes[priority] = max(self.passes[priority], min(busy))
+    
+    def _forget(self, priority: str, waiter: asyncio.Future) -> None:
+        try:
+            self.queues[priority].remove(waiter)
+        except ValueError:
+            pass
+        self._update_depth()
+    
+    async def acquire(self, priority: str) -> float:
+        """Wait for a slot; returns the time spent queued or raises Overloaded"""
+        self._activate(priority)
+        if not self.queues[priority] and self._can_run(priority):
+            self._start(priority)
+            return 0.0
+        
+        if self._queued() >= self.queue_limit and not self._shed_lower(priority):
+            metrics.PRIORITY_SHED.inc(priority, "queue_full")
+            raise Overloaded(priority, "queue_full")
+        
+        waiter = asyncio.get_running_loop().create_future()
+        self.queues[priority].append(waiter)
+        self._update_depth()
+        start = time.perf_counter()
+        try:
+            await asyncio.wait({waiter}, timeout=self.max_wait[priority])
+        except asyncio.CancelledError:
+            # Client went away: give back a slot handed to us meanwhile
+            if waiter.done() and not waiter.cancelled() and waiter.exception() is None:
+                self.release(priority)
+            else:
+                waiter.cancel()
+                self._forget(priority, waiter)
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            metrics.PRIORITY_QUEUE_WAIT.observe(priority, value=waited)
+        
+        if not waiter.done():
+            waiter.cancel()
+            self._forget(priority, waiter)
+            metrics.PRIORITY_SHED.inc(priority, "timeout")
+            raise Overloaded(priority, "timeout")
+        if waiter.exception() is not None:
+            metrics.PRIORITY_SHED.inc(priority, "displaced")
+            raise waiter.exception()
+        return waited
+    
+    def release(self, priority: str) -> None:
+        self.running[priority] -= 1
+        metrics.PRIORITY_RUNNING.set(priority, value=self.running[priority])
+        self._dispatch()
+    
+    @asynccontextmanager
+    async def slot(self, priority: str):
+        """Hold an execution slot for the duration of the block"""
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release(priority)
+    
+    def status(self) -> Dict[str, Any]:
+        return {
+            "concurrency": self.concurrency,
+            "interactiveReserved": self.interactive_reserved,
+            "queueLimit": self.queue_limit,
+            "running": dict(self.running),
+            "queued": {cls: len(queue) for cls, queue in self.queues.items()}
+        }
+
+
+scheduler = PriorityScheduler(
+    concurrency=config.PRIORITY_CONCURRENCY,
+    weights={INTERACTIVE: config.PRIORITY_INTERACTIVE_WEIGHT, BULK: 1},
+    queue_limit=config.PRIORITY_QUEUE_LIMIT,
+    max_wait={INTERACTIVE: config.PRIORITY_INTERACTIVE_MAX_WAIT, BULK: config.PRIORITY_BULK_MAX_WAIT},
+    interactive_reserved=config.PRIORITY_INTERACTIVE_RESERVED)
+
+
+@asynccontextmanager
+async def admitted(priority: Optional[str] = None):
+    """
+    Hold an execution slot for the current request's class while the block runs
+    
+    Requests the scheduler refuses get a 503 with Retry-After.
+    """
+    priority = priority or _request_priority.get()
+    try:
+        with tracing.span("queue.wait", priority=priority):
+            await scheduler.acquire(priority)
+    except Overloaded as e:
+        raise HTTPException(status_code=503, detail=f"Service overloaded: {e}",
+                            headers={"Retry-After": str(e.retry_after)})
+    try:
+        yield
+    finally:
+        scheduler.release(priority)
+
+
+async def prioritized(request: Request):
+    """
+    FastAPI dependency classifying model endpoints and holding an execution slot while they run
+    
+    Coalesced endpoints only record their class here; the computation they share waits for the slot.
+    """
+    if request.method != "POST":
+        yield
+        return
+    
+    route = request.scope.get("route")
+    path = route.path if route is not None else request.url.path
+    priority = classify(path, request.headers.get("x-priority"))
+    _request_priority.set(priority)
+    if path in COALESCED_ENDPOINTS:
+        yield
+        return
+    async with admitted(priority):
+        yield
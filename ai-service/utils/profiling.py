@@ -0,0 +1,240 @@
+import heapq
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter as StackCounter, deque
+from contextvars import ContextVar
+from typing import Dict, Any, List, Optional
+
+import config
+from utils import metrics
+
+# Profile attached to the request being handled, if any
+_current_profile: ContextVar[Optional["Profile"]] = ContextVar("current_profile", default=None)
+
+
+class Profile:
+    """Stage timings and stack samples collected for one request"""
+    
+    def __init__(self, endpoint: str, method: str, mode: str):
+        self.id = uuid.uuid4().hex[:16]
+        self.endpoint = endpoint
+        self.method = method
+        self.mode = mode  # 'on-demand' or 'sampled'
+        self.started_at = time.time()
+        self.duration = 0.0
+        self.status = None
+        self.stages: List[Dict[str, Any]] = []
+        self.stacks = StackCounter()
+        # Threads running this request's stages right now, with their stage nesting depth
+        self.threads = StackCounter()
+        self._threads_lock = threading.Lock()
+        self._start = time.perf_counter()
+    
+    def attach_current_thread(self) -> None:
+        """Sample the calling thread until the matching detach_current_thread"""
+        with self._threads_lock:
+            self.threads[threading.get_ident()] += 1
+    
+    def detach_current_thread(self) -> None:
+        """Stop sampling the calling thread once its outermost stage ends"""
+        thread_id = threading.get_ident()
+        with self._threads_lock:
+            self.threads[thread_id] -= 1
+            if self.threads[thread_id] <= 0:
+                del self.threads[thread_id]
+    
+    def sampled_threads(self) -> List[int]:
+        with self._threads_lock:
+            return list(self.threads)
+    
+    def stage_breakdown(self) -> List[Dict[str, Any]]:
+        """Aggregate stage timings by agent and stage name"""
+        totals: Dict[tuple, Dict[str, Any]] = {}
+        for entry in self.stages:
+            key = (entry["agent"], entry["stage"])
+            total = totals.setdefault(key, {"agent": key[0], "stage": key[1], "ms": 0.0, "count": 0})
+            total["ms"] += entry["ms"]
+            total["count"] += 1
+        return sorted(totals.values(), key=lambda t: t["ms"], reverse=True)
+    
+    def server_timing(self) -> str:
+        """Stage breakdown as a Server-Timing header value"""
+        parts = [f"{t['agent']}.{t['stage']};dur={t['ms']:.2f}" for t in self.stage_breakdown()]
+        parts.append(f"total;dur={self.duration * 1000:.2f}")
+        return ", ".join(parts)
+    
+    def collapsed_stacks(self) -> str:
+        """Samples in collapsed-stack format (flamegraph.pl, speedscope, inferno)"""
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common()) + "\n"
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "endpoint": self.endpoint,
+            "method": self.method,
+            "mode": self.mode,
+            "status": self.status,
+            "startedAt": self.started_at,
+            "durationMs": self.duration * 1000,
+            "samples": sum(self.stacks.values()),
+            "stages": self.stage_breakdown()
+        }
+
+
+class StackSampler:
+    """
+    Background thread that samples the stacks of threads serving profiled requests
+    
+    A thread is sampled only while it runs one of the request's stages. The event loop and
+    the thread pool are shared with other requests, so between stages their frames may
+    belong to other work and are not sampled; routing, validation and serialization
+    outside stages are left out of the flamegraph.
+    """
+    
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._active: List[Profile] = []
+        self._lock = threading.Lock()
+        self._thread = None
+    
+    def add(self, profile: Profile) -> None:
+        with self._lock:
+            self._active.append(profile)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+                self._thread.start()
+    
+    def remove(self, profile: Profile) -> None:
+        with self._lock:
+            if profile in self._active:
+                self._active.remove(profile)
+    
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while True:
+            with self._lock:
+                if not self._active:
+                    self._thread = None
+                    return
+                active = list(self._active)
+            
+            frames = sys._current_frames()
+            for profile in active:
+                for thread_id in profile.sampled_threads():
+                    frame = frames.get(thread_id)
+                    if frame is not None and thread_id != own_id:
+                        profile.stacks[_collapse(frame)] += 1
+            del frames
+            
+            time.sleep(self.interval)
+
+
+def _collapse(frame) -> str:
+    """Render a frame's call stack root-first, separated by semicolons"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class ProfileStore:
+    """Keeps recent on-demand profiles and the slowest sampled profiles"""
+    
+    def __init__(self, keep_recent: int, keep_slowest: int):
+        self.keep_slowest = keep_slowest
+        self._recent = deque(maxlen=keep_recent)
+        # Min-heap on duration so the fastest of the kept profiles is evicted first
+        self._slowest = []
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+    
+    def add(self, profile: Profile) -> None:
+        with self._lock:
+            if profile.mode == "on-demand":
+                self._recent.append(profile)
+                return
+            entry = (profile.duration, next(self._sequence), profile)
+            if len(self._slowest) < self.keep_slowest:
+                heapq.heappush(self._slowest, entry)
+            elif self._slowest and profile.duration > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, entry)
+    
+    def get(self, profile_id: str) -> Optional[Profile]:
+        with self._lock:
+            for profile in itertools.chain(self._recent, (entry[2] for entry in self._slowest)):
+                if profile.id == profile_id:
+                    return profile
+        return None
+    
+    def list(self) -> Dict[str, List[Dict[str, Any]]]:
+        with self._lock:
+            recent = [p.to_dict() for p in reversed(self._recent)]
+            slowest = [entry[2].to_dict() for entry in sorted(self._slowest, reverse=True)]
+        return {"recent": recent, "slowest": slowest}
+
+
+sampler = StackSampler(config.PROFILE_SAMPLE_INTERVAL_MS / 1000.0)
+store = ProfileStore(config.PROFILE_KEEP_RECENT, config.PROFILE_KEEP_SLOWEST)
+
+
+def is_admin(headers) -> bool:
+    """Check the admin token that unlocks on-demand profiling"""
+    return bool(config.PROFILE_ADMIN_TOKEN) and headers.get("x-profile-token") == config.PROFILE_ADMIN_TOKEN
+
+
+def start_for_request(headers, endpoint: str, method: str) -> Optional[Profile]:
+    """
+    Start profiling a request if requested by an admin or picked by sampling
+    
+    Args:
+        headers: Request headers
+        endpoint: Request path
+        method: HTTP method
+    
+    Returns:
+        The active Profile, or None when the request is not profiled
+    """
+    if headers.get("x-profile") in ("1", "true") and is_admin(headers):
+        mode = "on-demand"
+    elif config.PROFILE_SAMPLE_RATE > 0 and random.random() < config.PROFILE_SAMPLE_RATE:
+        mode = "sampled"
+    else:
+        return None
+    
+    profile = Profile(endpoint, method, mode)
+    profile.token = _current_profile.set(profile)
+    sampler.add(profile)
+    return profile
+
+
+def finish(profile: Profile, status: Optional[int]) -> None:
+    """Stop sampling a profile and store it"""
+    profile.duration = time.perf_counter() - profile._start
+    profile.status = status
+    sampler.remove(profile)
+    _current_profile.reset(profile.token)
+    store.add(profile)
+
+
+def _stage_hook(agent: str, name: str):
+    """Record stage timings into the active profile and sample the stage's thread while it runs"""
+    profile = _current_profile.get()
+    if profile is None:
+        return None
+    profile.attach_current_thread()
+    
+    def finish_stage(seconds: float) -> None:
+        profile.detach_current_thread()
+        profile.stages.append({"agent": agent, "stage": name, "ms": seconds * 1000})
+    
+    return finish_stage
+
+
+metrics.add_stage_hook(_stage_hook)
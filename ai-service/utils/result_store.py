@@ -0,0 +1,163 @@
+import hashlib
+import importlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, Any, Callable, Optional, Tuple
+
+import config
+from utils.metrics import record_cache
+
+# Fields that don't affect scores: vectors are derived from the text they describe
+IGNORED_FIELDS = ("embeddings", "embeddingsUnavailable")
+
+
+def content_hash(document: Dict[str, Any]) -> str:
+    """Stable hash of parsed data (key order and derived fields don't matter)"""
+    canonical = {key: value for key, value in document.items() if key not in IGNORED_FIELDS}
+    encoded = json.dumps(canonical, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+@lru_cache(maxsize=None)
+def source_digest(*module_names: str) -> str:
+    """Hash of the source of the given modules, so edits to scoring code invalidate results"""
+    digest = hashlib.sha256()
+    for name in module_names:
+        path = getattr(importlib.import_module(name), "__file__", None)
+        if path and os.path.exists(path):
+            with open(path, "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def scorer_hash(signature: Dict[str, Any]) -> str:
+    """Hash of a scorer signature (version, model, thresholds, source digest)"""
+    encoded = json.dumps(signature, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:16]
+
+
+class ResultStore:
+    """
+    SQLite store of match and gap results keyed by (resume hash, job hash, scorer hash)
+    
+    Keys change whenever either document or the scorer changes, so a stored result is
+    never served for inputs it wasn't computed from; stale rows are pruned on demand.
+    """
+    
+    def __init__(self, path: str, max_entries: int = 100000):
+        self.path = path
+        self.max_entries = max_entries
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS results (
+                kind TEXT NOT NULL,
+                resume_hash TEXT NOT NULL,
+                job_hash TEXT NOT NULL,
+                scorer_hash TEXT NOT NULL,
+                result TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                used_at REAL NOT NULL,
+                PRIMARY KEY (kind, resume_hash, job_hash, scorer_hash)
+            );
+            CREATE INDEX IF NOT EXISTS results_used_at ON results (used_at);
+        """)
+        self._pruned = set()
+        self._puts = 0
+    
+    def get(self, kind: str, resume_hash: str, job_hash: str, scorer: str) -> Optional[Dict[str, Any]]:
+        key = (kind, resume_hash, job_hash, scorer)
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT result FROM results WHERE kind = ? AND resume_hash = ? AND job_hash = ? AND scorer_hash = ?",
+                key).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE results SET used_at = ? WHERE kind = ? AND resume_hash = ? AND job_hash = ? AND scorer_hash = ?",
+                (time.time(),) + key)
+        return json.loads(row[0])
+    
+    def put(self, kind: str, resume_hash: str, job_hash: str, scorer: str, result: Dict[str, Any]) -> None:
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (kind, resume_hash, job_hash, scorer, json.dumps(result), now, now))
+    
+    def prune(self, kind: str, current_scorer: str) -> int:
+        """Drop results of older scorers and the least recently used rows beyond max_entries"""
+        with self._lock, self._conn:
+            removed = self._conn.execute(
+                "DELETE FROM results WHERE kind = ? AND scorer_hash != ?", (kind, current_scorer)).rowcount
+            removed += self._conn.execute(
+                "DELETE FROM results WHERE rowid IN "
+                "(SELECT rowid FROM results ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)).rowcount
+        return removed
+    
+    def memoize(self, kind: str, agent, resume: Dict[str, Any], job: Dict[str, Any],
+                compute: Callable[[Dict[str, Any], Dict[str, Any]], Dict[str, Any]]) -> Tuple[Dict[str, Any], Optional[bool]]:
+        """
+        Return the stored result for a resume/job pair, computing and storing it on a miss
+        
+        Args:
+            kind: Result type ('match' or 'gaps')
+            agent: Agent computing the result; its scorer_signature() is part of the key
+            resume: Parsed resume data
+            job: Parsed job description data
+            compute: Function computing the result from (resume, job)
+        
+        Returns:
+            The result and whether it came from the store (None when it isn't stored)
+        """
+        signature = getattr(agent, "scorer_signature", None)
+        if signature is None:
+            # Fallback agents don't describe their scorer, so their results aren't stored
+            return compute(resume, job), None
+        
+        scorer = scorer_hash(signature())
+        if (kind, scorer) not in self._pruned:
+            # First use of this scorer in the process: results of older versions can go
+            self._pruned.add((kind, scorer))
+            self.prune(kind, scorer)
+        
+        resume_hash, job_hash = content_hash(resume), content_hash(job)
+        result = self.get(kind, resume_hash, job_hash, scorer)
+        record_cache(f"{kind}_results", result is not None)
+        if result is not None:
+            return result, True
+        
+        result = compute(resume, job)
+        self.put(kind, resume_hash, job_hash, scorer, result)
+        self._puts += 1
+        if self._puts % 1000 == 0:
+            self.prune(kind, scorer)
+        return result, False
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            rows = self._conn.execute("SELECT kind, COUNT(*) FROM results GROUP BY kind").fetchall()
+        return {"path": self.path, "entries": dict(rows), "maxEntries": self.max_entries}
+
+
+_store: Optional[ResultStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> ResultStore:
+    """Shared store at RESULT_STORE_PATH, opened on first use"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ResultStore(config.RESULT_STORE_PATH, config.RESULT_STORE_MAX_ENTRIES)
+        return _store
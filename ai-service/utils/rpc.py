@@ -0,0 +1,261 @@
+import asyncio
+import itertools
+import json
+import os
+import socket
+import struct
+from typing import Dict, Any, List, Optional, Tuple
+
+from utils import serialization
+
+# Length-prefixed binary RPC for co-located callers, served on a Unix domain socket.
+#
+# Request frame:  >I length of the rest | B codec | I request id | B method length | method
+#                 | H path length | path | body
+# Response frame: >I length of the rest | B codec | I request id | H status | body
+#
+# Bodies are MessagePack (codec 0) or JSON (codec 1) and are handed to/taken from the
+# FastAPI app unchanged, so RPC calls go through the same routes, validation, priority
+# scheduling and coalescing as HTTP calls, minus HTTP parsing and connection setup.
+# Several requests may be in flight on one connection; responses carry the request id
+# and can arrive out of order.
+#
+# A request whose codec byte has HEADERS_FLAG set carries extra headers (e.g. traceparent)
+# between the path and the body: >H length | "name: value" lines separated by CRLF.
+#
+# A frame over MAX_FRAME_BYTES gets a 413 response, and its connection is closed.
+MSGPACK_CODEC = 0
+JSON_CODEC = 1
+HEADERS_FLAG = 0x80
+CODEC_TYPES = {MSGPACK_CODEC: serialization.MSGPACK.encode(), JSON_CODEC: serialization.JSON.encode()}
+
+_LENGTH = struct.Struct(">I")
+_REQUEST_HEADER = struct.Struct(">BIB")
+_PATH_LENGTH = struct.Struct(">H")
+_RESPONSE_HEADER = struct.Struct(">BIH")
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+
+
+def encode_request(request_id: int, method: str, path: str, body: bytes, codec: int = MSGPACK_CODEC,
+                   headers: Optional[Dict[str, str]] = None) -> bytes:
+    method_bytes, path_bytes = method.encode(), path.encode()
+    header_block = b""
+    if headers:
+        lines = "\r\n".join(f"{name}: {value}" for name, value in headers.items()).encode("latin-1")
+        header_block = _PATH_LENGTH.pack(len(lines)) + lines
+        codec |= HEADERS_FLAG
+    rest = (_REQUEST_HEADER.pack(codec, request_id, len(method_bytes)) + method_bytes
+            + _PATH_LENGTH.pack(len(path_bytes)) + path_bytes + header_block + body)
+    return _LENGTH.pack(len(rest)) + rest
+
+
+def decode_request(frame: bytes) -> Tuple[int, int, str, str, List[Tuple[bytes, bytes]], bytes]:
+    """(codec, request id, method, path, extra headers as ASGI pairs, body)"""
+    codec, request_id, method_length = _REQUEST_HEADER.unpack_from(frame)
+    offset = _REQUEST_HEADER.size
+    method = frame[offset:offset + method_length].decode()
+    offset += method_length
+    (path_length,) = _PATH_LENGTH.unpack_from(frame, offset)
+    offset += _PATH_LENGTH.size
+    path = frame[offset:offset + path_length].decode()
+    offset += path_length
+    headers = []
+    if codec & HEADERS_FLAG:
+        codec &= ~HEADERS_FLAG
+        (block_length,) = _PATH_LENGTH.unpack_from(frame, offset)
+        offset += _PATH_LENGTH.size
+        for line in frame[offset:offset + block_length].split(b"\r\n"):
+            name, _, value = line.partition(b":")
+            if name.strip():
+                headers.append((name.strip().lower(), value.strip()))
+        offset += block_length
+    return codec, request_id, method, path, headers, frame[offset:]
+
+
+def encode_response(codec: int, request_id: int, status: int, body: bytes) -> bytes:
+    rest = _RESPONSE_HEADER.pack(codec, request_id, status) + body
+    return _LENGTH.pack(len(rest)) + rest
+
+
+def decode_response(frame: bytes) -> Tuple[int, int, int, bytes]:
+    codec, request_id, status = _RESPONSE_HEADER.unpack_from(frame)
+    return codec, request_id, status, frame[_RESPONSE_HEADER.size:]
+
+
+async def _call_app(app, method: str, path: str, body: bytes, content_type: bytes,
+                    disconnected: asyncio.Event, headers: List[Tuple[bytes, bytes]] = ()) -> Tuple[int, int, bytes]:
+    """Run one request through the ASGI app in-process"""
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(b"host", b"rpc"), (b"content-type", content_type), (b"accept", content_type),
+                    (b"content-length", str(len(body)).encode())] + list(headers),
+        "client": ("rpc", 0),
+        "server": ("rpc", 0),
+    }
+    sent = False
+    status = 500
+    codec = JSON_CODEC
+    chunks = []
+    
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        # Nothing more to read until the caller goes away
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+    
+    async def send(message):
+        nonlocal status, codec
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            # Error responses are JSON whatever the request asked for
+            for name, value in message.get("headers", []):
+                if name.lower() == b"content-type":
+                    codec = MSGPACK_CODEC if value.split(b";")[0].strip() == CODEC_TYPES[MSGPACK_CODEC] else JSON_CODEC
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+    
+    await app(scope, receive, send)
+    return status, codec, b"".join(chunks)
+
+
+class RpcServer:
+    """Serves the RPC protocol on a Unix domain socket, dispatching into the ASGI app"""
+    
+    def __init__(self, app, path: str):
+        self.app = app
+        self.path = path
+        self._server: Optional[asyncio.AbstractServer] = None
+    
+    async def start(self) -> None:
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._server = await asyncio.start_unix_server(self._handle_connection, path=self.path)
+        print(f"RPC listening on {self.path}")
+    
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+    
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        disconnected = asyncio.Event()
+        tasks = set()
+        try:
+            while True:
+                try:
+                    (length,) = _LENGTH.unpack(await reader.readexactly(_LENGTH.size))
+                    if length > MAX_FRAME_BYTES:
+                        # Answer the request, then close: the stream can't be resynchronized
+                        # without reading the whole frame
+                        self._refuse(await reader.readexactly(min(length, _REQUEST_HEADER.size)), length, writer)
+                        break
+                    frame = await reader.readexactly(length)
+                except asyncio.IncompleteReadError:
+                    break
+                task = asyncio.ensure_future(self._handle_frame(frame, writer, disconnected))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        finally:
+            disconnected.set()
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            writer.close()
+    
+    def _refuse(self, header: bytes, length: int, writer: asyncio.StreamWriter) -> None:
+        """Reply 413 to a frame over MAX_FRAME_BYTES, given its leading bytes"""
+        request_id = 0
+        if len(header) == _REQUEST_HEADER.size:
+            _, request_id, _ = _REQUEST_HEADER.unpack(header)
+        print(f"RPC request {request_id}: {length}-byte frame exceeds MAX_FRAME_BYTES ({MAX_FRAME_BYTES}), "
+              f"closing the connection")
+        detail = f"RPC frame of {length} bytes exceeds the {MAX_FRAME_BYTES}-byte limit"
+        writer.write(encode_response(JSON_CODEC, request_id, 413, json.dumps({"detail": detail}).encode()))
+    
+    async def _handle_frame(self, frame: bytes, writer: asyncio.StreamWriter, disconnected: asyncio.Event) -> None:
+        request_id, codec = 0, JSON_CODEC
+        try:
+            codec, request_id, method, path, headers, body = decode_request(frame)
+            status, codec, response_body = await _call_app(self.app, method, path, body, CODEC_TYPES[codec],
+                                                           disconnected, headers)
+        except Exception as e:
+            status, response_body = 500, json.dumps({"detail": f"RPC error: {e}"}).encode()
+            codec = JSON_CODEC
+        if not writer.is_closing():
+            # One write per frame, so concurrent responses never interleave
+            writer.write(encode_response(codec, request_id, status, response_body))
+
+
+class RpcClient:
+    """Blocking client for the RPC protocol (benchmarks, scripts, Python callers)"""
+    
+    def __init__(self, path: str, codec: int = MSGPACK_CODEC):
+        self.codec = codec
+        self._ids = itertools.count(1)
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.connect(path)
+        self._buffer = b""
+    
+    def _encode_body(self, body: Any) -> bytes:
+        if body is None:
+            return b""
+        return serialization.encode(body, CODEC_TYPES[self.codec].decode())
+    
+    def _read_frame(self) -> bytes:
+        while len(self._buffer) < _LENGTH.size:
+            self._recv()
+        (length,) = _LENGTH.unpack_from(self._buffer)
+        while len(self._buffer) < _LENGTH.size + length:
+            self._recv()
+        frame = self._buffer[_LENGTH.size:_LENGTH.size + length]
+        self._buffer = self._buffer[_LENGTH.size + length:]
+        return frame
+    
+    def _recv(self) -> None:
+        data = self._sock.recv(1 << 20)
+        if not data:
+            raise ConnectionError("RPC connection closed")
+        self._buffer += data
+    
+    def _decode(self, frame: bytes) -> Tuple[int, int, Any]:
+        codec, request_id, status, body = decode_response(frame)
+        return request_id, status, serialization.decode(body, CODEC_TYPES[codec].decode()) if body else None
+    
+    def call(self, method: str, path: str, body: Any = None,
+             headers: Optional[Dict[str, str]] = None) -> Tuple[int, Any]:
+        """Send one request and wait for its response; returns (status, decoded body)"""
+        return self.pipeline([(method, path, body)], headers)[0]
+    
+    def pipeline(self, calls: List[Tuple[str, str, Any]],
+                 headers: Optional[Dict[str, str]] = None) -> List[Tuple[int, Any]]:
+        """Send several requests (with the same extra headers) before reading any response; results are in call order"""
+        ids = []
+        frames = []
+        for method, path, body in calls:
+            request_id = next(self._ids)
+            ids.append(request_id)
+            frames.append(encode_request(request_id, method, path, self._encode_body(body), self.codec, headers))
+        self._sock.sendall(b"".join(frames))
+        
+        results: Dict[int, Tuple[int, Any]] = {}
+        while len(results) < len(ids):
+            request_id, status, body = self._decode(self._read_frame())
+            results[request_id] = (status, body)
+        return [results[request_id] for request_id in ids]
+    
+    def close(self) -> None:
+        self._sock.close()
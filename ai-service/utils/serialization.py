@@ -0,0 +1,234 @@
+import asyncio
+import inspect
+import json
+import random
+import time
+from contextvars import ContextVar
+from functools import wraps
+from typing import Dict, Any, Callable, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.encoders import jsonable_encoder
+from fastapi.routing import APIRoute
+from starlette.responses import JSONResponse
+
+import config
+from utils import metrics
+
+# orjson and msgpack are optional: without them the service speaks plain JSON as before
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+
+# Format negotiated for the response of the request being handled, and its endpoint
+_response_format: ContextVar[Tuple[str, str]] = ContextVar("response_format", default=("", JSON))
+
+
+def _media_type(header: Optional[str]) -> str:
+    return (header or "").split(";")[0].strip().lower()
+
+
+def negotiate(accept: Optional[str]) -> str:
+    """Pick the response format from the Accept header (MessagePack only when asked for)"""
+    if msgpack is not None and accept:
+        for part in accept.split(","):
+            if _media_type(part) in MSGPACK_TYPES:
+                return MSGPACK
+    return JSON
+
+
+def _default(value):
+    """Fallback for types the fast encoders don't know (datetimes for msgpack, pydantic models, ...)"""
+    return jsonable_encoder(value)
+
+
+def _baseline_dumps(content: Any) -> bytes:
+    # What Starlette's JSONResponse does
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":"),
+                      default=_default).encode("utf-8")
+
+
+def encode(content: Any, media_type: str) -> bytes:
+    """Serialize a response body in the given format"""
+    if media_type == MSGPACK:
+        return msgpack.packb(content, default=_default, use_bin_type=True)
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return _baseline_dumps(content)
+
+
+def decode(body: bytes, media_type: str) -> Any:
+    """Parse a request body in the given format"""
+    if media_type in MSGPACK_TYPES:
+        return msgpack.unpackb(body, raw=False)
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def _sample_baseline() -> bool:
+    rate = config.SERIALIZATION_BASELINE_SAMPLE_RATE
+    return rate > 0 and random.random() < rate
+
+
+class NegotiatedResponse(JSONResponse):
+    """JSON or MessagePack response, depending on what the request accepted"""
+    
+    def __init__(self, content: Any, status_code: int = 200, headers=None, media_type: Optional[str] = None,
+                 background=None):
+        self.endpoint, negotiated = _response_format.get()
+        super().__init__(content, status_code, headers, media_type or negotiated, background)
+    
+    def render(self, content: Any) -> bytes:
+        start = time.perf_counter()
+        body = encode(content, self.media_type)
+        metrics.SERIALIZATION_SECONDS.observe(self.endpoint or "other", "response", self.media_type,
+                                              value=time.perf_counter() - start)
+        
+        # On a sample of responses, time FastAPI's default path too (jsonable_encoder, then
+        # stdlib json), so the savings can be reported
+        if self.endpoint and _sample_baseline():
+            start = time.perf_counter()
+            _baseline_dumps(jsonable_encoder(content))
+            metrics.SERIALIZATION_BASELINE_SECONDS.observe(self.endpoint, "response",
+                                                           value=time.perf_counter() - start)
+        return body
+
+
+class NegotiatedRequest(Request):
+    """Request whose body may be MessagePack, parsed with the fast decoders"""
+    
+    def __init__(self, scope, receive, endpoint: str, body_type: str):
+        super().__init__(scope, receive)
+        self.endpoint = endpoint
+        self.body_type = body_type
+    
+    async def json(self) -> Any:
+        if not hasattr(self, "_json"):
+            body = await self.body()
+            start = time.perf_counter()
+            self._json = decode(body, self.body_type)
+            body_format = MSGPACK if self.body_type in MSGPACK_TYPES else JSON
+            metrics.SERIALIZATION_SECONDS.observe(self.endpoint, "request", body_format,
+                                                  value=time.perf_counter() - start)
+            
+            if _sample_baseline():
+                text = body if self.body_type == JSON else _baseline_dumps(self._json)
+                start = time.perf_counter()
+                json.loads(text)
+                metrics.SERIALIZATION_BASELINE_SECONDS.observe(self.endpoint, "request",
+                                                               value=time.perf_counter() - start)
+        return self._json
+
+
+def _returns_model(endpoint: Callable) -> bool:
+    annotation = inspect.signature(endpoint).return_annotation
+    return annotation is not inspect.Signature.empty and annotation is not None
+
+
+def _respond_directly(endpoint: Callable) -> Callable:
+    """
+    Wrap an endpoint so plain results become NegotiatedResponses
+    
+    Returning a Response skips FastAPI's jsonable_encoder pass over the whole result,
+    which is most of the default serialization cost for large dicts.
+    """
+    @wraps(endpoint)
+    async def wrapper(*args, **kwargs):
+        result = await endpoint(*args, **kwargs)
+        if isinstance(result, Response):
+            return result
+        response = NegotiatedResponse(result)
+        
+        # Carry over headers and status set on an injected `response: Response` parameter,
+        # which FastAPI only merges into responses it builds itself
+        for value in kwargs.values():
+            if isinstance(value, Response):
+                if value.status_code:
+                    response.status_code = value.status_code
+                response.headers.raw.extend(
+                    (name, header) for name, header in value.headers.raw if name != b"content-length")
+        return response
+    
+    return wrapper
+
+
+class NegotiatedRoute(APIRoute):
+    """
+    Route with content negotiation: MessagePack or JSON request bodies (by
+    Content-Type) and responses (by Accept), encoded with orjson/msgpack
+    """
+    
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        response_model = kwargs.get("response_model")
+        if isinstance(response_model, DefaultPlaceholder):
+            response_model = response_model.value
+        # Endpoints with a response model keep FastAPI's validation and serialization
+        if asyncio.iscoroutinefunction(endpoint) and response_model is None and not _returns_model(endpoint):
+            endpoint = _respond_directly(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+    
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        path = self.path
+        
+        async def negotiated_handler(request: Request) -> Response:
+            body_type = _media_type(request.headers.get("content-type")) or JSON
+            scope = request.scope
+            if body_type in MSGPACK_TYPES:
+                if msgpack is None:
+                    return JSONResponse({"detail": "MessagePack support is not installed"}, status_code=415)
+                # FastAPI only parses bodies it believes are JSON; our json() decodes MessagePack
+                scope = dict(scope)
+                scope["headers"] = [(k, v) for k, v in scope["headers"] if k != b"content-type"]
+                scope["headers"].append((b"content-type", JSON.encode()))
+            elif body_type != JSON:
+                body_type = JSON
+            
+            token = _response_format.set((path, negotiate(request.headers.get("accept"))))
+            try:
+                return await handler(NegotiatedRequest(scope, request.receive, path, body_type))
+            finally:
+                _response_format.reset(token)
+        
+        return negotiated_handler
+
+
+def report() -> Dict[str, Any]:
+    """Per-endpoint serialization time, and the time saved versus the stdlib JSON encoder"""
+    endpoints: Dict[str, Dict[str, Any]] = {}
+    for (endpoint, direction, fmt), series in metrics.SERIALIZATION_SECONDS.snapshots().items():
+        entry = endpoints.setdefault(endpoint, {}).setdefault(direction, {"count": 0, "seconds": 0.0, "formats": {}})
+        entry["count"] += series["count"]
+        entry["seconds"] += series["sum"]
+        entry["formats"][fmt] = series["count"]
+    
+    for (endpoint, direction), series in metrics.SERIALIZATION_BASELINE_SECONDS.snapshots().items():
+        entry = endpoints.get(endpoint, {}).get(direction)
+        if entry is None or not series["count"] or not entry["count"]:
+            continue
+        mean = entry["seconds"] / entry["count"]
+        baseline_mean = series["sum"] / series["count"]
+        count = series["count"]
+        entry["meanMs"] = mean * 1000
+        entry["baselineMeanMs"] = baseline_mean * 1000
+        entry["baselineSamples"] = count
+        # Estimated from the sampled baseline timings, extrapolated to every request
+        entry["savedSeconds"] = (baseline_mean - mean) * entry["count"]
+    
+    return {
+        "encoders": {"json": "orjson" if orjson is not None else "json", "msgpack": msgpack is not None},
+        "baselineSampleRate": config.SERIALIZATION_BASELINE_SAMPLE_RATE,
+        "endpoints": endpoints
+    }
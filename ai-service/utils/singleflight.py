@@ -0,0 +1,82 @@
+import asyncio
+import hashlib
+import json
+from typing import Dict, Any, Callable, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from utils import metrics, tracing
+
+
+def payload_key(endpoint: str, payload: Any) -> str:
+    """Endpoint plus a hash of the canonical request payload"""
+    if hasattr(payload, "model_dump"):
+        payload = payload.model_dump()
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return f"{endpoint}:{hashlib.sha256(encoded.encode('utf-8')).hexdigest()}"
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical requests onto one computation
+    
+    The first request for a key (the leader) runs the function in the thread pool;
+    requests arriving with the same key while it runs wait for the same result.
+    The leader's computation runs inside admit(), if given (e.g. an execution slot),
+    so followers wait on it without being admitted themselves.
+    """
+    
+    def __init__(self, enabled: bool = True, admit: Optional[Callable] = None):
+        self.enabled = enabled
+        self.admit = admit
+        self._flights: Dict[str, asyncio.Future] = {}
+        # Trace of each flight's leader, so followers' traces point at where the work ran
+        self._leader_traces: Dict[str, Optional[str]] = {}
+    
+    async def run(self, endpoint: str, payload: Any, fn: Callable, *args) -> Any:
+        """
+        Run fn(*args) in the thread pool, sharing the result with identical in-flight requests
+        
+        Args:
+            endpoint: Endpoint path (part of the key and the metric label)
+            payload: Request payload identifying the computation
+            fn: Blocking function computing the result
+            *args: Arguments for fn
+        
+        Returns:
+            The result of fn, possibly computed for another request
+        """
+        if not self.enabled:
+            return await self._compute(fn, *args)
+        
+        key = payload_key(endpoint, payload)
+        flight = self._flights.get(key)
+        if flight is not None:
+            metrics.SINGLEFLIGHT_REQUESTS.inc(endpoint, "follower")
+            with tracing.span("singleflight.wait", leaderTraceId=self._leader_traces.get(key)):
+                # Shielded so a disconnecting follower doesn't cancel the shared computation
+                return await asyncio.shield(flight)
+        
+        metrics.SINGLEFLIGHT_REQUESTS.inc(endpoint, "leader")
+        flight = asyncio.ensure_future(self._compute(fn, *args))
+        self._flights[key] = flight
+        leader_span = tracing.current_span()
+        self._leader_traces[key] = leader_span.trace_id if leader_span is not None else None
+        metrics.SINGLEFLIGHT_IN_FLIGHT.inc()
+        flight.add_done_callback(lambda _: self._finish(key))
+        return await asyncio.shield(flight)
+    
+    async def _compute(self, fn: Callable, *args) -> Any:
+        if self.admit is None:
+            return await run_in_threadpool(fn, *args)
+        async with self.admit():
+            return await run_in_threadpool(fn, *args)
+    
+    def _finish(self, key: str) -> None:
+        # Later identical requests start a new computation (results are not cached here)
+        self._flights.pop(key, None)
+        self._leader_traces.pop(key, None)
+        metrics.SINGLEFLIGHT_IN_FLIGHT.dec()
+    
+    def in_flight(self) -> int:
+        return len(self._flights)
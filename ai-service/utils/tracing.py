@@ -0,0 +1,346 @@
+import argparse
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+import config
+from utils import metrics
+
+# Service name recorded on every span; the backend writes "backend" into the same format
+SERVICE = "ai-service"
+
+# W3C trace context: traceparent = version-trace id-parent span id-flags
+_TRACEPARENT = re.compile(r'^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+
+
+class Span:
+    """One timed operation of a trace (a request, an agent stage, a queue wait)"""
+    
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "attributes", "start_time", "duration", "error",
+                 "token", "_start")
+    
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str] = None,
+                 attributes: Optional[Dict[str, Any]] = None):
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.start_time = time.time()
+        self.duration: Optional[float] = None
+        self.error: Optional[str] = None
+        self.token = None
+        self._start = time.perf_counter()
+    
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+    
+    def set(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+    
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        self.duration = time.perf_counter() - self._start
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        export([self.to_dict()])
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentId": self.parent_id,
+            "name": self.name,
+            "service": SERVICE,
+            "pid": os.getpid(),
+            "startTime": self.start_time,
+            "durationMs": self.duration * 1000 if self.duration is not None else None,
+            "attributes": self.attributes,
+            "error": self.error
+        }
+
+
+# Span of the work running in this context, when the request is traced
+_current: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+# In agent pool workers: finished spans are collected for the caller instead of exported
+_collected: ContextVar[Optional[List[Dict[str, Any]]]] = ContextVar("collected_spans", default=None)
+
+
+class MemoryExporter:
+    """Keeps the spans of the most recent traces"""
+    
+    def __init__(self, keep_traces: int):
+        self.keep_traces = keep_traces
+        self._traces: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def export(self, spans: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            for span_dict in spans:
+                trace = self._traces.get(span_dict["traceId"])
+                if trace is None:
+                    trace = self._traces[span_dict["traceId"]] = []
+                    while len(self._traces) > self.keep_traces:
+                        self._traces.popitem(last=False)
+                trace.append(span_dict)
+    
+    def get(self, trace_id: str) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            spans = self._traces.get(trace_id)
+            return sorted(spans, key=lambda span: span["startTime"]) if spans is not None else None
+    
+    def list(self) -> List[Dict[str, Any]]:
+        """Newest first: each trace's root span, duration and span count"""
+        with self._lock:
+            traces = [(trace_id, list(spans)) for trace_id, spans in reversed(self._traces.items())]
+        return [summarize(trace_id, spans) for trace_id, spans in traces]
+
+
+class FileExporter:
+    """Appends every span to a JSONL file, one object per line"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+    
+    def export(self, spans: List[Dict[str, Any]]) -> None:
+        lines = "".join(json.dumps(span_dict, separators=(",", ":")) + "\n" for span_dict in spans)
+        try:
+            with self._lock:
+                self._file.write(lines)
+                self._file.flush()
+        except OSError as e:
+            # Tracing must never fail the request it describes
+            print(f"Could not write spans to {self.path}: {e}")
+
+
+memory = MemoryExporter(config.TRACING_KEEP_TRACES)
+_exporters: List[Any] = [memory]
+if config.TRACING_ENABLED and config.TRACING_FILE:
+    _exporters.append(FileExporter(config.TRACING_FILE))
+
+
+def export(spans: List[Dict[str, Any]]) -> None:
+    """Hand finished spans to the exporters (or to the calling process, in a pool worker)"""
+    if not spans:
+        return
+    collected = _collected.get()
+    if collected is not None:
+        collected.extend(spans)
+        return
+    for exporter in _exporters:
+        exporter.export(spans)
+    metrics.TRACE_SPANS.inc(amount=len(spans))
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """(trace id, parent span id, sampled) from a traceparent header, or None if it isn't valid"""
+    match = _TRACEPARENT.match(value.strip().lower()) if value else None
+    if match is None:
+        return None
+    version, trace_id, parent_id, flags = match.groups()
+    if version == "ff" or trace_id == "0" * 32 or parent_id == "0" * 16:
+        return None
+    return trace_id, parent_id, bool(int(flags, 16) & 1)
+
+
+def start_request(name: str, traceparent: Optional[str] = None,
+                  attributes: Optional[Dict[str, Any]] = None) -> Optional[Span]:
+    """
+    Start the span of an incoming request and make it current
+    
+    A valid traceparent header continues the caller's trace and follows its sampling
+    decision; without one a new trace is started for TRACING_SAMPLE_RATE of requests.
+    
+    Returns:
+        The request span (pass it to finish_request), or None when the request isn't traced
+    """
+    if not config.TRACING_ENABLED:
+        return None
+    parent = parse_traceparent(traceparent)
+    if parent is not None:
+        trace_id, parent_id, sampled = parent
+    else:
+        trace_id, parent_id = os.urandom(16).hex(), None
+        sampled = random.random() < config.TRACING_SAMPLE_RATE
+    if not sampled:
+        return None
+    
+    request_span = Span(name, trace_id, parent_id, attributes)
+    request_span.token = _current.set(request_span)
+    return request_span
+
+
+def finish_request(request_span: Span, status: Optional[int] = None, error: Optional[BaseException] = None) -> None:
+    """End a request span started by start_request"""
+    _current.reset(request_span.token)
+    if status is not None:
+        request_span.set("status", status)
+    request_span.finish(error)
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Optional[Span]]:
+    """Time the block as a child of the current span (a no-op when the request isn't traced)"""
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    
+    child = Span(name, parent.trace_id, parent.span_id, attributes)
+    token = _current.set(child)
+    error = None
+    try:
+        yield child
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        _current.reset(token)
+        child.finish(error)
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def current_traceparent() -> Optional[str]:
+    """traceparent header value for work done on behalf of the current span"""
+    current = _current.get()
+    return current.traceparent if current is not None else None
+
+
+@contextmanager
+def remote(traceparent: Optional[str], name: str, **attributes) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Trace the block in another process under the caller's span
+    
+    The block's spans are collected into the yielded list, for the caller to export,
+    instead of going to this process's exporters.
+    """
+    parent = parse_traceparent(traceparent)
+    spans: List[Dict[str, Any]] = []
+    if parent is None or not config.TRACING_ENABLED:
+        yield spans
+        return
+    
+    collected_token = _collected.set(spans)
+    worker_span = Span(name, parent[0], parent[1], attributes)
+    token = _current.set(worker_span)
+    error = None
+    try:
+        yield spans
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        _current.reset(token)
+        worker_span.finish(error)
+        _collected.reset(collected_token)
+
+
+def _stage_hook(agent: str, name: str):
+    """Record every agent stage (spaCy, regex extraction, encode, generate) as a span"""
+    parent = _current.get()
+    if parent is None:
+        return None
+    stage_span = Span(f"{agent}.{name}", parent.trace_id, parent.span_id, {"agent": agent})
+    token = _current.set(stage_span)
+    
+    def finish_stage(seconds: float) -> None:
+        _current.reset(token)
+        stage_span.finish()
+    
+    return finish_stage
+
+
+metrics.add_stage_hook(_stage_hook)
+
+
+def summarize(trace_id: str, spans: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """The root span of a trace (the earliest span whose parent isn't in it) and totals"""
+    ids = {span["spanId"] for span in spans}
+    roots = sorted((span for span in spans if span["parentId"] not in ids), key=lambda span: span["startTime"])
+    root = roots[0] if roots else None
+    return {
+        "traceId": trace_id,
+        "name": root["name"] if root else None,
+        "service": root["service"] if root else None,
+        "startTime": min(span["startTime"] for span in spans),
+        "durationMs": root["durationMs"] if root else None,
+        "spans": len(spans),
+        "errors": sum(1 for span in spans if span["error"])
+    }
+
+
+def render(spans: Iterable[Dict[str, Any]]) -> str:
+    """A trace as an indented tree: start offset, duration, service and span name"""
+    spans = sorted(spans, key=lambda span: span["startTime"])
+    if not spans:
+        return ""
+    ids = {span["spanId"] for span in spans}
+    children: Dict[Optional[str], List[Dict[str, Any]]] = {}
+    for span_dict in spans:
+        children.setdefault(span_dict["parentId"] if span_dict["parentId"] in ids else None, []).append(span_dict)
+    
+    origin = spans[0]["startTime"]
+    lines = []
+    
+    def walk(parent_id: Optional[str], depth: int) -> None:
+        for child in children.get(parent_id, []):
+            duration = child["durationMs"]
+            lines.append(f"{(child['startTime'] - origin) * 1000:9.1f}ms "
+                         f"{duration if duration is not None else float('nan'):9.1f}ms  "
+                         f"{child['service']:<10} {'  ' * depth}{child['name']}"
+                         + (f"  [{child['error']}]" if child["error"] else ""))
+            walk(child["spanId"], depth + 1)
+    
+    walk(None, 0)
+    return "\n".join(lines) + "\n"
+
+
+def read_spans(paths: Iterable[str]) -> Dict[str, List[Dict[str, Any]]]:
+    """Spans from JSONL files (the AI service's and the backend's), grouped by trace"""
+    traces: Dict[str, List[Dict[str, Any]]] = {}
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    span_dict = json.loads(line)
+                    traces.setdefault(span_dict["traceId"], []).append(span_dict)
+    return traces
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m utils.tracing",
+                                     description="Show traces from span files written with TRACING_FILE/TRACE_FILE")
+    parser.add_argument("files", nargs="+", help="JSONL span files (several services' files are merged)")
+    parser.add_argument("--trace", help="trace id to show as a tree (default: list the slowest traces)")
+    parser.add_argument("--limit", type=int, default=20, help="traces to list")
+    args = parser.parse_args()
+    
+    traces = read_spans(args.files)
+    if args.trace:
+        if args.trace not in traces:
+            raise SystemExit(f"Trace {args.trace} not found")
+        print(render(traces[args.trace]), end="")
+        return
+    
+    summaries = sorted((summarize(trace_id, spans) for trace_id, spans in traces.items()),
+                       key=lambda summary: summary["durationMs"] or 0, reverse=True)
+    for summary in summaries[:args.limit]:
+        print(f"{summary['traceId']}  {summary['durationMs'] or 0:9.1f}ms  {summary['spans']:4d} spans  "
+              f"{summary['service']}: {summary['name']}")
+
+
+if __name__ == "__main__":
+    main()
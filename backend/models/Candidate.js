@@ -37,6 +37,10 @@ const CandidateSchema = new mongoose.Schema({
     type: String,
     default: ''
   },
+  duplicateOf: {
+    type: mongoose.Schema.Types.ObjectId,
+    ref: 'Candidate'
+  },
   resumePath: {
     type: String,
     required: [true, 'Resume path is required']
@@ -46,7 +46,8 @@ router.post('/parse-resume', async (req, res) => {
     }
     
     // Call Resume Parser Agent
-    const parsedData = await callAIService('parse-resume', { content });
+    // tier 'triage' selects the model-free agents, for pre-filtering large intakes
+    const parsedData = await callAIService('parse-resume', { content, tier: req.body.tier });
     
     res.json({ success: true, data: parsedData });
   } catch (error) {
@@ -96,7 +97,7 @@ router.post('/parse-job', async (req, res) => {
     }
     
     // Call JD Parser Agent
-    const parsedData = await callAIService('parse-job', { content });
+    const parsedData = await callAIService('parse-job', { content, tier: req.body.tier });
     
     res.json({ success: true, data: parsedData });
   } catch (error) {
@@ -107,7 +108,7 @@ router.post('/parse-job', async (req, res) => {
 // Match resume with job
 router.post('/match', async (req, res) => {
   try {
-    const { resume, job } = req.body;
+    const { resume, job, tier } = req.body;
     
     if (!resume || !job) {
       return res.status(400).json({
@@ -117,7 +118,7 @@ router.post('/match', async (req, res) => {
     }
     
     // Call Matching Agent
-    const matchResult = await callAIService('match', { resume, job });
+    const matchResult = await callAIService('match', { resume, job, tier });
     
     res.json({ success: true, data: matchResult });
   } catch (error) {
@@ -128,7 +129,7 @@ router.post('/match', async (req, res) => {
 // Detect gaps in resume compared to job
 router.post('/detect-gaps', async (req, res) => {
   try {
-    const { resume, job } = req.body;
+    const { resume, job, tier } = req.body;
     
     if (!resume || !job) {
       return res.status(400).json({
@@ -138,7 +139,7 @@ router.post('/detect-gaps', async (req, res) => {
     }
     
     // Call Gap Detection Agent
-    const gapResult = await callAIService('detect-gaps', { resume, job });
+    const gapResult = await callAIService('detect-gaps', { resume, job, tier });
     
     res.json({ success: true, data: gapResult });
   } catch (error) {
@@ -149,7 +150,7 @@ router.post('/detect-gaps', async (req, res) => {
 // Summarize text
 router.post('/summarize', async (req, res) => {
   try {
-    const { content, type } = req.body;
+    const { content, type, tier } = req.body;
     
     if (!content) {
       return res.status(400).json({
@@ -159,7 +160,7 @@ router.post('/summarize', async (req, res) => {
     }
     
     // Call Summarization Agent
-    const summary = await callAIService('summarize', { content, type: type || 'general' });
+    const summary = await callAIService('summarize', { content, type: type || 'general', tier });
     
     res.json({ success: true, data: { summary } });
   } catch (error) {
@@ -181,4 +182,25 @@ router.post('/schedule-slots', async (req, res) => {
   }
 });
 
+// Schedule a batch of candidates into interview slots
+router.post('/schedule-batch', async (req, res) => {
+  try {
+    const { candidates, interviewers, preferences } = req.body;
+    
+    if (!candidates || !interviewers) {
+      return res.status(400).json({
+        success: false,
+        error: 'Please provide candidates and interviewers'
+      });
+    }
+    
+    // Call Interview Scheduler Agent
+    const schedule = await callAIService('schedule-batch', { candidates, interviewers, preferences });
+    
+    res.json({ success: true, data: schedule });
+  } catch (error) {
+    res.status(500).json({ success: false, error: error.message });
+  }
+});
+
 module.exports = router;
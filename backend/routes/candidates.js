@@ -5,7 +5,7 @@ const path = require('path');
 const { v4: uuidv4 } = require('uuid');
 const Candidate = require('../models/Candidate');
 const Job = require('../models/Job');
-const { callAIService } = require('../utils/aiService');
+const { callAIService, syncScoreMatrix } = require('../utils/aiService');
 
 // Get all candidates
 router.get('/', async (req, res) => {
@@ -50,6 +50,7 @@ router.post('/', async (req, res) => {
     // Move file to uploads directory
     await file.mv(path.join(__dirname, '..', resumePath));
     
+    let fileContent = null;
     let candidateData = {
       name: req.body.name || 'Unknown',
       email: req.body.email || 'unknown@example.com',
@@ -59,13 +60,34 @@ router.post('/', async (req, res) => {
     
     // Parse resume using AI service
     try {
-      const fileContent = fs.readFileSync(path.join(__dirname, '..', resumePath), 'utf8');
+      fileContent = fs.readFileSync(path.join(__dirname, '..', resumePath), 'utf8');
       
-      // Call Resume Parser Agent
-      const parsedData = await callAIService('parse-resume', { content: fileContent });
+      // Look for a resume submitted before; the upload goes on without it if the lookup fails
+      let duplicate = null;
+      let original = null;
+      try {
+        const { duplicates } = await callAIService('resume-duplicates', { content: fileContent });
+        duplicate = duplicates[0] || null;
+        original = duplicate ? await Candidate.findById(duplicate.documentId) : null;
+      } catch (dedupError) {
+        console.error('Duplicate lookup failed:', dedupError.message);
+      }
       
-      // Call Summarization Agent
-      const summary = await callAIService('summarize', { content: fileContent, type: 'resume' });
+      // Parse, summarize and embed in one round trip unless the same resume was parsed before;
+      // near-duplicates are only recorded, since their parse may differ
+      let parsedData;
+      let summary;
+      if (duplicate && duplicate.exact && original && original.parsedData && Object.keys(original.parsedData).length) {
+        parsedData = original.parsedData;
+        summary = original.summary;
+      } else {
+        const ingested = await callAIService('ingest-resume', { content: fileContent, includeEmbeddings: true });
+        if (Object.keys(ingested.errors).length) {
+          console.error('AI service stages failed:', ingested.errors);
+        }
+        parsedData = ingested.parsedData || {};
+        summary = ingested.summary || '';
+      }
       
       // Update candidate data with parsed info
       candidateData = {
@@ -77,7 +99,8 @@ router.post('/', async (req, res) => {
         experience: parsedData.experience || [],
         education: parsedData.education || [],
         parsedData,
-        summary
+        summary,
+        duplicateOf: original ? original._id : undefined
       };
     } catch (aiError) {
       console.error('AI service error:', aiError);
@@ -87,6 +110,15 @@ router.post('/', async (req, res) => {
     // Create candidate
     const candidate = await Candidate.create(candidateData);
     
+    // Index the resume so later resubmissions are detected
+    if (fileContent) {
+      callAIService('resume-duplicates', { content: fileContent, documentId: candidate._id.toString() })
+        .catch(() => {});
+    }
+    
+    // Score the candidate against every job, for the top-jobs lookups
+    syncScoreMatrix('candidates', candidate._id.toString(), candidate.parsedData);
+    
     res.status(201).json({ success: true, data: candidate });
   } catch (error) {
     res.status(500).json({ success: false, error: error.message });
@@ -169,6 +201,10 @@ router.put('/:id', async (req, res) => {
       return res.status(404).json({ success: false, error: 'Candidate not found' });
     }
     
+    if (req.body.parsedData) {
+      syncScoreMatrix('candidates', candidate._id.toString(), candidate.parsedData);
+    }
+    
     res.json({ success: true, data: candidate });
   } catch (error) {
     res.status(500).json({ success: false, error: error.message });
@@ -193,6 +229,7 @@ router.delete('/:id', async (req, res) => {
     }
     
     await candidate.deleteOne();
+    syncScoreMatrix('candidates', candidate._id.toString(), null);
     
     res.json({ success: true, data: {} });
   } catch (error) {
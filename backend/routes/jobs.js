@@ -4,7 +4,7 @@ const fs = require('fs');
 const path = require('path');
 const { v4: uuidv4 } = require('uuid');
 const Job = require('../models/Job');
-const { callAIService } = require('../utils/aiService');
+const { callAIService, syncScoreMatrix } = require('../utils/aiService');
 
 // Get all jobs
 router.get('/', async (req, res) => {
@@ -56,7 +56,7 @@ router.post('/', async (req, res) => {
         const fileContent = fs.readFileSync(path.join(__dirname, '..', filePath), 'utf8');
         
         // Call JD Parser Agent
-        const parsedData = await callAIService('parse-job', { content: fileContent });
+        const parsedData = await callAIService('parse-job', { content: fileContent, includeEmbeddings: true });
         
         // Call Summarization Agent
         const summary = await callAIService('summarize', { content: fileContent, type: 'job' });
@@ -79,6 +79,9 @@ router.post('/', async (req, res) => {
       filePath
     });
     
+    // Score the job against every candidate, for the top-candidates lookups
+    syncScoreMatrix('jobs', job._id.toString(), job.parsedData);
+    
     res.status(201).json({ success: true, data: job });
   } catch (error) {
     res.status(500).json({ success: false, error: error.message });
@@ -97,6 +100,10 @@ router.put('/:id', async (req, res) => {
       return res.status(404).json({ success: false, error: 'Job not found' });
     }
     
+    if (req.body.parsedData) {
+      syncScoreMatrix('jobs', job._id.toString(), job.parsedData);
+    }
+    
     res.json({ success: true, data: job });
   } catch (error) {
     res.status(500).json({ success: false, error: error.message });
@@ -121,6 +128,7 @@ router.delete('/:id', async (req, res) => {
     }
     
     await job.deleteOne();
+    syncScoreMatrix('jobs', job._id.toString(), null);
     
     res.json({ success: true, data: {} });
   } catch (error) {
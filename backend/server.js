@@ -6,6 +6,7 @@ const morgan = require('morgan');
 const path = require('path');
 const fs = require('fs');
 const connectDB = require('./config/db');
+const { tracingMiddleware } = require('./utils/tracing');
 
 // Import routes
 const jobRoutes = require('./routes/jobs');
@@ -20,6 +21,7 @@ const app = express();
 const PORT = process.env.PORT || 5000;
 
 // Middleware
+app.use(tracingMiddleware);
 app.use(cors());
 app.use(express.json());
 app.use(fileUpload({
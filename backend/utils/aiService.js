@@ -1,29 +1,202 @@
 const axios = require('axios');
+const http = require('http');
+const https = require('https');
+const net = require('net');
+const { withSpan } = require('./tracing');
 
 const AI_SERVICE_URL = process.env.AI_SERVICE_URL || 'http://localhost:8000';
+// Unix domain socket of a co-located AI service (HTTP over the socket instead of TCP)
+const AI_SERVICE_SOCKET = process.env.AI_SERVICE_SOCKET;
+// Binary RPC socket of a co-located AI service (length-prefixed frames, no HTTP parsing)
+const AI_SERVICE_RPC_SOCKET = process.env.AI_SERVICE_RPC_SOCKET;
+const AI_SERVICE_TIMEOUT = 30000; // 30 seconds timeout
+
+// Reuse connections instead of opening one per call. The AI service keeps idle
+// connections for 75s, longer than these agents hold them, so a reused socket is
+// never closed under a request.
+const agentOptions = { keepAlive: true, keepAliveMsecs: 1000, maxSockets: 64, maxFreeSockets: 16, timeout: 60000 };
+const httpAgent = new http.Agent(agentOptions);
+const httpsAgent = new https.Agent(agentOptions);
+
+const aiClient = axios.create({
+  baseURL: AI_SERVICE_URL,
+  httpAgent,
+  httpsAgent,
+  socketPath: AI_SERVICE_SOCKET || undefined,
+  headers: {
+    'Content-Type': 'application/json'
+  },
+  timeout: AI_SERVICE_TIMEOUT
+});
+
+// RPC frames (see ai-service/utils/rpc.py), always with the JSON codec:
+// request  = u32 length | u8 codec | u32 id | u8 method length | method | u16 path length | path
+//            | [u16 headers length | "name: value" lines joined by CRLF, when codec has HEADERS_FLAG] | body
+// response = u32 length | u8 codec | u32 id | u16 status | body
+const JSON_CODEC = 1;
+const HEADERS_FLAG = 0x80;
+
+/**
+ * One persistent connection to the AI service RPC socket, with many requests in flight
+ */
+class RpcConnection {
+  constructor(socketPath) {
+    this.socketPath = socketPath;
+    this.socket = null;
+    this.buffer = Buffer.alloc(0);
+    this.nextId = 1;
+    this.pending = new Map();
+  }
+
+  connect() {
+    if (this.socket) {
+      return;
+    }
+    const socket = net.createConnection(this.socketPath);
+    this.socket = socket;
+    // Events of a socket already replaced by a reconnect must not touch the new one's requests
+    socket.on('data', (chunk) => {
+      if (socket === this.socket) {
+        this.onData(chunk);
+      }
+    });
+    const fail = (error) => this.reset(socket, error || new Error('RPC connection closed'));
+    socket.on('error', fail);
+    socket.on('close', () => fail());
+  }
+
+  reset(socket, error) {
+    if (socket !== this.socket) {
+      return;
+    }
+    socket.destroy();
+    this.socket = null;
+    this.buffer = Buffer.alloc(0);
+    for (const { reject, timer } of this.pending.values()) {
+      clearTimeout(timer);
+      reject(error);
+    }
+    this.pending.clear();
+  }
+
+  onData(chunk) {
+    this.buffer = this.buffer.length ? Buffer.concat([this.buffer, chunk]) : chunk;
+    while (this.buffer.length >= 4) {
+      const length = this.buffer.readUInt32BE(0);
+      if (this.buffer.length < 4 + length) {
+        break;
+      }
+      const frame = this.buffer.subarray(4, 4 + length);
+      this.buffer = this.buffer.subarray(4 + length);
+
+      const id = frame.readUInt32BE(1);
+      const status = frame.readUInt16BE(5);
+      const body = frame.subarray(7);
+      const request = this.pending.get(id);
+      if (!request) {
+        continue;
+      }
+      this.pending.delete(id);
+      clearTimeout(request.timer);
+
+      let data = null;
+      try {
+        data = body.length ? JSON.parse(body.toString('utf8')) : null;
+      } catch (error) {
+        request.reject(new Error(`Invalid RPC response: ${error.message}`));
+        continue;
+      }
+      if (status >= 400) {
+        const detail = data && data.detail ? JSON.stringify(data.detail) : `status ${status}`;
+        request.reject(new Error(`Request failed with status code ${status}: ${detail}`));
+      } else {
+        request.resolve(data);
+      }
+    }
+  }
+
+  call(method, path, data, headers = {}) {
+    this.connect();
+    const id = this.nextId;
+    this.nextId = this.nextId >= 0xffffffff ? 1 : this.nextId + 1;
+
+    const methodBytes = Buffer.from(method);
+    const pathBytes = Buffer.from(path);
+    const body = data === undefined ? Buffer.alloc(0) : Buffer.from(JSON.stringify(data));
+    const headerLines = Object.entries(headers).map(([name, value]) => `${name}: ${value}`).join('\r\n');
+    let headerBlock = Buffer.alloc(0);
+    if (headerLines) {
+      const lines = Buffer.from(headerLines, 'latin1');
+      headerBlock = Buffer.alloc(2 + lines.length);
+      headerBlock.writeUInt16BE(lines.length, 0);
+      lines.copy(headerBlock, 2);
+    }
+    const header = Buffer.alloc(4 + 6);
+    header.writeUInt32BE(6 + methodBytes.length + 2 + pathBytes.length + headerBlock.length + body.length, 0);
+    header.writeUInt8(headerLines ? JSON_CODEC | HEADERS_FLAG : JSON_CODEC, 4);
+    header.writeUInt32BE(id, 5);
+    header.writeUInt8(methodBytes.length, 9);
+    const pathLength = Buffer.alloc(2);
+    pathLength.writeUInt16BE(pathBytes.length, 0);
+
+    return new Promise((resolve, reject) => {
+      const timer = setTimeout(() => {
+        this.pending.delete(id);
+        reject(new Error(`timeout of ${AI_SERVICE_TIMEOUT}ms exceeded`));
+      }, AI_SERVICE_TIMEOUT);
+      this.pending.set(id, { resolve, reject, timer });
+      this.socket.write(Buffer.concat([header, methodBytes, pathLength, pathBytes, headerBlock, body]));
+    });
+  }
+}
+
+const rpcConnection = AI_SERVICE_RPC_SOCKET ? new RpcConnection(AI_SERVICE_RPC_SOCKET) : null;
 
 /**
  * Call AI microservice endpoints
  * @param {string} endpoint - The AI service endpoint to call
  * @param {Object} data - The data to send to the AI service
+ * @param {string} [method] - HTTP method (POST unless given)
  * @returns {Promise<Object>} - The response data from the AI service
  */
-const callAIService = async (endpoint, data) => {
+const callAIService = (endpoint, data, method = 'POST') => withSpan(`ai-service /${endpoint}`, { endpoint }, async (span) => {
+  // The AI service continues this trace, so its spans nest under this call
+  const headers = span ? { traceparent: span.traceparent } : {};
   try {
-    const response = await axios.post(`${AI_SERVICE_URL}/${endpoint}`, data, {
-      headers: {
-        'Content-Type': 'application/json'
-      },
-      timeout: 30000 // 30 seconds timeout
-    });
-    
+    if (rpcConnection) {
+      return await rpcConnection.call(method, `/${endpoint}`, data, headers);
+    }
+
+    const response = await aiClient.request({ method, url: `/${endpoint}`, data, headers });
+
     return response.data;
   } catch (error) {
     console.error(`Error calling AI service ${endpoint}:`, error.message);
     throw new Error(`AI service error: ${error.message}`);
   }
+});
+
+/**
+ * Keep the AI service's score matrix in step with a stored candidate or job
+ * @param {string} kind - 'candidates' or 'jobs'
+ * @param {string} id - The candidate or job id
+ * @param {Object|null} parsedData - Its parsed resume or job description, or null once deleted
+ * @returns {Promise<void>} - Resolves when done; failures are logged, not thrown
+ */
+const syncScoreMatrix = async (kind, id, parsedData) => {
+  try {
+    if (parsedData === null) {
+      await callAIService(`score-matrix/${kind}/${id}`, undefined, 'DELETE');
+    } else if (parsedData && Object.keys(parsedData).length) {
+      await callAIService(`score-matrix/${kind}/${id}`, parsedData, 'PUT');
+    }
+  } catch (error) {
+    // Not in the matrix (never parsed) or the AI service is down; a rebuild catches up
+    console.error(`Score matrix update failed for ${kind} ${id}:`, error.message);
+  }
 };
 
 module.exports = {
-  callAIService
+  callAIService,
+  syncScoreMatrix
 };
@@ -0,0 +1,114 @@
+const crypto = require('crypto');
+const fs = require('fs');
+const path = require('path');
+const { AsyncLocalStorage } = require('async_hooks');
+
+// W3C trace context: every request gets a span, continuing the caller's traceparent if
+// it sent one, and calls to the AI service carry it on. With TRACE_FILE set, spans are
+// appended as JSON lines in the same format as the AI service's TRACING_FILE, so both
+// files can be read together (`python -m utils.tracing backend.jsonl ai.jsonl`).
+const SERVICE = 'backend';
+const TRACE_FILE = process.env.TRACE_FILE;
+const TRACEPARENT = /^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$/;
+
+const storage = new AsyncLocalStorage();
+const traceStream = TRACE_FILE ? openTraceFile(TRACE_FILE) : null;
+
+function openTraceFile(file) {
+  fs.mkdirSync(path.dirname(path.resolve(file)), { recursive: true });
+  const stream = fs.createWriteStream(file, { flags: 'a' });
+  // Tracing must never take the server down
+  stream.on('error', (error) => console.error(`Could not write spans to ${file}:`, error.message));
+  return stream;
+}
+
+function parseTraceparent(value) {
+  const match = value ? TRACEPARENT.exec(value.trim().toLowerCase()) : null;
+  if (!match || match[1] === 'ff' || /^0+$/.test(match[2]) || /^0+$/.test(match[3])) {
+    return null;
+  }
+  return { traceId: match[2], parentId: match[3], sampled: (parseInt(match[4], 16) & 1) === 1 };
+}
+
+class Span {
+  constructor(name, traceId, parentId, sampled, attributes = {}) {
+    this.traceId = traceId;
+    this.spanId = crypto.randomBytes(8).toString('hex');
+    this.parentId = parentId || null;
+    this.name = name;
+    this.sampled = sampled;
+    this.attributes = attributes;
+    this.startTime = Date.now() / 1000;
+    this.start = process.hrtime.bigint();
+    this.error = null;
+  }
+
+  get traceparent() {
+    return `00-${this.traceId}-${this.spanId}-${this.sampled ? '01' : '00'}`;
+  }
+
+  finish(error) {
+    if (error) {
+      this.error = error.message || String(error);
+    }
+    if (!this.sampled || !traceStream) {
+      return;
+    }
+    traceStream.write(JSON.stringify({
+      traceId: this.traceId,
+      spanId: this.spanId,
+      parentId: this.parentId,
+      name: this.name,
+      service: SERVICE,
+      pid: process.pid,
+      startTime: this.startTime,
+      durationMs: Number(process.hrtime.bigint() - this.start) / 1e6,
+      attributes: this.attributes,
+      error: this.error
+    }) + '\n');
+  }
+}
+
+/**
+ * Express middleware: a span per request, current for everything the request awaits
+ */
+const tracingMiddleware = (req, res, next) => {
+  const parent = parseTraceparent(req.headers.traceparent);
+  const span = parent
+    ? new Span(`${req.method} ${req.path}`, parent.traceId, parent.parentId, parent.sampled)
+    : new Span(`${req.method} ${req.path}`, crypto.randomBytes(16).toString('hex'), null, true);
+  res.setHeader('X-Trace-Id', span.traceId);
+  res.on('finish', () => {
+    // Named by route template once routing is done, e.g. POST /api/candidates/:id/resume
+    if (req.route) {
+      span.name = `${req.method} ${req.baseUrl}${req.route.path}`;
+    }
+    span.attributes.status = res.statusCode;
+    span.finish();
+  });
+  storage.run(span, next);
+};
+
+/**
+ * Run fn inside a child span of the current span; fn receives the span
+ */
+const withSpan = async (name, attributes, fn) => {
+  const parent = storage.getStore();
+  if (!parent) {
+    return fn(null);
+  }
+  const span = new Span(name, parent.traceId, parent.spanId, parent.sampled, attributes);
+  try {
+    return await storage.run(span, () => fn(span));
+  } catch (error) {
+    span.error = error.message;
+    throw error;
+  } finally {
+    span.finish();
+  }
+};
+
+module.exports = {
+  tracingMiddleware,
+  withSpan
+};